@@ -3,24 +3,144 @@ Analysis Core Module
 Orchestrates all image analysis functions
 """
 
+import hashlib
+import json
+import numpy as np
+import cv2
+import python_config
 from python_config import (
-    ENABLE_BRIGHTNESS_ANALYSIS, ENABLE_COLOR_ANALYSIS, ENABLE_SKY_FEATURES
+    ENABLE_BRIGHTNESS_ANALYSIS, ENABLE_COLOR_ANALYSIS, ENABLE_SKY_FEATURES,
+    ENABLE_FUSED_ANALYSIS, ANALYSIS_DECODE_SCALE, SKY_SAMPLE_RATE
 )
 from brightness_analysis import analyze_brightness
 from color_analysis import analyze_color
 from sky_features import analyze_sky_features
+from fused_analysis import analyze_image_fused
 
 
-def analyze_image(image):
+# Bump when analysis code changes in a way that changes stored results
+ANALYSIS_ALGORITHM_VERSION = 1
+
+# Config settings that affect analysis results (prefix match)
+ANALYSIS_CONFIG_PREFIXES = (
+    'BRIGHTNESS_', 'COLOR_', 'SKY_', 'COVERAGE_',
+    'ENABLE_BRIGHTNESS_ANALYSIS', 'ENABLE_COLOR_ANALYSIS', 'ENABLE_SKY_FEATURES'
+)
+
+
+def get_analysis_version():
+    """
+    Identify the analysis code + thresholds currently in effect
+    
+    Stored with every sky_analysis row, so the reanalysis tool can find
+    rows computed with older settings.
+    
+    Returns:
+        str: e.g. 'v1-3f2a9c1e'
+    """
+    settings = {
+        name: getattr(python_config, name)
+        for name in sorted(dir(python_config))
+        if name.isupper() and name.startswith(ANALYSIS_CONFIG_PREFIXES)
+    }
+    # Only included when reduced, so full-decode rows from before the
+    # setting existed keep their version
+    if ANALYSIS_DECODE_SCALE != 1:
+        settings['ANALYSIS_DECODE_SCALE'] = ANALYSIS_DECODE_SCALE
+    digest = hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+    return f"v{ANALYSIS_ALGORITHM_VERSION}-{digest[:8]}"
+
+
+ANALYSIS_VERSION = get_analysis_version()
+
+# cv2.imdecode flag for each analysis decode scale
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+def decode_for_analysis(image_data, decode_scale=ANALYSIS_DECODE_SCALE):
+    """
+    Decode JPEG bytes at the analysis resolution
+    
+    Reduced scales are decoded straight from the DCT coefficients, which
+    costs a fraction of a full decode.
+    
+    Args:
+        image_data: Encoded JPEG bytes
+        decode_scale: 1 (full), 2, 4 or 8
+    
+    Returns:
+        OpenCV image (BGR), or None if the bytes could not be decoded
+    """
+    return cv2.imdecode(np.frombuffer(image_data, np.uint8), REDUCED_DECODE_FLAGS[decode_scale])
+
+
+def get_sample_rate_for_scale(decode_scale):
+    """
+    Sky-features sample rate for a reduced image
+    
+    Shrinks the stride with the image so roughly the same number of
+    pixels is classified at every decode scale.
+    """
+    return max(1, round(SKY_SAMPLE_RATE / decode_scale))
+
+
+def analyze_image(image, decode_scale=1):
     """
     Perform full analysis on an image
     
     Args:
         image: OpenCV image (BGR format)
+        decode_scale: Reduction the image was decoded at (see decode_for_analysis)
     
     Returns:
         dict: Complete analysis results
     """
+    sample_rate = get_sample_rate_for_scale(decode_scale)
+    
+    if ENABLE_FUSED_ANALYSIS:
+        results = analyze_image_fused(image, sample_rate)
+    else:
+        results = run_separate_analyzers(image, sample_rate)
+    
+    # Calculate overall score
+    if ENABLE_BRIGHTNESS_ANALYSIS and ENABLE_COLOR_ANALYSIS:
+        features = results.get("features")
+        results["clear_sky_score"] = calculate_clear_sky_score(
+            results["brightness"],
+            results["color"],
+            features
+        )
+        results["sky_condition"] = results["color"]["condition"]
+    
+    height, width = image.shape[:2]
+    results["resolution"] = {
+        "width": width,
+        "height": height,
+        "decode_scale": decode_scale
+    }
+    results["analysis_version"] = ANALYSIS_VERSION
+    
+    return results
+
+
+def run_separate_analyzers(image, sample_rate=SKY_SAMPLE_RATE):
+    """
+    Run each enabled analyzer on its own pass over the image
+    
+    Reference path for analyze_image_fused(); produces identical results.
+    
+    Args:
+        image: OpenCV image (BGR format)
+        sample_rate: Sky features sample rate
+    
+    Returns:
+        dict: 'brightness', 'color' and 'features' results
+    """
     results = {}
     
     # Brightness analysis
@@ -33,17 +153,7 @@ def analyze_image(image):
     
     # Sky features
     if ENABLE_SKY_FEATURES:
-        results["features"] = analyze_sky_features(image)
-    
-    # Calculate overall score
-    if ENABLE_BRIGHTNESS_ANALYSIS and ENABLE_COLOR_ANALYSIS:
-        features = results.get("features")
-        results["clear_sky_score"] = calculate_clear_sky_score(
-            results["brightness"],
-            results["color"],
-            features
-        )
-        results["sky_condition"] = results["color"]["condition"]
+        results["features"] = analyze_sky_features(image, sample_rate)
     
     return results
 
@@ -0,0 +1,211 @@
+"""
+Analysis Executor Module
+Runs image analysis in a pool of worker processes
+
+analyze_image is CPU-bound and holds the GIL, so running it on poller
+threads used one core during a backfill and slowed Waitress down. Work
+submitted here goes to a ProcessPoolExecutor instead. Jobs carry the
+encoded JPEG bytes (decoded inside the worker), so no pixel arrays are
+pickled, and return plain result dicts.
+
+Workers time their own decode and analysis and return the timings in the
+results' 'timings' entry; the parent records them (plus the time a job
+spent queued and in transit) in metrics when the job finishes.
+
+Used by the ESP32 pollers and by the reanalysis tool.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import cv2
+from python_config import (
+    ANALYSIS_USE_PROCESSES, ANALYSIS_WORKERS, ANALYSIS_WORKER_NICE, ANALYSIS_DECODE_SCALE
+)
+from analysis_core import analyze_image, decode_for_analysis
+from metrics import metrics
+
+
+def analyze_jpeg_bytes(image_data):
+    """
+    Decode JPEG bytes and analyze them (runs inside a worker process)
+
+    Decodes at ANALYSIS_DECODE_SCALE; the results' 'resolution' entry
+    records the size that was actually analyzed and 'timings' the seconds
+    spent decoding and analyzing.
+
+    Args:
+        image_data: Encoded JPEG bytes
+
+    Returns:
+        dict: Results from analysis_core.analyze_image(), or None if the
+              bytes could not be decoded
+    """
+    start = time.perf_counter()
+    image = decode_for_analysis(image_data, ANALYSIS_DECODE_SCALE)
+    if image is None:
+        return None
+
+    decoded = time.perf_counter()
+    results = analyze_image(image, ANALYSIS_DECODE_SCALE)
+    results['timings'] = {
+        'decode': decoded - start,
+        'analysis': time.perf_counter() - decoded
+    }
+    return results
+
+
+def analyze_image_file(image_path):
+    """
+    Load an image from disk and analyze it (runs inside a worker process)
+
+    Args:
+        image_path: Path to a stored image
+
+    Returns:
+        dict: Analysis results, or None if the file is missing/unreadable
+    """
+    start = time.perf_counter()
+    try:
+        with open(image_path, 'rb') as f:
+            image_data = f.read()
+    except OSError:
+        return None
+
+    read = time.perf_counter() - start
+    results = analyze_jpeg_bytes(image_data)
+    if results is not None:
+        results['timings']['disk_read'] = read
+    return results
+
+
+def _record_timings(future, submitted):
+    """Done callback: record a finished job's stage timings in metrics"""
+    if future.cancelled() or future.exception() is not None:
+        return
+
+    results = future.result()
+    if not results:
+        return
+
+    timings = results.get('timings', {})
+    for stage, seconds in timings.items():
+        metrics.observe('stage_seconds', seconds, stage=stage)
+
+    # Whatever the worker did not spend working was queueing and pickling
+    elapsed = time.perf_counter() - submitted
+    metrics.observe('stage_seconds', max(0.0, elapsed - sum(timings.values())),
+                    stage='analysis_wait')
+
+
+def _init_worker():
+    """Worker process setup"""
+    # One OpenCV thread per process - the pool already uses every core
+    cv2.setNumThreads(1)
+
+    if ANALYSIS_WORKER_NICE and hasattr(os, 'nice'):
+        try:
+            os.nice(ANALYSIS_WORKER_NICE)
+        except OSError:
+            pass
+
+
+def get_default_worker_count():
+    """One worker per core, leaving one core for the web server"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+class AnalysisExecutor:
+    """Process pool for analyze_image jobs (started on first use)"""
+
+    def __init__(self, max_workers=ANALYSIS_WORKERS, use_processes=ANALYSIS_USE_PROCESSES):
+        self.max_workers = max_workers or get_default_worker_count()
+        self.use_processes = use_processes
+        self.pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, image_data):
+        """
+        Queue JPEG bytes for analysis
+
+        Args:
+            image_data: Encoded JPEG bytes
+
+        Returns:
+            concurrent.futures.Future resolving to the result dict (or None
+            if the image could not be decoded)
+        """
+        return self._submit(analyze_jpeg_bytes, image_data)
+
+    def submit_file(self, image_path):
+        """
+        Queue a stored image for analysis (the worker reads the file)
+
+        Returns:
+            concurrent.futures.Future resolving to the result dict (or None)
+        """
+        return self._submit(analyze_image_file, image_path)
+
+    def analyze(self, image_data):
+        """Analyze JPEG bytes and wait for the result"""
+        return self.submit(image_data).result()
+
+    def _submit(self, fn, arg):
+        submitted = time.perf_counter()
+        future = self._submit_job(fn, arg)
+        future.add_done_callback(lambda done: _record_timings(done, submitted))
+        return future
+
+    def _submit_job(self, fn, arg):
+        if not self.use_processes:
+            # In-process fallback with the same Future interface
+            future = Future()
+            try:
+                future.set_result(fn(arg))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        pool = self._get_pool()
+        try:
+            return pool.submit(fn, arg)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer) - start a new pool
+            print("[Analysis] ⚠ Worker pool broken - restarting")
+            with self._lock:
+                if self.pool is pool:
+                    self.pool = None
+            return self._get_pool().submit(fn, arg)
+
+    def _get_pool(self):
+        with self._lock:
+            if self.pool is None:
+                # spawn, not fork: the server process has running threads
+                # (Waitress, ingest writer) that must not be forked mid-lock
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker
+                )
+                print(f"[Analysis] Started {self.max_workers} analysis worker process(es)")
+            return self.pool
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker processes
+
+        Args:
+            wait: Finish queued jobs first (False cancels jobs not yet started)
+        """
+        with self._lock:
+            pool, self.pool = self.pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+# Global instance
+analysis_executor = AnalysisExecutor()
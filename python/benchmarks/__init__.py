@@ -0,0 +1,26 @@
+"""
+Benchmarks Package
+Timing suite for the analysis, storage and web hot paths
+
+Runs against a deterministic synthetic sky corpus (see corpus.py) inside
+a throwaway working directory, so the real database and image archive
+are never touched. Results are written as JSON (throughput and latency
+percentiles per benchmark) and compared against a stored baseline; a
+benchmark whose median slows down by more than the tolerance fails the
+run.
+
+Usage (from the python/ directory):
+    python -m benchmarks                        # Run everything, compare to baseline
+    python -m benchmarks --quick                # Fewer iterations and resolutions
+    python -m benchmarks --filter analysis      # Only benchmarks whose name contains this
+    python -m benchmarks --output results.json  # Also write the results here
+    python -m benchmarks --save-baseline        # Store this run as the new baseline
+    python -m benchmarks --tolerance 0.4        # Allow 40% slowdown before failing (default 25%)
+"""
+
+import os
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stored baseline for regression checks (machine-specific; see --save-baseline)
+BASELINE_FILE = os.path.join(PACKAGE_DIR, 'baseline.json')
@@ -0,0 +1,161 @@
+"""
+Benchmark Runner
+python -m benchmarks [--quick] [--filter TEXT] [--output FILE]
+                     [--baseline FILE] [--save-baseline] [--tolerance 0.25]
+
+Exit status is 1 if any benchmark regressed against the baseline.
+"""
+
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from benchmarks import PACKAGE_DIR, BASELINE_FILE
+from benchmarks.baseline import (
+    DEFAULT_TOLERANCE, load_results, save_results, compare, print_comparison
+)
+from benchmarks.corpus import build_corpus, RESOLUTIONS, QUICK_RESOLUTIONS, CORPUS_SEED
+from benchmarks.timing import time_callable
+
+# Project modules (python/) must stay importable after the chdir below
+SOURCE_DIR = os.path.dirname(PACKAGE_DIR)
+if SOURCE_DIR not in sys.path:
+    sys.path.insert(0, SOURCE_DIR)
+
+QUICK_SCALE = 0.2
+
+
+def get_option(name, default=None):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SOURCE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def get_environment():
+    """Where the numbers came from (baselines only compare on the same machine)"""
+    import cv2
+    import numpy as np
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': get_git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__
+    }
+
+
+@contextmanager
+def scratch_directory():
+    """
+    Run a suite in an empty temporary working directory with a fresh database
+
+    All project paths (database/, captured_images/, thumbnails/) are
+    relative to the working directory, so switching to a temporary one
+    keeps the benchmarks away from real data - and each suite away from
+    the files and rows the previous one left behind.
+    """
+    from database_operations import close_all_connections
+    from database_schema import create_database
+
+    original_dir = os.getcwd()
+    path = tempfile.mkdtemp(prefix='sky_bench_')
+    os.chdir(path)
+    try:
+        # Pooled connections still point at the previous directory's database
+        close_all_connections()
+        create_database()
+        yield path
+    finally:
+        close_all_connections()
+        os.chdir(original_dir)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def run_benchmarks(quick=False, name_filter=None):
+    """
+    Run every suite, each in its own scratch directory (see scratch_directory)
+
+    Args:
+        quick: Fewer iterations and no UXGA images
+        name_filter: Only run benchmarks whose name contains this
+
+    Returns:
+        dict: meta (environment and settings) and results (stats per benchmark)
+    """
+    from benchmarks.suites import SUITES
+
+    scale = QUICK_SCALE if quick else 1.0
+    resolutions = QUICK_RESOLUTIONS if quick else RESOLUTIONS
+
+    print(f"[Bench] Generating corpus ({len(resolutions)} resolution(s))...")
+    corpus = build_corpus(resolutions)
+
+    results = {}
+    for suite_name, suite in SUITES.items():
+        print(f"[Bench] Suite: {suite_name}")
+        with scratch_directory():
+            for name, fn, iterations in suite(corpus, scale):
+                if name_filter and name_filter not in name:
+                    continue
+
+                stats = time_callable(fn, iterations)
+                results[name] = stats
+                print(f"  {name:<44} p50 {stats['p50_ms']:>9.3f}ms  p95 {stats['p95_ms']:>9.3f}ms  "
+                      f"{stats['throughput_per_s']:>9.1f}/s")
+
+    return {
+        'meta': dict(get_environment(), quick=quick, filter=name_filter, corpus_seed=CORPUS_SEED),
+        'results': results
+    }
+
+
+if __name__ == '__main__':
+    quick = '--quick' in sys.argv
+    baseline_path = get_option('--baseline', BASELINE_FILE)
+    output_path = get_option('--output')
+    tolerance = float(get_option('--tolerance', DEFAULT_TOLERANCE))
+
+    start = time.time()
+    current = run_benchmarks(quick=quick, name_filter=get_option('--filter'))
+    print(f"[Bench] {len(current['results'])} benchmark(s) in {time.time() - start:.1f}s")
+
+    if output_path:
+        save_results(current, output_path)
+        print(f"[Bench] Results written to {output_path}")
+
+    if '--save-baseline' in sys.argv:
+        save_results(current, baseline_path)
+        print(f"[Bench] Baseline saved to {baseline_path}")
+        sys.exit(0)
+
+    baseline = load_results(baseline_path)
+    if baseline is None:
+        print(f"[Bench] No baseline at {baseline_path} - run with --save-baseline to create one")
+        sys.exit(0)
+
+    if baseline.get('meta', {}).get('quick') != quick:
+        print("[Bench] ⚠ Baseline was recorded with a different --quick setting")
+
+    rows = compare(current, baseline, tolerance)
+    print_comparison(rows, tolerance)
+    sys.exit(1 if any(row['status'] == 'regression' for row in rows) else 0)
@@ -0,0 +1,103 @@
+"""
+Baseline Comparison
+Compare a benchmark run against a stored baseline run
+
+Medians (p50) are compared: they are far less sensitive than means or
+tail percentiles to a single slow call on a busy machine. Baselines are
+only meaningful on the machine that recorded them.
+"""
+
+import json
+import os
+
+# Slowdown (fraction of the baseline median) that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Ignore slowdowns smaller than this - timer noise on sub-millisecond calls
+MIN_REGRESSION_MS = 0.05
+
+
+def load_results(path):
+    """
+    Read a results file
+
+    Returns:
+        dict: The run, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    """Write a run as indented JSON"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare each benchmark's median with the baseline's
+
+    Args:
+        current: Results of this run
+        baseline: Stored results
+        tolerance: Allowed slowdown as a fraction (0.15 = 15%)
+
+    Returns:
+        list: Dicts with name, baseline_ms, current_ms, change (fraction,
+              None for benchmarks new in this run) and status
+              ('ok', 'faster', 'regression', 'new')
+    """
+    rows = []
+    baseline_results = baseline.get('results', {})
+
+    for name, stats in sorted(current.get('results', {}).items()):
+        current_ms = stats['p50_ms']
+        reference = baseline_results.get(name)
+
+        if reference is None or not reference.get('p50_ms'):
+            rows.append({'name': name, 'baseline_ms': None, 'current_ms': current_ms,
+                         'change': None, 'status': 'new'})
+            continue
+
+        baseline_ms = reference['p50_ms']
+        change = (current_ms - baseline_ms) / baseline_ms
+
+        if change > tolerance and current_ms - baseline_ms > MIN_REGRESSION_MS:
+            status = 'regression'
+        elif change < -tolerance:
+            status = 'faster'
+        else:
+            status = 'ok'
+
+        rows.append({'name': name, 'baseline_ms': baseline_ms, 'current_ms': current_ms,
+                     'change': round(change, 4), 'status': status})
+
+    return rows
+
+
+def print_comparison(rows, tolerance=DEFAULT_TOLERANCE):
+    """Print the comparison as a table"""
+    marks = {'ok': '', 'faster': '✓ faster', 'regression': '✗ REGRESSION', 'new': 'new'}
+
+    print("\n" + "="*96)
+    print(f"{'Benchmark':<44} {'Baseline p50':>13} {'Current p50':>12} {'Change':>9}   Status")
+    print("-"*96)
+    for row in rows:
+        baseline = f"{row['baseline_ms']:.3f}ms" if row['baseline_ms'] is not None else "-"
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else "-"
+        print(f"{row['name']:<44} {baseline:>13} {row['current_ms']:>10.3f}ms {change:>9}   "
+              f"{marks[row['status']]}")
+    print("="*96)
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"✗ {len(regressions)} benchmark(s) slower than baseline by more than {tolerance:.0%}")
+    else:
+        print(f"✓ No regressions (tolerance {tolerance:.0%})")
+    print()
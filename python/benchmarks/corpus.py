@@ -0,0 +1,129 @@
+"""
+Synthetic Sky Corpus
+Deterministic test images for the benchmarks
+
+Every image is generated from a fixed seed, so two runs (or two machines)
+time exactly the same pixels. Conditions cover the analyzers' main
+branches; resolutions match ESP32-CAM frame sizes.
+"""
+
+import cv2
+import numpy as np
+
+CONDITIONS = ('clear', 'overcast', 'night', 'mixed')
+
+# ESP32-CAM frame sizes: QVGA, SVGA, UXGA
+RESOLUTIONS = ((320, 240), (800, 600), (1600, 1200))
+QUICK_RESOLUTIONS = ((320, 240), (800, 600))
+
+CORPUS_SEED = 20260304
+JPEG_QUALITY = 85
+
+# Fraction of the frame below the horizon
+GROUND_FRACTION = 0.15
+
+
+def vertical_gradient(height, width, top, bottom):
+    """BGR gradient from `top` (first row) to `bottom` (last row)"""
+    t = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None, None]
+    gradient = (1 - t) * np.array(top, np.float32) + t * np.array(bottom, np.float32)
+    return np.repeat(gradient, width, axis=1)
+
+
+def smooth_noise(rng, height, width, cells):
+    """Low-frequency noise in 0..1 (random grid upscaled with cubic interpolation)"""
+    grid = rng.random((cells, max(2, cells * width // height)), dtype=np.float32)
+    noise = cv2.resize(grid, (width, height), interpolation=cv2.INTER_CUBIC)
+    return np.clip(noise, 0.0, 1.0)
+
+
+def add_ground(image, rng):
+    """Dark ground strip with texture along the bottom of the frame"""
+    height, width = image.shape[:2]
+    horizon = int(height * (1 - GROUND_FRACTION))
+    ground = np.array((40, 70, 60), np.float32) + rng.normal(0, 12, (height - horizon, width, 3))
+    image[horizon:] = ground
+
+
+def generate_sky(condition, width, height, seed=CORPUS_SEED):
+    """
+    Generate one synthetic sky image
+
+    Args:
+        condition: 'clear', 'overcast', 'night' or 'mixed'
+        width, height: Image size in pixels
+        seed: Random seed (same seed = same pixels)
+
+    Returns:
+        numpy.ndarray: BGR uint8 image
+    """
+    rng = np.random.default_rng([seed, CONDITIONS.index(condition), width, height])
+
+    if condition == 'clear':
+        image = vertical_gradient(height, width, (200, 120, 40), (235, 200, 160))
+    elif condition == 'overcast':
+        image = vertical_gradient(height, width, (150, 150, 150), (195, 195, 195))
+        image += (smooth_noise(rng, height, width, 6)[..., None] - 0.5) * 40
+    elif condition == 'night':
+        image = vertical_gradient(height, width, (25, 10, 5), (45, 25, 20))
+        stars = rng.random((height, width)) > 0.999
+        image[stars] = (255, 255, 255)
+    elif condition == 'mixed':
+        image = vertical_gradient(height, width, (200, 120, 40), (235, 200, 160))
+        cover = smooth_noise(rng, height, width, 8)
+        clouds = np.clip((cover - 0.45) * 4, 0.0, 1.0)[..., None]
+        shade = 200 + smooth_noise(rng, height, width, 20)[..., None] * 50
+        image = image * (1 - clouds) + shade * clouds
+    else:
+        raise ValueError(f"Unknown condition: {condition}")
+
+    image += rng.normal(0, 4, image.shape)
+    add_ground(image, rng)
+
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def build_corpus(resolutions=RESOLUTIONS, conditions=CONDITIONS, seed=CORPUS_SEED):
+    """
+    Generate every condition at every resolution
+
+    Args:
+        resolutions: (width, height) tuples
+        conditions: Conditions to include
+        seed: Corpus seed
+
+    Returns:
+        list: Dicts with name ('clear@800x600'), condition, width, height,
+              image (decoded BGR) and jpeg (encoded bytes)
+    """
+    corpus = []
+    for width, height in resolutions:
+        for condition in conditions:
+            image = generate_sky(condition, width, height, seed)
+            ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+            if not ok:
+                raise RuntimeError(f"Could not encode {condition}@{width}x{height}")
+
+            corpus.append({
+                'name': f"{condition}@{width}x{height}",
+                'condition': condition,
+                'width': width,
+                'height': height,
+                'image': image,
+                'jpeg': encoded.tobytes()
+            })
+    return corpus
+
+
+if __name__ == '__main__':
+    # Write the corpus out for a look: python -m benchmarks.corpus [directory]
+    import os
+    import sys
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'benchmark_corpus'
+    os.makedirs(directory, exist_ok=True)
+    for entry in build_corpus():
+        path = os.path.join(directory, f"{entry['condition']}_{entry['width']}x{entry['height']}.jpg")
+        with open(path, 'wb') as f:
+            f.write(entry['jpeg'])
+        print(f"  {path} ({len(entry['jpeg']) // 1024} KB)")
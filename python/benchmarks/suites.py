@@ -0,0 +1,180 @@
+"""
+Benchmark Suites
+The hot paths being timed, grouped by area
+
+Each suite returns (name, callable, iterations) tuples. Project modules
+are imported inside the suites, after __main__ has switched to the
+scratch working directory, because some of them (data_manager_sqlite)
+open the database at import time.
+"""
+
+import itertools
+from datetime import datetime, timedelta
+
+# Timed calls per benchmark at scale 1.0, by image width
+ANALYSIS_ITERATIONS = {320: 200, 800: 60, 1600: 20}
+STORAGE_ITERATIONS = 50
+ROUTE_ITERATIONS = 100
+
+# Captures in the database before the route benchmarks run
+ROUTE_SEED_CAPTURES = 1000
+
+# Image size used where one representative resolution is enough
+STORAGE_RESOLUTION = (800, 600)
+
+
+def scaled(iterations, scale):
+    return max(5, int(iterations * scale))
+
+
+def by_resolution(corpus):
+    """Group corpus entries by (width, height)"""
+    groups = {}
+    for entry in corpus:
+        groups.setdefault((entry['width'], entry['height']), []).append(entry)
+    return groups
+
+
+def cycling(entries, fn):
+    """Callable that applies fn to the next corpus entry on each call"""
+    entries = itertools.cycle(entries)
+    return lambda: fn(next(entries))
+
+
+def timestamp_sequence(start=datetime(2026, 1, 1)):
+    """Unique YYYYMMDD_HHMMSS timestamps, one second apart"""
+    for i in itertools.count():
+        yield (start + timedelta(seconds=i)).strftime("%Y%m%d_%H%M%S")
+
+
+# ========================================
+# ANALYSIS
+# ========================================
+
+def analysis_suite(corpus, scale=1.0):
+    """analyze_image, each analyzer on its own, the fused kernel and JPEG decode"""
+    import cv2
+    import numpy as np
+    from analysis_core import analyze_image
+    from brightness_analysis import analyze_brightness
+    from color_analysis import analyze_color
+    from sky_features import analyze_sky_features
+    from fused_analysis import analyze_image_fused
+
+    def decode(entry):
+        return cv2.imdecode(np.frombuffer(entry['jpeg'], np.uint8), cv2.IMREAD_COLOR)
+
+    benchmarks = []
+    for (width, height), entries in by_resolution(corpus).items():
+        size = f"{width}x{height}"
+        iterations = scaled(ANALYSIS_ITERATIONS.get(width, 20), scale)
+
+        for name, fn in (
+            ('decode', decode),
+            ('analyze_image', lambda e: analyze_image(e['image'])),
+            ('brightness', lambda e: analyze_brightness(e['image'])),
+            ('color', lambda e: analyze_color(e['image'])),
+            ('sky_features', lambda e: analyze_sky_features(e['image'])),
+            ('fused', lambda e: analyze_image_fused(e['image']))
+        ):
+            benchmarks.append((f"analysis.{name}@{size}", cycling(entries, fn), iterations))
+
+    return benchmarks
+
+
+# ========================================
+# STORAGE + INGEST
+# ========================================
+
+def storage_suite(corpus, scale=1.0):
+    """save_image, save_image_bytes and DataManager.update_latest"""
+    from analysis_core import analyze_image
+    from image_storage import save_image, save_image_bytes
+    from data_manager_sqlite import data_manager
+
+    entries = by_resolution(corpus).get(STORAGE_RESOLUTION) or corpus
+    size = f"{entries[0]['width']}x{entries[0]['height']}"
+    iterations = scaled(STORAGE_ITERATIONS, scale)
+
+    timestamps = timestamp_sequence()
+    results = {entry['name']: analyze_image(entry['image']) for entry in entries}
+
+    def update_latest(entry):
+        timestamp = next(timestamps)
+        image_path = save_image_bytes(entry['jpeg'], timestamp)
+        return data_manager.update_latest(timestamp, image_path, results[entry['name']])
+
+    return [
+        (f"storage.save_image@{size}",
+         cycling(entries, lambda e: save_image(e['image'], next(timestamps))), iterations),
+        (f"storage.save_image_bytes@{size}",
+         cycling(entries, lambda e: save_image_bytes(e['jpeg'], next(timestamps))), iterations),
+        (f"ingest.update_latest@{size}", cycling(entries, update_latest), iterations)
+    ]
+
+
+# ========================================
+# WEB ROUTES
+# ========================================
+
+def seed_captures(corpus, count):
+    """Fill the scratch database so list/statistics routes have data to work on"""
+    from analysis_core import analyze_image
+    from image_storage import save_image_bytes
+    from data_manager_sqlite import data_manager
+
+    entries = by_resolution(corpus).get(STORAGE_RESOLUTION) or corpus
+    results = [analyze_image(entry['image']) for entry in entries]
+
+    timestamps = timestamp_sequence(datetime(2025, 12, 1))
+    batch = []
+    for i in range(count):
+        timestamp = next(timestamps)
+        entry = entries[i % len(entries)]
+        image_path = save_image_bytes(entry['jpeg'], timestamp)
+        batch.append((timestamp, image_path, results[i % len(entries)]))
+
+        if len(batch) >= 200:
+            data_manager.update_latest_batch(batch)
+            batch = []
+
+    if batch:
+        data_manager.update_latest_batch(batch)
+
+
+def route_suite(corpus, scale=1.0):
+    """/api/* routes through Flask's test client"""
+    from web_server import create_flask_app
+
+    seed_captures(corpus, ROUTE_SEED_CAPTURES)
+
+    app = create_flask_app()
+    client = app.test_client()
+    iterations = scaled(ROUTE_ITERATIONS, scale)
+
+    def get(url):
+        def request():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {url} returned {response.status_code}")
+            return response
+        return request
+
+    return [
+        (f"routes.{url}", get(url), iterations)
+        for url in (
+            '/api/latest',
+            '/api/history',
+            '/api/history?limit=1000',
+            '/api/statistics',
+            '/api/config',
+            '/api/files/list'
+        )
+    ]
+
+
+SUITES = {
+    'analysis': analysis_suite,
+    'storage': storage_suite,
+    'routes': route_suite
+}
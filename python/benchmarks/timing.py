@@ -0,0 +1,87 @@
+"""
+Timing Helpers
+Run a callable repeatedly and summarize its latency
+"""
+
+import gc
+import time
+
+
+def percentile(sorted_values, fraction):
+    """
+    Linear-interpolated percentile of already sorted values
+
+    Args:
+        sorted_values: Ascending list
+        fraction: 0.0 - 1.0 (0.5 = median)
+    """
+    if not sorted_values:
+        return 0.0
+
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(samples):
+    """
+    Latency statistics for a list of per-call durations
+
+    Args:
+        samples: Seconds per call
+
+    Returns:
+        dict: iterations, throughput_per_s and min/mean/p50/p90/p95/p99/max in ms
+    """
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def ms(value):
+        return round(value * 1000, 4)
+
+    return {
+        'iterations': len(ordered),
+        'throughput_per_s': round(len(ordered) / total, 2) if total else 0.0,
+        'min_ms': ms(ordered[0]) if ordered else 0.0,
+        'mean_ms': ms(total / len(ordered)) if ordered else 0.0,
+        'p50_ms': ms(percentile(ordered, 0.50)),
+        'p90_ms': ms(percentile(ordered, 0.90)),
+        'p95_ms': ms(percentile(ordered, 0.95)),
+        'p99_ms': ms(percentile(ordered, 0.99)),
+        'max_ms': ms(ordered[-1]) if ordered else 0.0
+    }
+
+
+def time_callable(fn, iterations, warmup=3):
+    """
+    Time `iterations` calls of fn()
+
+    Garbage collection is paused while timing so a collection triggered
+    by one benchmark does not land in another's samples.
+
+    Args:
+        fn: Zero-argument callable
+        iterations: Timed calls
+        warmup: Untimed calls first (caches, lazy imports, JIT-ish paths)
+
+    Returns:
+        dict: summarize() of the timed calls
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return summarize(samples)
@@ -29,6 +29,21 @@ def analyze_brightness(image):
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     avg_brightness = np.mean(gray)
     
+    return build_brightness_result(avg_brightness)
+
+
+def build_brightness_result(avg_brightness):
+    """
+    Build the brightness result dict from an average grayscale value
+    
+    Shared by analyze_brightness() and the fused analysis kernel.
+    
+    Args:
+        avg_brightness: Mean grayscale value (0-255)
+    
+    Returns:
+        dict: Same format as analyze_brightness()
+    """
     # Classify brightness using config thresholds
     condition = classify_brightness(avg_brightness)
     
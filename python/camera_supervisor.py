@@ -0,0 +1,537 @@
+"""
+Camera Supervisor Module
+Polls every ESP32-CAM listed in python_config.CAMERAS from one asyncio loop
+
+Each camera gets a lightweight task with its own poll schedule, health
+state and SD queue sync, so a slow or offline camera only ever delays
+itself. Network I/O runs on the event loop (esp32_async_http); images
+from all cameras go through one shared CapturePipeline: analysis in the
+analysis_executor worker processes, file writes on a small thread pool,
+and storage through the shared ingest writer.
+
+The sequence for each camera follows ESP32Poller: initial queue sync,
+then live captures every poll_interval with a periodic queue check, and
+a queued file is only deleted from its ESP32 after its DB write committed.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from analysis_core import get_analysis_summary
+from analysis_executor import analysis_executor
+from data_manager_sqlite import data_manager
+from image_storage import save_image_bytes
+from thumbnails import thumbnail_worker
+from esp32_async_http import AsyncESP32Client, ESP32HTTPError
+from esp32_http import get_endpoint_name
+from metrics import metrics
+from python_config import (
+    CAMERAS, CAMERA_PROCESSING_WORKERS, CAMERA_STARTUP_STAGGER,
+    CAMERA_RESTART_DELAY, CAMERA_COMMIT_TIMEOUT,
+    QUEUE_SYNC_FETCH_DEPTH, QUEUE_SYNC_FETCH_DELAY
+)
+
+
+# ========================================
+# SHARED PROCESSING PIPELINE
+# ========================================
+
+class CapturePipeline:
+    """Analyze, save and store images from every camera"""
+
+    def __init__(self, workers=CAMERA_PROCESSING_WORKERS):
+        # File writes and ingest submission (which may block on backpressure)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="CaptureWorker"
+        )
+
+    async def process(self, device_id, image_data, timestamp, from_sd):
+        """
+        Process one image and wait until it is committed
+
+        Args:
+            device_id: Camera that took the image
+            image_data: JPEG bytes as received from the ESP32
+            timestamp: Capture timestamp string (YYYYMMDD_HHMMSS)
+            from_sd: True for images synced from the SD queue
+
+        Returns:
+            dict: Analysis results once stored, or None if the image
+                  could not be processed or was not committed in time
+        """
+        start = time.perf_counter()
+        outcome = await self._process(device_id, image_data, timestamp, from_sd)
+
+        if not isinstance(outcome, dict):
+            metrics.increment('pipeline_images_total', device=device_id, outcome=outcome)
+            return None
+
+        metrics.increment('pipeline_images_total', device=device_id, outcome='stored')
+        metrics.observe('stage_seconds', time.perf_counter() - start, stage='pipeline_total')
+        return outcome
+
+    async def _process(self, device_id, image_data, timestamp, from_sd):
+        """process() body: the analysis results, or why the image was dropped"""
+        loop = asyncio.get_running_loop()
+        committed = loop.create_future()
+
+        def on_commit(capture_id):
+            # Runs on the ingest writer thread
+            loop.call_soon_threadsafe(_resolve, committed, capture_id)
+
+        try:
+            analysis_results = await asyncio.wrap_future(analysis_executor.submit(image_data))
+        except Exception as e:
+            print(f"[Cam {device_id}] ✗ Analysis error on {timestamp}: {e}")
+            return 'analysis_error'
+
+        if analysis_results is None:
+            print(f"[Cam {device_id}] ✗ Failed to decode {timestamp}")
+            return 'decode_error'
+
+        analysis_results['from_sd'] = from_sd
+
+        stored = await loop.run_in_executor(
+            self.executor, self._store_sync,
+            device_id, image_data, timestamp, analysis_results, on_commit
+        )
+        if not stored:
+            return 'save_error'
+
+        try:
+            await asyncio.wait_for(committed, CAMERA_COMMIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"[Cam {device_id}] ✗ Capture {timestamp} not stored within {CAMERA_COMMIT_TIMEOUT}s")
+            return 'commit_timeout'
+
+        return analysis_results
+
+    def _store_sync(self, device_id, image_data, timestamp, analysis_results, on_commit):
+        """Worker thread: blocking file and database part of process()"""
+        try:
+            image_path = save_image_bytes(image_data, timestamp, device_id)
+            thumbnail_worker.submit(image_path)
+        except Exception as e:
+            print(f"[Cam {device_id}] ✗ Could not save {timestamp}: {e}")
+            return False
+
+        # Blocks this worker (not the event loop) while the DB writer is behind
+        data_manager.submit_capture(
+            timestamp, image_path, analysis_results, on_commit, device_id=device_id
+        )
+        return True
+
+    def shutdown(self):
+        """Finish in-flight images and stop the worker threads"""
+        self.executor.shutdown(wait=True)
+
+
+def _resolve(future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+# ========================================
+# PER-CAMERA POLLER
+# ========================================
+
+class CameraPoller:
+    """Async poll loop for one ESP32-CAM"""
+
+    def __init__(self, camera, pipeline):
+        self.device_id = camera['device_id']
+        self.esp32_ip = camera['ip']
+        self.esp32_port = camera.get('port', 80)
+        self.poll_interval = camera.get('poll_interval', 300)
+        self.request_timeout = camera.get('request_timeout', 25)
+
+        self.pipeline = pipeline
+        self.client = AsyncESP32Client(self.esp32_ip, self.esp32_port)
+        self.tag = f"[Cam {self.device_id}]"
+
+        self.total_count = 0
+        self.fail_count = 0
+        self.queue_synced_count = 0
+
+        # Queue sync management
+        self.last_queue_check = 0
+        self.queue_check_interval = 60
+
+        # Health monitoring
+        self.consecutive_failures = 0
+        self.esp32_healthy = True
+        self.last_successful_contact = time.time()
+
+    # ── ESP32 requests ──
+
+    async def fetch_with_retry(self, path, timeout, max_retries=3, operation_name="request"):
+        """
+        GET a path with retry, updating health state
+
+        Returns:
+            ESP32Response or None on failure
+        """
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            resp = await self.client.get(path, timeout=timeout, max_attempts=max_retries)
+            outcome = 'ok' if resp.status_code == 200 else 'http_error'
+
+            self.consecutive_failures = 0
+            self.esp32_healthy = True
+            self.last_successful_contact = time.time()
+
+            return resp
+
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            print(f"{self.tag} ✗ Timeout on {operation_name} ({max_retries} attempt(s))")
+            self.consecutive_failures += 1
+
+        except (OSError, asyncio.IncompleteReadError, ESP32HTTPError):
+            outcome = 'connection_error'
+            print(f"{self.tag} ✗ Connection failed on {operation_name} ({max_retries} attempt(s))")
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= 3:
+                self.esp32_healthy = False
+                print(f"{self.tag} ⚠️  Marked unhealthy after {self.consecutive_failures} failures")
+
+        except Exception as e:
+            print(f"{self.tag} ✗ Error on {operation_name}: {e}")
+            self.consecutive_failures += 1
+
+        finally:
+            endpoint = get_endpoint_name(path)
+            metrics.observe('esp32_request_seconds', time.perf_counter() - start,
+                            device=self.device_id, endpoint=endpoint)
+            metrics.increment('esp32_requests_total',
+                              device=self.device_id, endpoint=endpoint, outcome=outcome)
+
+        return None
+
+    async def check_esp32_reachable(self):
+        """Wait until the ESP32 answers /status"""
+        print(f"{self.tag} Checking ESP32 at {self.esp32_ip}...")
+
+        while True:
+            resp = await self.fetch_with_retry('/status', timeout=10, max_retries=1,
+                                               operation_name="status")
+            if resp is not None and resp.status_code == 200:
+                try:
+                    data = resp.json()
+                except ValueError:
+                    data = {}
+                print(f"{self.tag} ✓ ESP32 reachable  |  RSSI: {data.get('wifi_rssi')} dBm  |  "
+                      f"Heap: {data.get('freeHeap')} bytes")
+
+                if data.get('sd_available') and data.get('sd_queue_count', 0) > 0:
+                    print(f"{self.tag}   📁 {data['sd_queue_count']} image(s) in offline queue")
+                return
+
+            print(f"{self.tag}   Retrying in 10s...")
+            await asyncio.sleep(10)
+
+    async def wait_for_esp32_recovery(self, wait_time=30):
+        """Give a crashed/resetting ESP32 time to come back"""
+        print(f"{self.tag} ⚠️  ESP32 appears down - waiting {wait_time}s for recovery...")
+        await asyncio.sleep(wait_time)
+
+        resp = await self.fetch_with_retry('/status', timeout=10, max_retries=1,
+                                           operation_name="status")
+        if resp is not None and resp.status_code == 200:
+            print(f"{self.tag} ✓ ESP32 recovered!")
+            return True
+
+        print(f"{self.tag} ✗ ESP32 still not responding")
+        return False
+
+    async def fetch_queue_list(self):
+        """List queued SD images (oldest first, at most 200)"""
+        resp = await self.fetch_with_retry('/queue', timeout=30, max_retries=2,
+                                           operation_name="queue list")
+
+        if resp is not None and resp.status_code == 200:
+            try:
+                files = resp.json()
+                if isinstance(files, list):
+                    return files
+            except ValueError as e:
+                print(f"{self.tag} Could not parse queue list: {e}")
+
+        return []
+
+    async def delete_queued_image(self, filename):
+        """Tell the ESP32 to delete a queued image after it was stored"""
+        resp = await self.fetch_with_retry(f'/queue/delete/{filename}', timeout=15,
+                                           max_retries=2, operation_name=f"delete {filename}")
+
+        if resp is not None and resp.status_code == 200:
+            try:
+                return resp.json().get('deleted', False)
+            except (ValueError, AttributeError):
+                pass
+
+        return False
+
+    # ── SD queue sync ──
+
+    async def process_queued_images_batch(self):
+        """
+        Sync one batch (up to 200) of queued images
+
+        Fetches are sequential (the ESP32 serves one request at a time)
+        while up to QUEUE_SYNC_FETCH_DEPTH fetched images are processed
+        in the shared pipeline; each is deleted once committed.
+
+        Returns:
+            Number of images synced in this batch
+        """
+        if not self.esp32_healthy and not await self.wait_for_esp32_recovery():
+            return 0
+
+        files = await self.fetch_queue_list()
+        if not files:
+            return 0
+
+        batch_size = len(files)
+        print(f"{self.tag} ═══ Queue Batch: {batch_size} image(s) ═══")
+
+        in_flight = asyncio.Semaphore(QUEUE_SYNC_FETCH_DEPTH)
+        tasks = []
+        batch_failures = 0
+
+        for i, filename in enumerate(files, 1):
+            await in_flight.acquire()
+
+            resp = await self.fetch_with_retry(f'/queue/{filename}', timeout=60,
+                                               max_retries=3, operation_name=f"fetch {filename}")
+
+            if resp is None or resp.status_code != 200:
+                in_flight.release()
+                print(f"{self.tag} [{i}/{batch_size}] ✗ Failed to fetch {filename}")
+                batch_failures += 1
+
+                if batch_failures >= 5:
+                    print(f"{self.tag} ⚠️  Too many failures in batch, pausing...")
+                    if not await self.wait_for_esp32_recovery(20):
+                        print(f"{self.tag} Aborting batch")
+                        break
+                    batch_failures = 0
+                continue
+
+            timestamp = filename.rsplit('/', 1)[-1].replace('.jpg', '').replace('.JPG', '')
+            tasks.append(asyncio.create_task(
+                self._store_queued_image(filename, resp.content, timestamp, in_flight)
+            ))
+
+            if QUEUE_SYNC_FETCH_DELAY > 0:
+                await asyncio.sleep(QUEUE_SYNC_FETCH_DELAY)
+
+        synced = sum(await asyncio.gather(*tasks))
+        print(f"{self.tag} ═══ Batch Complete: {synced}/{batch_size} synced ═══")
+        return synced
+
+    async def _store_queued_image(self, filename, image_data, timestamp, in_flight):
+        """Process one queued image, then delete it from the ESP32"""
+        try:
+            analysis_results = await self.pipeline.process(
+                self.device_id, image_data, timestamp, from_sd=True
+            )
+        finally:
+            in_flight.release()
+
+        if analysis_results is None:
+            return 0
+
+        print(f"{self.tag} ✓ Processed {filename}  |  {get_analysis_summary(analysis_results)}")
+
+        if not await self.delete_queued_image(filename):
+            print(f"{self.tag} ⚠ Delete failed for {filename} (file may remain)")
+
+        return 1
+
+    async def sync_all_queued_images(self):
+        """Sync batches until the SD queue is empty"""
+        total_synced = 0
+        batch_num = 0
+
+        while True:
+            batch_num += 1
+            synced = await self.process_queued_images_batch()
+            total_synced += synced
+
+            if synced == 0 or synced < 200:
+                break
+
+            print(f"{self.tag} Batch {batch_num} complete ({total_synced} total so far)")
+            await asyncio.sleep(3)  # Let the ESP32 breathe
+
+        if total_synced > 0:
+            print(f"{self.tag} ✅ Queue sync complete: {total_synced} image(s) in {batch_num} batch(es)")
+
+        self.queue_synced_count += total_synced
+        self.last_queue_check = time.time()
+        return total_synced
+
+    # ── Live capture ──
+
+    async def fetch_and_process_live_image(self):
+        """
+        Capture, analyze and store a live image
+
+        Returns:
+            True if the capture was stored
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        if not self.esp32_healthy and not await self.wait_for_esp32_recovery():
+            return False
+
+        resp = await self.fetch_with_retry('/capture', timeout=max(30, self.request_timeout),
+                                           max_retries=2, operation_name="live capture")
+        if resp is None:
+            return False
+
+        if resp.status_code != 200:
+            print(f"{self.tag} ✗ ESP32 returned HTTP {resp.status_code}")
+            return False
+
+        analysis_results = await self.pipeline.process(
+            self.device_id, resp.content, timestamp, from_sd=False
+        )
+        if analysis_results is None:
+            return False
+
+        print(f"{self.tag} {get_analysis_summary(analysis_results)}")
+        return True
+
+    def print_stats(self):
+        """Print current polling statistics"""
+        success_count = self.total_count - self.fail_count
+        success_rate = (success_count / self.total_count * 100) if self.total_count > 0 else 0
+
+        health_icon = "✅" if self.esp32_healthy else "⚠️ "
+        print(f"{self.tag} {health_icon} Stats: {success_count}/{self.total_count} successful "
+              f"({success_rate:.0f}%), {self.queue_synced_count} synced from SD queue")
+
+    # ── Main loop ──
+
+    async def run(self):
+        """Poll this camera until cancelled"""
+        await self.check_esp32_reachable()
+        print(f"{self.tag} Running every {self.poll_interval}s "
+              f"(queue check every {self.queue_check_interval}s)")
+
+        await self.sync_all_queued_images()
+
+        while True:
+            t_start = time.time()
+
+            if time.time() - self.last_queue_check >= self.queue_check_interval:
+                if await self.fetch_queue_list():
+                    # Live captures pause while the queue drains
+                    await self.sync_all_queued_images()
+                    continue
+                self.last_queue_check = time.time()
+
+            self.total_count += 1
+            if not await self.fetch_and_process_live_image():
+                self.fail_count += 1
+
+            self.print_stats()
+
+            wait = max(0, self.poll_interval - (time.time() - t_start))
+            await asyncio.sleep(wait)
+
+    async def close(self):
+        await self.client.close()
+
+
+# ========================================
+# SUPERVISOR
+# ========================================
+
+class CameraSupervisor:
+    """Runs one CameraPoller task per configured camera on a background loop"""
+
+    def __init__(self, cameras=CAMERAS):
+        self.cameras = cameras
+        self.pipeline = None
+        self.pollers = []
+        self.thread = None
+        self.loop = None
+        self._stopping = None
+
+    def start(self):
+        """Start the event loop thread (returns immediately)"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.pipeline = CapturePipeline()
+        self.pollers = [CameraPoller(camera, self.pipeline) for camera in self.cameras]
+
+        self.thread = threading.Thread(target=self._run, name="CameraSupervisor", daemon=True)
+        self.thread.start()
+        print(f"[Cameras] Supervisor started for {len(self.pollers)} camera(s)")
+
+    def stop(self, timeout=10):
+        """Cancel every camera task and finish in-flight images"""
+        if self.thread is None or not self.thread.is_alive():
+            return
+
+        if self.loop is not None and self._stopping is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+        self.thread.join(timeout)
+
+        if self.thread.is_alive():
+            print(f"[Cameras] ⚠ Supervisor still busy after {timeout}s")
+        else:
+            self.pipeline.shutdown()
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+
+        print("[Cameras] Waiting 5 seconds for server to initialize...")
+        await asyncio.sleep(5)
+
+        tasks = [
+            asyncio.create_task(self._supervise(poller, index * CAMERA_STARTUP_STAGGER))
+            for index, poller in enumerate(self.pollers)
+        ]
+
+        await self._stopping.wait()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for poller in self.pollers:
+            await poller.close()
+
+    async def _supervise(self, poller, start_delay):
+        """Run a camera's loop, restarting it if it crashes"""
+        await asyncio.sleep(start_delay)
+
+        while True:
+            try:
+                await poller.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{poller.tag} ✗ Poller crashed: {e} - restarting in {CAMERA_RESTART_DELAY}s")
+                await poller.close()
+                await asyncio.sleep(CAMERA_RESTART_DELAY)
+
+
+# Global instance
+camera_supervisor = CameraSupervisor()
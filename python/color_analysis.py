@@ -24,6 +24,21 @@ def analyze_color(image):
     avg_color = np.mean(image, axis=(0, 1))
     b, g, r = avg_color  # OpenCV uses BGR
     
+    return build_color_result(r, g, b)
+
+
+def build_color_result(r, g, b):
+    """
+    Build the color result dict from average channel values
+    
+    Shared by analyze_color() and the fused analysis kernel.
+    
+    Args:
+        r, g, b: Mean red, green, blue values
+    
+    Returns:
+        dict: Same format as analyze_color()
+    """
     brightness = calculate_color_brightness(r, g, b)
     
     # Check for blue dominance (clear sky indicator)
@@ -0,0 +1,101 @@
+"""
+Data Export Module
+Streams capture + analysis data as CSV or NDJSON
+
+Rows come from database_operations.iter_export_rows() in chunks and are
+encoded and yielded as they arrive, so a download starts immediately and
+memory use does not grow with the archive. Nothing is written to disk.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from flask import Response, stream_with_context
+from database_operations import iter_export_rows, DEFAULT_EXPORT_COLUMNS
+
+# Rows encoded per chunk sent to the client
+EXPORT_ROWS_PER_CHUNK = 500
+
+
+def generate_csv(columns, rows):
+    """
+    Encode rows as CSV, one chunk at a time
+
+    Yields:
+        str: The header line first, then blocks of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % EXPORT_ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def generate_ndjson(columns, rows):
+    """
+    Encode rows as newline-delimited JSON objects, one chunk at a time
+
+    Yields:
+        str: Blocks of lines
+    """
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), default=str))
+        if len(lines) >= EXPORT_ROWS_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (generate_csv, 'text/csv'),
+    'ndjson': (generate_ndjson, 'application/x-ndjson')
+}
+
+
+def stream_export(export_format, columns=None, start=None, end=None, device_id=None):
+    """
+    Build a streaming download response
+
+    Args:
+        export_format: 'csv' or 'ndjson'
+        columns (list): Column names (default DEFAULT_EXPORT_COLUMNS)
+        start (datetime): Only captures at or after this time
+        end (datetime): Only captures before this time
+        device_id (str): Only captures from this camera
+
+    Returns:
+        flask.Response streaming the file as an attachment
+
+    Raises:
+        ValueError: Unknown format or column (before anything is sent)
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    columns = list(columns or DEFAULT_EXPORT_COLUMNS)
+    rows = iter_export_rows(columns, start, end, device_id)
+    generate, mimetype = EXPORT_FORMATS[export_format]
+
+    filename = f"sky_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    response = Response(stream_with_context(generate(columns, rows)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -9,13 +9,18 @@ FIXES:
 """
 
 from datetime import datetime
+import base64
+import json
 import os
 from database_schema import create_database
+from python_config import DEFAULT_DEVICE_ID
+from ingest_queue import ingest_writer
+from event_stream import publish_capture
 from database_operations import (
-    insert_capture, insert_sky_analysis, mark_analysis_complete,
-    get_latest_capture_with_analysis, get_recent_captures_with_analysis,
+    ingest_captures_batch,
+    get_latest_capture_with_analysis, get_captures_page,
     get_statistics, get_daily_statistics, export_to_csv,
-    get_capture_count
+    get_capture_count, get_capture_by_timestamp
 )
 
 
@@ -65,6 +70,57 @@ def format_timestamp_for_web(timestamp):
     return str(timestamp)
 
 
+def encode_history_cursor(key):
+    """
+    Turn a (timestamp, capture_id) page key into an opaque cursor string
+    
+    Args:
+        key (tuple): Key from database_operations.get_captures_page()
+    
+    Returns:
+        str: URL-safe cursor
+    """
+    raw = json.dumps([str(key[0]), key[1]], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_history_cursor(cursor):
+    """
+    Inverse of encode_history_cursor()
+    
+    Raises:
+        ValueError: If the cursor was not produced by encode_history_cursor()
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, capture_id = json.loads(raw)
+        return str(timestamp), int(capture_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def parse_time_filter(value):
+    """
+    Parse a start/end filter from a query string
+    
+    Accepts YYYYMMDD_HHMMSS (the web timestamp format), YYYY-MM-DD or
+    YYYY-MM-DDTHH:MM:SS.
+    
+    Returns:
+        datetime, or None if value is empty
+    
+    Raises:
+        ValueError: If the value is in none of these formats
+    """
+    if not value:
+        return None
+    
+    try:
+        return datetime.strptime(value, "%Y%m%d_%H%M%S")
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
 class DataManager:
     """
     Manages all data storage and retrieval
@@ -78,14 +134,92 @@ class DataManager:
         print("✓ Data Manager initialized (SQLite backend)")
     
     
-    def update_latest(self, timestamp, image_path, analysis_results):
+    def update_latest(self, timestamp, image_path, analysis_results, device_id=None):
         """
         Store a new capture and its analysis results
         
+        The capture row and its analysis are written in one transaction
+        by the ingest writer thread (waiting for the commit), then
+        connected dashboards are notified over /api/events.
+        
+        Args:
+            timestamp (str): Timestamp string (will be converted to datetime)
+            image_path (str): Full path to saved image
+            analysis_results (dict): Results from analysis_core.analyze_image()
+            device_id (str): Camera that took the image (default camera if None)
+        
+        Returns:
+            int: capture_id
+        """
+        record = self.build_capture_record(timestamp, image_path, analysis_results, device_id)
+        capture_id = ingest_writer.write(record)
+        publish_capture(capture_id)
+        return capture_id
+    
+    
+    def update_latest_batch(self, captures):
+        """
+        Store several captures in a single transaction (one commit) on
+        the ingest writer thread
+        
+        Args:
+            captures (list): (timestamp, image_path, analysis_results) tuples
+        
+        Returns:
+            list: capture_id for each capture, in order
+        """
+        records = [
+            self.build_capture_record(timestamp, image_path, analysis_results)
+            for timestamp, image_path, analysis_results in captures
+        ]
+        capture_ids = ingest_writer.run(ingest_captures_batch, records)
+        if capture_ids:
+            publish_capture(capture_ids[-1])
+        return capture_ids
+    
+    
+    def submit_capture(self, timestamp, image_path, analysis_results, on_commit=None,
+                       device_id=None):
+        """
+        Queue a capture for the background writer (write-behind)
+        
+        Returns immediately; the capture is committed together with any
+        others that arrive within INGEST_GROUP_COMMIT_WINDOW.
+        
         Args:
             timestamp (str): Timestamp string (will be converted to datetime)
             image_path (str): Full path to saved image
             analysis_results (dict): Results from analysis_core.analyze_image()
+            on_commit: Optional callable(capture_id) run once committed
+            device_id (str): Camera that took the image (default camera if None)
+        """
+        record = self.build_capture_record(timestamp, image_path, analysis_results, device_id)
+        
+        def committed(capture_id):
+            publish_capture(capture_id)
+            if on_commit is not None:
+                on_commit(capture_id)
+        
+        ingest_writer.submit(record, committed)
+    
+    
+    def flush(self):
+        """Block until every submitted capture has been written"""
+        ingest_writer.flush()
+    
+    
+    def build_capture_record(self, timestamp, image_path, analysis_results, device_id=None):
+        """
+        Convert poller output into an ingest record for database_operations
+        
+        Args:
+            timestamp (str): Timestamp string (will be converted to datetime)
+            image_path (str): Full path to saved image
+            analysis_results (dict): Results from analysis_core.analyze_image()
+            device_id (str): Camera that took the image (default camera if None)
+        
+        Returns:
+            dict: Record for ingest_capture() / ingest_captures_batch()
         """
         # Convert timestamp string to datetime if needed
         if isinstance(timestamp, str):
@@ -116,21 +250,14 @@ class DataManager:
         if os.path.exists(image_path):
             image_size = os.path.getsize(image_path)
         
-        # Insert capture record
-        capture_id = insert_capture(
-            timestamp=timestamp_dt,
-            image_path=image_path,
-            image_filename=image_filename,
-            image_size_bytes=image_size
-        )
-        
-        # Insert analysis results
-        insert_sky_analysis(capture_id, analysis_results)
-        
-        # Mark analysis as complete
-        mark_analysis_complete(capture_id)
-        
-        return capture_id
+        return {
+            'device_id': device_id or DEFAULT_DEVICE_ID,
+            'timestamp': timestamp_dt,
+            'image_path': image_path,
+            'image_filename': image_filename,
+            'image_size_bytes': image_size,
+            'analysis_results': analysis_results
+        }
     
     
     def add_to_history(self, timestamp, image_path, analysis_results):
@@ -162,6 +289,8 @@ class DataManager:
         
         # Format for compatibility with old interface
         return {
+            "capture_id": result.get('capture_id'),
+            "device_id": result.get('device_id'),
             "timestamp": formatted_timestamp,
             "image_path": result.get('image_path'),
             "analysis": {
@@ -196,34 +325,77 @@ class DataManager:
         if limit is None:
             limit = 100
         
-        results = get_recent_captures_with_analysis(limit)
+        return self.get_history_page(limit)['items']
+    
+    
+    def get_history_page(self, limit=100, cursor=None, start=None, end=None, device_id=None):
+        """
+        Get one page of history, newest first
+        
+        Args:
+            limit (int): Page size
+            cursor (str): next_cursor from the previous page (None = first page)
+            start (datetime): Only captures at or after this time
+            end (datetime): Only captures before this time
+            device_id (str): Only captures from this camera
+        
+        Returns:
+            dict: 'items' (same format as get_history) and 'next_cursor'
+                  (None on the last page)
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        before = decode_history_cursor(cursor) if cursor else None
+        rows, next_key = get_captures_page(limit, before, start, end, device_id)
         
-        # Format for compatibility
-        history = []
-        for row in results:
+        return {
+            "items": [self.format_history_row(row) for row in rows],
+            "next_cursor": encode_history_cursor(next_key) if next_key else None
+        }
+    
+    
+    def format_history_row(self, row):
+        """Format a capture + analysis row for the web interface"""
+        return {
+            "capture_id": row.get('capture_id'),
+            "device_id": row.get('device_id'),
             # FIXED: Convert database timestamp to web-compatible format
-            db_timestamp = row.get('timestamp')
-            formatted_timestamp = format_timestamp_for_web(db_timestamp)
-            
-            history.append({
-                "timestamp": formatted_timestamp,  # Now in YYYYMMDD_HHMMSS format
-                "image_path": row.get('image_path'),
-                "image_filename": row.get('image_filename'),
-                "analysis": {
-                    "clear_sky_score": row.get('clear_sky_score'),
-                    "summary": row.get('sky_condition'),
-                    "sky_condition": row.get('sky_condition'),
-                    "brightness": {
-                        "average": row.get('brightness_average')
-                    },
-                    "sky_features": {
-                        "blue_coverage": row.get('blue_coverage_percent')
-                    },
-                    "from_sd": row.get('from_sd', False)
-                }
-            })
-        
-        return history
+            "timestamp": format_timestamp_for_web(row.get('timestamp')),  # YYYYMMDD_HHMMSS
+            "image_path": row.get('image_path'),
+            "image_filename": row.get('image_filename'),
+            "analysis": {
+                "clear_sky_score": row.get('clear_sky_score'),
+                "summary": row.get('sky_condition'),
+                "sky_condition": row.get('sky_condition'),
+                "brightness": {
+                    "average": row.get('brightness_average')
+                },
+                "sky_features": {
+                    "blue_coverage": row.get('blue_coverage_percent')
+                },
+                "from_sd": row.get('from_sd', False)
+            }
+        }
+    
+    
+    def get_capture(self, timestamp, device_id=None):
+        """
+        Look up a single capture by its web timestamp
+        
+        Args:
+            timestamp (str): YYYYMMDD_HHMMSS
+            device_id (str): Only match this camera (default: any camera)
+        
+        Returns:
+            dict: Capture record (image_path, image_filename, ...), or None
+        """
+        try:
+            timestamp_dt = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+        except (ValueError, TypeError):
+            return None
+        
+        return get_capture_by_timestamp(timestamp_dt, device_id)
     
     
     def get_statistics(self):
@@ -254,13 +426,19 @@ class DataManager:
         """
         Export all data to CSV file
         
+        For downloads use the streaming /export/csv route instead.
+        
         Args:
             filepath (str): Path to save CSV (default: sky_data_YYYYMMDD_HHMMSS.csv)
         
         Returns:
             str: Path to created CSV file
         """
-        return export_to_csv(filepath)
+        if filepath is None:
+            filepath = f"sky_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        
+        export_to_csv(filepath)
+        return filepath
     
     
     def get_daily_statistics(self, days_back=7):
@@ -4,27 +4,129 @@ All database insert/query/update operations
 
 Uses SQLite with simple, direct SQL
 No ORM - just clean, fast database operations
+
+Public query functions are wrapped in timed_query, so their latency
+shows up per function in metrics (db_query_seconds)
 """
 
 import sqlite3
-from datetime import datetime
+import threading
+import weakref
+from datetime import datetime, timedelta
 from database_schema import get_database_path
+from metrics import metrics
+from python_config import (
+    DB_BUSY_TIMEOUT_MS, DB_SYNCHRONOUS, DB_CACHE_SIZE_KB,
+    DB_MMAP_SIZE_MB, DB_TEMP_STORE, DEFAULT_DEVICE_ID
+)
 
 
-def get_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(get_database_path(), timeout=30.0)  # ADD timeout
+# ========================================
+# CONNECTION MANAGEMENT
+# ========================================
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection that is reused by its thread
+    
+    close() only hands the connection back (rolling back anything left
+    uncommitted) so existing get_connection()/close() call sites keep
+    working without reopening the database every time.
+    """
+    
+    def close(self):
+        """Release the connection back to its thread"""
+        if self.in_transaction:
+            self.rollback()
+    
+    def close_for_real(self):
+        """Actually close the underlying database connection"""
+        super().close()
+
+
+_thread_local = threading.local()
+
+# Weak so a connection is freed when its (short-lived) thread ends
+_open_connections = weakref.WeakSet()
+_open_connections_lock = threading.Lock()
+
+# Bumped by close_all_connections() so threads reopen on next use
+_pool_generation = 0
+
+
+def open_connection():
+    """Open a new connection and apply all pragmas once"""
+    # check_same_thread=False only so close_all_connections() can close
+    # connections from the shutdown thread; each is otherwise used by one thread
+    conn = sqlite3.connect(
+        get_database_path(),
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        factory=PooledConnection,
+        check_same_thread=False
+    )
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")  # ADD this line
+    
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
+    conn.execute(f"PRAGMA cache_size=-{int(DB_CACHE_SIZE_KB)}")
+    conn.execute(f"PRAGMA mmap_size={int(DB_MMAP_SIZE_MB) * 1024 * 1024}")
+    conn.execute(f"PRAGMA temp_store={DB_TEMP_STORE}")
+    
+    with _open_connections_lock:
+        _open_connections.add(conn)
+    
+    return conn
+
+
+def get_connection():
+    """
+    Get this thread's database connection (opened on first use)
+    
+    Returns:
+        PooledConnection: Reusable connection; close() releases it
+    """
+    conn = getattr(_thread_local, 'conn', None)
+    
+    if conn is None or getattr(_thread_local, 'generation', None) != _pool_generation:
+        conn = open_connection()
+        _thread_local.conn = conn
+        _thread_local.generation = _pool_generation
+    elif conn.in_transaction:
+        # A previous caller on this thread failed without releasing
+        conn.rollback()
+    
     return conn
 
 
+def close_all_connections():
+    """Close every pooled connection (call on shutdown)"""
+    global _pool_generation
+    
+    with _open_connections_lock:
+        _pool_generation += 1
+        connections = list(_open_connections)
+        _open_connections.clear()
+    
+    for conn in connections:
+        try:
+            conn.close_for_real()
+        except sqlite3.Error as e:
+            print(f"[Database] ⚠ Error closing connection: {e}")
+
+
+def timed_query(fn):
+    """Record each call's latency as db_query_seconds{query=<function name>}"""
+    return metrics.timed('db_query_seconds', query=fn.__name__)(fn)
+
+
 # ========================================
 # CAPTURE OPERATIONS
 # ========================================
 
+@timed_query
 def insert_capture(timestamp, image_path, image_filename, image_size_bytes=None, 
-                   image_width=None, image_height=None):
+                   image_width=None, image_height=None, device_id=DEFAULT_DEVICE_ID):
     """
     Insert a new capture record
     
@@ -35,27 +137,20 @@ def insert_capture(timestamp, image_path, image_filename, image_size_bytes=None,
         image_size_bytes (int): File size in bytes
         image_width (int): Image width in pixels
         image_height (int): Image height in pixels
+        device_id (str): Camera that took the image
     
     Returns:
-        int: capture_id of newly created record
+        int: capture_id of the new record, or of the existing record
+             if this camera already has a capture at this timestamp
     """
     conn = get_connection()
     try:
         cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT OR IGNORE INTO captures (
-                timestamp, image_path, image_filename, 
-                image_size_bytes, image_width, image_height,
-                upload_success
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            timestamp, image_path, image_filename,
-            image_size_bytes, image_width, image_height,
-            True
-        ))
-        
-        capture_id = cursor.lastrowid
+        capture_id, _ = write_capture_row(
+            cursor, timestamp, image_path, image_filename,
+            image_size_bytes, image_width, image_height, device_id
+        )
         conn.commit()
     
         return capture_id
@@ -64,6 +159,42 @@ def insert_capture(timestamp, image_path, image_filename, image_size_bytes=None,
         conn.close()
 
 
+def write_capture_row(cursor, timestamp, image_path, image_filename,
+                      image_size_bytes=None, image_width=None, image_height=None,
+                      device_id=DEFAULT_DEVICE_ID):
+    """
+    Insert a capture row on an existing cursor (no commit)
+    
+    INSERT OR IGNORE leaves lastrowid stale when the device already has a
+    capture at this timestamp, so duplicates are resolved by looking the
+    row up instead.
+    
+    Returns:
+        tuple: (capture_id, created) - created is False for a duplicate
+    """
+    cursor.execute("""
+        INSERT OR IGNORE INTO captures (
+            device_id, timestamp, image_path, image_filename, 
+            image_size_bytes, image_width, image_height,
+            upload_success
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        device_id, timestamp, image_path, image_filename,
+        image_size_bytes, image_width, image_height,
+        True
+    ))
+    
+    if cursor.rowcount == 1:
+        return cursor.lastrowid, True
+    
+    cursor.execute("""
+        SELECT capture_id FROM captures WHERE device_id = ? AND timestamp = ?
+    """, (device_id, timestamp))
+    
+    return cursor.fetchone()[0], False
+
+
+@timed_query
 def get_capture_by_id(capture_id):
     """Get a capture record by ID"""
     conn = get_connection()
@@ -79,6 +210,49 @@ def get_capture_by_id(capture_id):
     return dict(result) if result else None
 
 
+@timed_query
+def get_capture_by_timestamp(timestamp, device_id=None):
+    """
+    Get the capture taken at a given second (uses idx_timestamp)
+    
+    Stored timestamps may carry microseconds, so this matches the whole
+    second with an indexed range rather than string equality.
+    
+    Args:
+        timestamp (datetime): Capture time (sub-second part ignored)
+        device_id (str): Only match this camera (default: any camera)
+    
+    Returns:
+        dict: Capture record, or None if not found
+    """
+    start = timestamp.replace(microsecond=0)
+    end = start + timedelta(seconds=1)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if device_id is None:
+        cursor.execute("""
+            SELECT * FROM captures 
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp 
+            LIMIT 1
+        """, (start, end))
+    else:
+        cursor.execute("""
+            SELECT * FROM captures 
+            WHERE device_id = ? AND timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp 
+            LIMIT 1
+        """, (device_id, start, end))
+    
+    result = cursor.fetchone()
+    conn.close()
+    
+    return dict(result) if result else None
+
+
+@timed_query
 def get_latest_capture():
     """Get the most recent capture"""
     conn = get_connection()
@@ -96,6 +270,7 @@ def get_latest_capture():
     return dict(result) if result else None
 
 
+@timed_query
 def get_captures_last_n_hours(hours):
     """Get all captures from the last N hours"""
     conn = get_connection()
@@ -113,16 +288,26 @@ def get_captures_last_n_hours(hours):
     return [dict(row) for row in results]
 
 
+@timed_query
 def get_captures_by_date_range(start_date, end_date):
-    """Get captures within a date range"""
+    """
+    Get captures within a date range
+    
+    Args:
+        start_date: First day, YYYY-MM-DD
+        end_date: Last day (inclusive), YYYY-MM-DD
+    """
+    start, _ = get_day_bounds(start_date)
+    _, end = get_day_bounds(end_date)
+    
     conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
         SELECT * FROM captures 
-        WHERE DATE(timestamp) BETWEEN ? AND ?
+        WHERE timestamp >= ? AND timestamp < ?
         ORDER BY timestamp DESC
-    """, (start_date, end_date))
+    """, (start, end))
     
     results = cursor.fetchall()
     conn.close()
@@ -130,6 +315,66 @@ def get_captures_by_date_range(start_date, end_date):
     return [dict(row) for row in results]
 
 
+@timed_query
+def get_data_version():
+    """
+    Cheap marker that changes whenever a capture or analysis is written
+    or deleted
+    
+    All lookups are O(1) on integer primary keys; used for HTTP ETags so
+    unchanged data can be answered with 304 Not Modified. New rows raise
+    the newest ids; deletes and replacements bump data_version.changes
+    (see bump_data_version).
+    
+    Returns:
+        dict: capture_id, analysis_id (newest, 0 if none), changes and
+              changed_at (UTC time of the newest write, or None)
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT 
+            (SELECT capture_id FROM captures 
+             ORDER BY capture_id DESC LIMIT 1) as capture_id,
+            (SELECT created_at FROM captures 
+             ORDER BY capture_id DESC LIMIT 1) as created_at,
+            (SELECT analysis_id FROM sky_analysis 
+             ORDER BY analysis_id DESC LIMIT 1) as analysis_id,
+            (SELECT analyzed_at FROM sky_analysis 
+             ORDER BY analysis_id DESC LIMIT 1) as analyzed_at,
+            (SELECT changes FROM data_version WHERE id = 1) as changes,
+            (SELECT changed_at FROM data_version WHERE id = 1) as changed_at
+    """)
+    
+    row = dict(cursor.fetchone())
+    conn.close()
+    
+    changed = [t for t in (row['created_at'], row['analyzed_at'], row['changed_at']) if t]
+    
+    return {
+        'capture_id': row['capture_id'] or 0,
+        'analysis_id': row['analysis_id'] or 0,
+        'changes': row['changes'] or 0,
+        'changed_at': max(changed) if changed else None
+    }
+
+
+def bump_data_version(cursor):
+    """
+    Record a delete or in-place rewrite on an existing cursor (no commit)
+    
+    Call in the same transaction as the change, so the ETag cannot move
+    without the data (or the other way round).
+    """
+    cursor.execute("""
+        UPDATE data_version 
+        SET changes = changes + 1, changed_at = CURRENT_TIMESTAMP 
+        WHERE id = 1
+    """)
+
+
+@timed_query
 def get_capture_count():
     """Get total number of captures"""
     conn = get_connection()
@@ -142,25 +387,29 @@ def get_capture_count():
     return count
 
 
+@timed_query
 def mark_analysis_complete(capture_id):
     """Mark a capture as having completed analysis"""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        UPDATE captures 
-        SET analysis_complete = TRUE 
-        WHERE capture_id = ?
-    """, (capture_id,))
-    
-    conn.commit()
-    conn.close()
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            UPDATE captures 
+            SET analysis_complete = TRUE 
+            WHERE capture_id = ?
+        """, (capture_id,))
+        
+        conn.commit()
+    finally:
+        conn.close()
 
 
 # ========================================
 # SKY ANALYSIS OPERATIONS
 # ========================================
 
+@timed_query
 def insert_sky_analysis(capture_id, analysis_results):
     """
     Insert sky analysis results
@@ -173,12 +422,29 @@ def insert_sky_analysis(capture_id, analysis_results):
         int: analysis_id of newly created record
     """
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        cursor = conn.cursor()
+        
+        analysis_id = write_sky_analysis_row(cursor, capture_id, analysis_results)
+        conn.commit()
+    finally:
+        conn.close()
     
+    return analysis_id
+
+
+def write_sky_analysis_row(cursor, capture_id, analysis_results):
+    """
+    Insert a sky_analysis row on an existing cursor (no commit)
+    
+    Returns:
+        int: analysis_id of the new row
+    """
     # Extract nested data
     brightness = analysis_results.get('brightness', {})
     color = analysis_results.get('color', {})
-    sky = analysis_results.get('sky_features', {})
+    # analyze_image() returns 'features'; older callers used 'sky_features'
+    sky = analysis_results.get('sky_features') or analysis_results.get('features', {})
     
     cursor.execute("""
         INSERT INTO sky_analysis (
@@ -203,12 +469,14 @@ def insert_sky_analysis(capture_id, analysis_results):
             gray_coverage_percent,
             white_coverage_percent,
             coverage_assessment,
-            pixels_sampled
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            pixels_sampled,
+            
+            analysis_version
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """, (
         capture_id,
         analysis_results.get('clear_sky_score'),
-        analysis_results.get('summary'),
+        analysis_results.get('summary') or analysis_results.get('sky_condition'),
         
         brightness.get('average'),
         brightness.get('condition'),
@@ -227,16 +495,15 @@ def insert_sky_analysis(capture_id, analysis_results):
         sky.get('gray_coverage'),
         sky.get('white_coverage'),
         sky.get('assessment'),
-        sky.get('pixels_sampled')
+        sky.get('pixels_sampled'),
+        
+        analysis_results.get('analysis_version')
     ))
     
-    analysis_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
-    return analysis_id
+    return cursor.lastrowid
 
 
+@timed_query
 def get_analysis_by_capture_id(capture_id):
     """Get analysis results for a specific capture"""
     conn = get_connection()
@@ -252,6 +519,7 @@ def get_analysis_by_capture_id(capture_id):
     return dict(result) if result else None
 
 
+@timed_query
 def get_latest_analysis():
     """Get the most recent analysis"""
     conn = get_connection()
@@ -270,55 +538,145 @@ def get_latest_analysis():
 
 
 # ========================================
-# COMBINED QUERIES (Capture + Analysis)
+# INGEST (Capture + Analysis in one transaction)
 # ========================================
 
-def get_latest_capture_with_analysis():
-    """Get latest capture with its analysis results"""
+def ingest_capture(record):
+    """
+    Store a capture and its analysis atomically
+    
+    Args:
+        record (dict): Keys timestamp, image_path, image_filename,
+            image_size_bytes, image_width, image_height, analysis_results
+            and optionally device_id
+    
+    Returns:
+        int: capture_id
+    """
+    return ingest_captures_batch([record])[0]
+
+
+@timed_query
+def ingest_captures_batch(records):
+    """
+    Store many captures and their analyses in a single transaction
+    
+    One commit (one fsync) covers the whole batch, and a failure rolls
+    the whole batch back, so a capture is never left without analysis.
+    The hourly/daily rollups for the affected dates are refreshed in the
+    same transaction.
+    A timestamp that already exists has its image fields and analysis
+    replaced rather than being silently skipped.
+    
+    Args:
+        records (list): Record dicts, see ingest_capture()
+    
+    Returns:
+        list: capture_id for each record, in order
+    """
     conn = get_connection()
-    cursor = conn.cursor()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        
+        capture_ids = [write_ingest_record(cursor, record) for record in records]
+        refresh_summaries_for_dates(cursor, get_capture_dates(cursor, set(capture_ids)))
+        
+        conn.commit()
+        return capture_ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def write_ingest_record(cursor, record):
+    """
+    Write one capture + analysis on an existing cursor (no commit)
     
-    cursor.execute("""
-        SELECT 
-            c.*,
-            sa.clear_sky_score,
-            sa.sky_condition,
-            sa.brightness_average,
-            sa.brightness_score,
-            sa.blue_coverage_percent,
-            sa.gray_coverage_percent
-        FROM captures c
-        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        ORDER BY c.timestamp DESC
-        LIMIT 1
-    """)
+    Returns:
+        int: capture_id
+    """
+    capture_id, created = write_capture_row(
+        cursor,
+        record['timestamp'],
+        record['image_path'],
+        record['image_filename'],
+        record.get('image_size_bytes'),
+        record.get('image_width'),
+        record.get('image_height'),
+        record.get('device_id') or DEFAULT_DEVICE_ID
+    )
+    
+    if not created:
+        # Re-ingest of a known timestamp (e.g. SD file whose delete failed)
+        cursor.execute("""
+            UPDATE captures
+            SET image_path = ?, image_filename = ?, image_size_bytes = ?
+            WHERE capture_id = ?
+        """, (
+            record['image_path'], record['image_filename'],
+            record.get('image_size_bytes'), capture_id
+        ))
+        cursor.execute("""
+            DELETE FROM sky_analysis WHERE capture_id = ?
+        """, (capture_id,))
     
-    result = cursor.fetchone()
-    conn.close()
+    write_sky_analysis_row(cursor, capture_id, record['analysis_results'])
     
-    return dict(result) if result else None
+    cursor.execute("""
+        UPDATE captures 
+        SET analysis_complete = TRUE 
+        WHERE capture_id = ?
+    """, (capture_id,))
+    
+    return capture_id
 
 
-def get_recent_captures_with_analysis(limit=10):
-    """Get recent captures with their analysis"""
+# ========================================
+# REANALYSIS
+# ========================================
+
+@timed_query
+def get_reanalysis_candidates(after_capture_id=0, limit=500, analysis_version=None):
+    """
+    Get the next page of captures whose analysis is stale
+    
+    Pages by capture_id (keyset), so a long run streams through the
+    archive without OFFSET scans and can resume from the last id.
+    
+    Args:
+        after_capture_id: Only captures with a larger capture_id
+        limit: Page size
+        analysis_version: Current version; rows already at it are skipped
+                          (None = every capture)
+    
+    Returns:
+        list: Dicts with capture_id and image_path, ordered by capture_id
+    """
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT 
-            c.capture_id,
-            c.timestamp,
-            c.image_path,
-            c.image_filename,
-            sa.clear_sky_score,
-            sa.sky_condition,
-            sa.brightness_average,
-            sa.blue_coverage_percent
-        FROM captures c
-        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        ORDER BY c.timestamp DESC
-        LIMIT ?
-    """, (limit,))
+    if analysis_version is None:
+        cursor.execute("""
+            SELECT capture_id, image_path FROM captures 
+            WHERE capture_id > ?
+            ORDER BY capture_id 
+            LIMIT ?
+        """, (after_capture_id, limit))
+    else:
+        cursor.execute("""
+            SELECT c.capture_id, c.image_path 
+            FROM captures c
+            WHERE c.capture_id > ?
+              AND NOT EXISTS (
+                  SELECT 1 FROM sky_analysis sa 
+                  WHERE sa.capture_id = c.capture_id AND sa.analysis_version = ?
+              )
+            ORDER BY c.capture_id 
+            LIMIT ?
+        """, (after_capture_id, analysis_version, limit))
     
     results = cursor.fetchall()
     conn.close()
@@ -326,105 +684,217 @@ def get_recent_captures_with_analysis(limit=10):
     return [dict(row) for row in results]
 
 
-def get_captures_by_score_range(min_score, max_score):
-    """Get captures within a clear sky score range"""
+@timed_query
+def count_reanalysis_candidates(analysis_version=None):
+    """
+    Number of captures get_reanalysis_candidates() would return in total
+    
+    Uses the same NOT EXISTS test, so progress never passes 100%.
+    """
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT 
-            c.timestamp,
-            c.image_path,
-            sa.clear_sky_score,
-            sa.sky_condition
-        FROM captures c
-        JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        WHERE sa.clear_sky_score BETWEEN ? AND ?
-        ORDER BY sa.clear_sky_score DESC
-    """, (min_score, max_score))
+    if analysis_version is None:
+        cursor.execute("SELECT COUNT(*) FROM captures")
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM captures c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM sky_analysis sa 
+                WHERE sa.capture_id = c.capture_id AND sa.analysis_version = ?
+            )
+        """, (analysis_version,))
     
-    results = cursor.fetchall()
+    count = cursor.fetchone()[0]
     conn.close()
     
-    return [dict(row) for row in results]
-
+    return count
 
-# ========================================
-# STATISTICS QUERIES
-# ========================================
 
-def get_statistics():
-    """Get overall statistics"""
-    conn = get_connection()
-    cursor = conn.cursor()
+@timed_query
+def replace_analyses_batch(results):
+    """
+    Replace the analysis of many captures in a single transaction
     
-    # Total captures
-    cursor.execute("SELECT COUNT(*) FROM captures")
-    total_captures = cursor.fetchone()[0]
+    The rollups for the affected dates are refreshed in the same
+    transaction, so statistics never mix old and new scores for a day.
     
-    # Analysis statistics
-    cursor.execute("""
-        SELECT 
-            COUNT(*) as analyzed_count,
-            AVG(clear_sky_score) as avg_score,
-            MAX(clear_sky_score) as max_score,
-            MIN(clear_sky_score) as min_score,
-            AVG(brightness_average) as avg_brightness,
-            AVG(blue_coverage_percent) as avg_blue_coverage
-        FROM sky_analysis
-    """)
+    Args:
+        results (list): (capture_id, analysis_results) tuples
     
-    analysis_stats = dict(cursor.fetchone())
+    Returns:
+        int: Number of analyses written
+    """
+    if not results:
+        return 0
     
-    # Clear days (score >= 70)
-    cursor.execute("""
-        SELECT COUNT(DISTINCT DATE(c.timestamp)) 
-        FROM captures c
-        JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        WHERE sa.clear_sky_score >= 70
-    """)
-    clear_days = cursor.fetchone()[0]
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        
+        for capture_id, analysis_results in results:
+            cursor.execute("""
+                DELETE FROM sky_analysis WHERE capture_id = ?
+            """, (capture_id,))
+            write_sky_analysis_row(cursor, capture_id, analysis_results)
+            cursor.execute("""
+                UPDATE captures 
+                SET analysis_complete = TRUE 
+                WHERE capture_id = ?
+            """, (capture_id,))
+        
+        capture_ids = {capture_id for capture_id, _ in results}
+        refresh_summaries_for_dates(cursor, get_capture_dates(cursor, capture_ids))
+        bump_data_version(cursor)
+        
+        conn.commit()
+        return len(results)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ========================================
+# IMAGE LAYOUT
+# ========================================
+
+@timed_query
+def get_capture_image_paths(after_capture_id=0, limit=1000):
+    """
+    Get the next page of capture image paths (keyset on capture_id)
+    
+    Args:
+        after_capture_id: Only captures with a larger capture_id
+        limit: Page size
+    
+    Returns:
+        list: Dicts with capture_id, device_id, image_path and
+              image_filename, ordered by capture_id
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    # Date range
     cursor.execute("""
-        SELECT MIN(timestamp), MAX(timestamp) FROM captures
-    """)
-    date_range = cursor.fetchone()
+        SELECT capture_id, device_id, image_path, image_filename FROM captures 
+        WHERE capture_id > ?
+        ORDER BY capture_id 
+        LIMIT ?
+    """, (after_capture_id, limit))
     
+    results = cursor.fetchall()
     conn.close()
     
-    return {
-        'total_captures': total_captures,
-        'analyzed_count': analysis_stats['analyzed_count'] or 0,
-        'avg_clear_sky_score': round(analysis_stats['avg_score'] or 0, 1),
-        'max_clear_sky_score': analysis_stats['max_score'] or 0,
-        'min_clear_sky_score': analysis_stats['min_score'] or 0,
-        'avg_brightness': round(analysis_stats['avg_brightness'] or 0, 1),
-        'avg_blue_coverage': round(analysis_stats['avg_blue_coverage'] or 0, 1),
-        'clear_days_count': clear_days,
-        'first_capture': date_range[0],
-        'last_capture': date_range[1]
-    }
+    return [dict(row) for row in results]
 
 
-def get_daily_statistics(days=7):
-    """Get daily statistics for the last N days"""
+@timed_query
+def update_image_paths_batch(updates):
+    """
+    Rewrite the image_path of many captures in a single transaction
+    
+    Args:
+        updates (list): (capture_id, new_image_path) tuples
+    
+    Returns:
+        int: Number of captures updated
+    """
+    if not updates:
+        return 0
+    
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany("""
+            UPDATE captures SET image_path = ? WHERE capture_id = ?
+        """, [(image_path, capture_id) for capture_id, image_path in updates])
+        bump_data_version(conn.cursor())
+        conn.commit()
+        return len(updates)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# ========================================
+# RETENTION
+# ========================================
+
+# strftime() bucket each retention tier keeps one capture per camera from
+RETENTION_BUCKETS = {
+    'hourly': '%Y-%m-%d %H',
+    'daily': '%Y-%m-%d'
+}
+
+
+@timed_query
+def get_retention_candidates(keep, start=None, end=None, limit=100):
+    """
+    Get the next captures a retention tier would delete, oldest first
+    
+    For 'hourly' and 'daily' tiers every capture except the best-scoring
+    one of its camera and bucket is a candidate (ties and unanalyzed
+    captures go to the earliest); for 'none' every capture is.
+    
+    Buckets never span midnight, so a caller that has deleted every
+    candidate before a day can pass that midnight as the next `start`
+    without changing which capture each bucket keeps.
+    
+    Args:
+        keep: 'hourly', 'daily' or 'none'
+        start (datetime): Only captures at or after this time (None = oldest)
+        end (datetime): Only captures before this time
+        limit: Most candidates to return
+    
+    Returns:
+        list: Dicts with capture_id, device_id, timestamp and image_path
+    """
+    conditions = []
+    params = []
+    
+    if start is not None:
+        conditions.append("c.timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("c.timestamp < ?")
+        params.append(end)
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
-        SELECT 
-            DATE(c.timestamp) as date,
-            COUNT(*) as capture_count,
-            AVG(sa.clear_sky_score) as avg_score,
-            MAX(sa.clear_sky_score) as max_score,
-            MIN(sa.clear_sky_score) as min_score
-        FROM captures c
-        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        WHERE c.timestamp >= datetime('now', ? || ' days')
-        GROUP BY DATE(c.timestamp)
-        ORDER BY date DESC
-    """, (f'-{days}',))
+    if keep == 'none':
+        cursor.execute(f"""
+            SELECT c.capture_id, c.device_id, c.timestamp, c.image_path 
+            FROM captures c
+            {where}
+            ORDER BY c.timestamp 
+            LIMIT ?
+        """, params + [limit])
+    else:
+        cursor.execute(f"""
+            SELECT capture_id, device_id, timestamp, image_path FROM (
+                SELECT 
+                    c.capture_id, c.device_id, c.timestamp, c.image_path,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY c.device_id, strftime(?, c.timestamp)
+                        ORDER BY (
+                            SELECT MAX(sa.clear_sky_score) FROM sky_analysis sa 
+                            WHERE sa.capture_id = c.capture_id
+                        ) DESC, c.timestamp
+                    ) AS bucket_rank
+                FROM captures c
+                {where}
+            )
+            WHERE bucket_rank > 1
+            ORDER BY timestamp 
+            LIMIT ?
+        """, [RETENTION_BUCKETS[keep]] + params + [limit])
     
     results = cursor.fetchall()
     conn.close()
@@ -432,75 +902,667 @@ def get_daily_statistics(days=7):
     return [dict(row) for row in results]
 
 
+@timed_query
+def delete_captures_batch(capture_ids):
+    """
+    Delete captures and their analysis in a single transaction
+    
+    The rollups of the affected dates are refreshed in the same
+    transaction. Image files are left to the caller.
+    
+    Args:
+        capture_ids (list): Captures to delete
+    
+    Returns:
+        int: Number of captures deleted
+    """
+    if not capture_ids:
+        return 0
+    
+    capture_ids = list(capture_ids)
+    placeholders = ', '.join('?' for _ in capture_ids)
+    
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        
+        affected_dates = get_capture_dates(cursor, capture_ids)
+        
+        cursor.execute(f"""
+            DELETE FROM sky_analysis WHERE capture_id IN ({placeholders})
+        """, capture_ids)
+        cursor.execute(f"""
+            DELETE FROM captures WHERE capture_id IN ({placeholders})
+        """, capture_ids)
+        deleted_count = cursor.rowcount
+        
+        refresh_summaries_for_dates(cursor, affected_dates)
+        bump_data_version(cursor)
+        conn.commit()
+        return deleted_count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@timed_query
+def get_auto_vacuum_mode():
+    """
+    Returns:
+        int: 0 = none, 1 = full, 2 = incremental
+    """
+    conn = get_connection()
+    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    conn.close()
+    return mode
+
+
+@timed_query
+def incremental_vacuum(max_pages=500):
+    """
+    Return up to max_pages free pages to the filesystem
+    
+    Unlike VACUUM this only truncates the file, holding the write lock
+    for a few milliseconds. Needs auto_vacuum=INCREMENTAL (see
+    enable_incremental_vacuum()).
+    
+    Returns:
+        tuple: (pages freed, free pages still left)
+    """
+    conn = get_connection()
+    try:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if before:
+            # The pragma frees one page per result row stepped
+            conn.execute(f"PRAGMA incremental_vacuum({max(1, int(max_pages))})").fetchall()
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return before - after, after
+    finally:
+        conn.close()
+
+
+@timed_query
+def enable_incremental_vacuum():
+    """
+    Switch an existing database to auto_vacuum=INCREMENTAL
+    
+    Takes effect through one full VACUUM, which locks the database while
+    it rewrites the file - run it once while the server is stopped.
+    Databases created by create_database() already have it.
+    """
+    conn = get_connection()
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    conn.close()
+
+
 # ========================================
-# DATA EXPORT
+# COMBINED QUERIES (Capture + Analysis)
 # ========================================
 
-def export_to_csv(filepath):
-    """Export all data to CSV file"""
-    import csv
+@timed_query
+def get_latest_capture_with_analysis():
+    """Get latest capture with its analysis results"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT 
+            c.*,
+            sa.clear_sky_score,
+            sa.sky_condition,
+            sa.brightness_average,
+            sa.brightness_score,
+            sa.blue_coverage_percent,
+            sa.gray_coverage_percent
+        FROM captures c
+        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
+        ORDER BY c.timestamp DESC
+        LIMIT 1
+    """)
+    
+    result = cursor.fetchone()
+    conn.close()
     
+    return dict(result) if result else None
+
+
+@timed_query
+def get_recent_captures_with_analysis(limit=10):
+    """Get recent captures with their analysis"""
     conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
         SELECT 
+            c.capture_id,
+            c.device_id,
             c.timestamp,
+            c.image_path,
             c.image_filename,
             sa.clear_sky_score,
             sa.sky_condition,
             sa.brightness_average,
-            sa.brightness_condition,
-            sa.color_red,
-            sa.color_green,
-            sa.color_blue,
-            sa.blue_dominant,
-            sa.blue_coverage_percent,
-            sa.gray_coverage_percent,
-            sa.white_coverage_percent
+            sa.blue_coverage_percent
         FROM captures c
         LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
         ORDER BY c.timestamp DESC
-    """)
+        LIMIT ?
+    """, (limit,))
     
     results = cursor.fetchall()
+    conn.close()
     
-    if results:
-        # Get column names
-        columns = [description[0] for description in cursor.description]
-        
-        # Write CSV
-        with open(filepath, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(columns)
-            writer.writerows(results)
+    return [dict(row) for row in results]
+
+
+@timed_query
+def get_captures_page(limit=100, before=None, start=None, end=None, device_id=None):
+    """
+    Get one page of captures with analysis, newest first (keyset pagination)
+    
+    Pages are keyed on (timestamp, capture_id) rather than OFFSET, so
+    every page is an index range scan on idx_timestamp (which carries
+    capture_id as the rowid) and page 1000 costs the same as page 1.
+    
+    Args:
+        limit (int): Page size
+        before (tuple): (timestamp, capture_id) of the last row of the
+                        previous page, or None for the first page
+        start (datetime): Only captures at or after this time
+        end (datetime): Only captures before this time
+        device_id (str): Only captures from this camera
+    
+    Returns:
+        tuple: (list of rows, (timestamp, capture_id) key for the next
+                page or None if this is the last page)
+    """
+    conditions = []
+    params = []
+    
+    if before is not None:
+        conditions.append("(c.timestamp, c.capture_id) < (?, ?)")
+        params.extend(before)
+    if start is not None:
+        conditions.append("c.timestamp >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append("c.timestamp < ?")
+        params.append(end)
+    if device_id is not None:
+        conditions.append("c.device_id = ?")
+        params.append(device_id)
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    conn = get_connection()
+    cursor = conn.cursor()
     
+    # One extra row tells us whether another page exists
+    cursor.execute(f"""
+        SELECT 
+            c.capture_id,
+            c.device_id,
+            c.timestamp,
+            c.image_path,
+            c.image_filename,
+            sa.clear_sky_score,
+            sa.sky_condition,
+            sa.brightness_average,
+            sa.blue_coverage_percent
+        FROM captures c
+        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
+        {where}
+        ORDER BY c.timestamp DESC, c.capture_id DESC
+        LIMIT ?
+    """, params + [limit + 1])
+    
+    rows = [dict(row) for row in cursor.fetchall()]
     conn.close()
     
-    return len(results)
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    return rows, (rows[-1]['timestamp'], rows[-1]['capture_id'])
+
+
+@timed_query
+def get_captures_by_score_range(min_score, max_score):
+    """Get captures within a clear sky score range"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT 
+            c.timestamp,
+            c.image_path,
+            sa.clear_sky_score,
+            sa.sky_condition
+        FROM captures c
+        JOIN sky_analysis sa ON c.capture_id = sa.capture_id
+        WHERE sa.clear_sky_score BETWEEN ? AND ?
+        ORDER BY sa.clear_sky_score DESC
+    """, (min_score, max_score))
+    
+    results = cursor.fetchall()
+    conn.close()
+    
+    return [dict(row) for row in results]
 
 
 # ========================================
-# UTILITY FUNCTIONS
+# SUMMARY ROLLUPS (hourly_summary / daily_summary)
 # ========================================
 
-def delete_old_captures(days_to_keep=90):
-    """Delete captures older than N days (keeps database size manageable)"""
+CLEAR_SCORE_THRESHOLD = 70  # Score that counts a capture (and its day) as clear
+
+_HOURLY_ROLLUP_SELECT = """
+    SELECT 
+        strftime('%Y-%m-%d %H:00:00', c.timestamp) as hour_start,
+        DATE(c.timestamp) as date,
+        COUNT(DISTINCT c.capture_id),
+        COUNT(sa.analysis_id),
+        SUM(sa.clear_sky_score),
+        COUNT(sa.clear_sky_score),
+        MAX(sa.clear_sky_score),
+        MIN(sa.clear_sky_score),
+        SUM(CASE WHEN sa.clear_sky_score >= {clear} THEN 1 ELSE 0 END),
+        SUM(sa.brightness_average),
+        COUNT(sa.brightness_average),
+        SUM(sa.blue_coverage_percent),
+        COUNT(sa.blue_coverage_percent),
+        MIN(c.timestamp),
+        MAX(c.timestamp)
+    FROM captures c
+    LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
+    {where}
+    GROUP BY hour_start
+""".replace('{clear}', str(CLEAR_SCORE_THRESHOLD))
+
+_DAILY_ROLLUP_SELECT = """
+    SELECT 
+        date,
+        SUM(capture_count),
+        SUM(analyzed_count),
+        SUM(score_sum),
+        SUM(score_count),
+        MAX(max_score),
+        MIN(min_score),
+        SUM(clear_count),
+        SUM(brightness_sum),
+        SUM(brightness_count),
+        SUM(blue_coverage_sum),
+        SUM(blue_coverage_count),
+        MIN(first_capture),
+        MAX(last_capture)
+    FROM hourly_summary
+    {where}
+    GROUP BY date
+"""
+
+_ROLLUP_COLUMNS = """
+    capture_count, analyzed_count,
+    score_sum, score_count, max_score, min_score, clear_count,
+    brightness_sum, brightness_count,
+    blue_coverage_sum, blue_coverage_count,
+    first_capture, last_capture
+"""
+
+
+def refresh_summaries_for_dates(cursor, dates):
+    """
+    Recompute the hourly and daily rollups for the given dates (no commit)
+    
+    Called inside the ingest / delete transaction. Each date costs one
+    indexed scan of that day's captures, independent of archive size.
+    
+    Args:
+        cursor: Cursor inside an open transaction
+        dates: Iterable of 'YYYY-MM-DD' strings
+    """
+    dates = sorted({d for d in dates if d})
+    if not dates:
+        return
+    
+    placeholders = ', '.join('?' for _ in dates)
+    
+    cursor.execute(f"DELETE FROM hourly_summary WHERE date IN ({placeholders})", dates)
+    cursor.execute(f"DELETE FROM daily_summary WHERE date IN ({placeholders})", dates)
+    
+    cursor.execute(f"""
+        INSERT INTO hourly_summary (hour_start, date, {_ROLLUP_COLUMNS})
+        {_HOURLY_ROLLUP_SELECT.format(where=f"WHERE DATE(c.timestamp) IN ({placeholders})")}
+    """, dates)
+    
+    cursor.execute(f"""
+        INSERT INTO daily_summary (date, {_ROLLUP_COLUMNS})
+        {_DAILY_ROLLUP_SELECT.format(where=f"WHERE date IN ({placeholders})")}
+    """, dates)
+
+
+def get_capture_dates(cursor, capture_ids):
+    """Get the distinct dates of a set of captures (for rollup refresh)"""
+    capture_ids = list(capture_ids)
+    if not capture_ids:
+        return []
+    
+    placeholders = ', '.join('?' for _ in capture_ids)
+    cursor.execute(f"""
+        SELECT DISTINCT DATE(timestamp) FROM captures 
+        WHERE capture_id IN ({placeholders})
+    """, capture_ids)
+    
+    return [row[0] for row in cursor.fetchall()]
+
+
+@timed_query
+def rebuild_summaries():
+    """
+    Rebuild both rollup tables from scratch
+    
+    Use after upgrading an existing database, or if the rollups are ever
+    suspected to be out of sync with captures / sky_analysis.
+    
+    Returns:
+        int: Number of days summarized
+    """
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        cursor = conn.cursor()
+        
+        cursor.execute("DELETE FROM hourly_summary")
+        cursor.execute("DELETE FROM daily_summary")
+        
+        cursor.execute(f"""
+            INSERT INTO hourly_summary (hour_start, date, {_ROLLUP_COLUMNS})
+            {_HOURLY_ROLLUP_SELECT.format(where="")}
+        """)
+        cursor.execute(f"""
+            INSERT INTO daily_summary (date, {_ROLLUP_COLUMNS})
+            {_DAILY_ROLLUP_SELECT.format(where="")}
+        """)
+        
+        cursor.execute("SELECT COUNT(*) FROM daily_summary")
+        day_count = cursor.fetchone()[0]
+        
+        conn.commit()
+        return day_count
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@timed_query
+def summaries_need_rebuild():
+    """True if captures exist but the rollup tables are empty"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM captures)")
+        has_captures = cursor.fetchone()[0]
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM daily_summary)")
+        has_summaries = cursor.fetchone()[0]
+        return bool(has_captures and not has_summaries)
+    finally:
+        conn.close()
+
+
+# ========================================
+# STATISTICS QUERIES
+# ========================================
+
+@timed_query
+def get_statistics():
+    """Get overall statistics (from the daily_summary rollup)"""
     conn = get_connection()
     cursor = conn.cursor()
     
     cursor.execute("""
-        DELETE FROM captures 
-        WHERE timestamp < datetime('now', ? || ' days')
-    """, (f'-{days_to_keep}',))
+        SELECT 
+            SUM(capture_count) as total_captures,
+            SUM(analyzed_count) as analyzed_count,
+            SUM(score_sum) / NULLIF(SUM(score_count), 0) as avg_score,
+            MAX(max_score) as max_score,
+            MIN(min_score) as min_score,
+            SUM(brightness_sum) / NULLIF(SUM(brightness_count), 0) as avg_brightness,
+            SUM(blue_coverage_sum) / NULLIF(SUM(blue_coverage_count), 0) as avg_blue_coverage,
+            SUM(CASE WHEN clear_count > 0 THEN 1 ELSE 0 END) as clear_days,
+            MIN(first_capture) as first_capture,
+            MAX(last_capture) as last_capture
+        FROM daily_summary
+    """)
     
-    deleted_count = cursor.rowcount
-    conn.commit()
+    stats = dict(cursor.fetchone())
     conn.close()
     
+    return {
+        'total_captures': stats['total_captures'] or 0,
+        'analyzed_count': stats['analyzed_count'] or 0,
+        'avg_clear_sky_score': round(stats['avg_score'] or 0, 1),
+        'max_clear_sky_score': stats['max_score'] or 0,
+        'min_clear_sky_score': stats['min_score'] or 0,
+        'avg_brightness': round(stats['avg_brightness'] or 0, 1),
+        'avg_blue_coverage': round(stats['avg_blue_coverage'] or 0, 1),
+        'clear_days_count': stats['clear_days'] or 0,
+        'first_capture': stats['first_capture'],
+        'last_capture': stats['last_capture']
+    }
+
+
+@timed_query
+def get_daily_statistics(days=7):
+    """Get daily statistics for the last N days (from daily_summary)"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        SELECT 
+            date,
+            capture_count,
+            score_sum / NULLIF(score_count, 0) as avg_score,
+            max_score,
+            min_score
+        FROM daily_summary
+        WHERE date >= DATE('now', ? || ' days')
+        ORDER BY date DESC
+    """, (f'-{days}',))
+    
+    results = cursor.fetchall()
+    conn.close()
+    
+    return [dict(row) for row in results]
+
+
+# ========================================
+# DATA EXPORT
+# ========================================
+
+# Exportable columns: name -> SQL expression
+EXPORT_COLUMNS = {
+    'capture_id': 'c.capture_id',
+    'device_id': 'c.device_id',
+    'timestamp': 'c.timestamp',
+    'image_filename': 'c.image_filename',
+    'image_path': 'c.image_path',
+    'clear_sky_score': 'sa.clear_sky_score',
+    'sky_condition': 'sa.sky_condition',
+    'brightness_average': 'sa.brightness_average',
+    'brightness_condition': 'sa.brightness_condition',
+    'brightness_score': 'sa.brightness_score',
+    'color_red': 'sa.color_red',
+    'color_green': 'sa.color_green',
+    'color_blue': 'sa.color_blue',
+    'color_variance': 'sa.color_variance',
+    'blue_dominant': 'sa.blue_dominant',
+    'is_gray': 'sa.is_gray',
+    'blue_sky_score': 'sa.blue_sky_score',
+    'blue_coverage_percent': 'sa.blue_coverage_percent',
+    'gray_coverage_percent': 'sa.gray_coverage_percent',
+    'white_coverage_percent': 'sa.white_coverage_percent',
+    'coverage_assessment': 'sa.coverage_assessment',
+    'analysis_version': 'sa.analysis_version'
+}
+
+# Columns exported when none are requested (the original CSV layout)
+DEFAULT_EXPORT_COLUMNS = [
+    'timestamp', 'image_filename', 'clear_sky_score', 'sky_condition',
+    'brightness_average', 'brightness_condition',
+    'color_red', 'color_green', 'color_blue', 'blue_dominant',
+    'blue_coverage_percent', 'gray_coverage_percent', 'white_coverage_percent'
+]
+
+
+def iter_export_rows(columns=None, start=None, end=None, device_id=None, chunk_size=500):
+    """
+    Yield capture + analysis rows for export, newest first, in chunks
+    
+    Each chunk is a separate keyset query on (timestamp, capture_id), so
+    memory stays flat regardless of archive size and no read transaction
+    is held open while the client downloads.
+    
+    Args:
+        columns (list): Names from EXPORT_COLUMNS (default DEFAULT_EXPORT_COLUMNS)
+        start (datetime): Only captures at or after this time
+        end (datetime): Only captures before this time
+        device_id (str): Only captures from this camera
+        chunk_size (int): Rows fetched per query
+    
+    Yields:
+        tuple: One value per requested column
+    
+    Raises:
+        ValueError: If a column name is unknown (raised before any row)
+    """
+    columns = list(columns or DEFAULT_EXPORT_COLUMNS)
+    unknown = [name for name in columns if name not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export column(s): {', '.join(unknown)}")
+    
+    return _iter_export_chunks(columns, start, end, device_id, chunk_size)
+
+
+def _iter_export_chunks(columns, start, end, device_id, chunk_size):
+    select = ', '.join(EXPORT_COLUMNS[name] for name in columns)
+    
+    filters = []
+    filter_params = []
+    if start is not None:
+        filters.append("c.timestamp >= ?")
+        filter_params.append(start)
+    if end is not None:
+        filters.append("c.timestamp < ?")
+        filter_params.append(end)
+    if device_id is not None:
+        filters.append("c.device_id = ?")
+        filter_params.append(device_id)
+    
+    before = None
+    while True:
+        conditions = list(filters)
+        params = list(filter_params)
+        if before is not None:
+            conditions.append("(c.timestamp, c.capture_id) < (?, ?)")
+            params.extend(before)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        conn = get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT c.timestamp, c.capture_id, {select}
+                FROM captures c
+                LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
+                {where}
+                ORDER BY c.timestamp DESC, c.capture_id DESC
+                LIMIT ?
+            """, params + [chunk_size])
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        
+        for row in rows:
+            yield tuple(row)[2:]
+        
+        if len(rows) < chunk_size:
+            return
+        before = (rows[-1][0], rows[-1][1])
+
+
+def export_to_csv(filepath, columns=None, start=None, end=None):
+    """
+    Export data to a CSV file
+    
+    Returns:
+        int: Number of rows written
+    """
+    import csv
+    
+    columns = list(columns or DEFAULT_EXPORT_COLUMNS)
+    count = 0
+    
+    with open(filepath, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for row in iter_export_rows(columns, start, end):
+            writer.writerow(row)
+            count += 1
+    
+    return count
+
+
+# ========================================
+# UTILITY FUNCTIONS
+# ========================================
+
+@timed_query
+def delete_old_captures(days_to_keep=90):
+    """
+    Delete captures older than N days (keeps database size manageable)
+    
+    Leaves the image files in place - retention.py deletes rows and
+    files together and should be preferred.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT DISTINCT DATE(timestamp) FROM captures 
+            WHERE timestamp < datetime('now', ? || ' days')
+        """, (f'-{days_to_keep}',))
+        affected_dates = [row[0] for row in cursor.fetchall()]
+        
+        cursor.execute("""
+            DELETE FROM sky_analysis WHERE capture_id IN (
+                SELECT capture_id FROM captures 
+                WHERE timestamp < datetime('now', ? || ' days')
+            )
+        """, (f'-{days_to_keep}',))
+        
+        cursor.execute("""
+            DELETE FROM captures 
+            WHERE timestamp < datetime('now', ? || ' days')
+        """, (f'-{days_to_keep}',))
+        
+        deleted_count = cursor.rowcount
+        refresh_summaries_for_dates(cursor, affected_dates)
+        if deleted_count:
+            bump_data_version(cursor)
+        conn.commit()
+    finally:
+        conn.close()
+    
     return deleted_count
 
 
+@timed_query
 def vacuum_database():
     """Optimize database (reclaim space after deletions)"""
     conn = get_connection()
@@ -509,7 +1571,13 @@ def vacuum_database():
 
 
 if __name__ == '__main__':
-    """Test database operations"""
+    """Test database operations
+    
+    Usage:
+        python database_operations.py                      # Show statistics
+        python database_operations.py --rebuild-summaries  # Rebuild rollups
+    """
+    import sys
     from database_schema import create_database
     
     print("\n" + "="*60)
@@ -519,6 +1587,10 @@ if __name__ == '__main__':
     # Ensure database exists
     create_database()
     
+    if '--rebuild-summaries' in sys.argv:
+        print("Rebuilding hourly/daily summaries...")
+        print(f"✓ Summarized {rebuild_summaries()} day(s)\n")
+    
     # Test statistics
     print("Current Statistics:")
     stats = get_statistics()
@@ -529,9 +1601,10 @@ if __name__ == '__main__':
     print("Database operations module ready!")
     print("="*60 + "\n")
     
+@timed_query
 def get_distinct_dates_with_stats():
     """
-    Get all distinct dates with statistics using efficient SQL
+    Get all distinct dates with statistics (from daily_summary)
     
     Returns list of dicts:
         date: YYYY-MM-DD
@@ -545,14 +1618,12 @@ def get_distinct_dates_with_stats():
     
     cursor.execute("""
         SELECT 
-            DATE(c.timestamp) as date,
-            COUNT(*) as count,
-            ROUND(AVG(sa.clear_sky_score), 1) as avg_score,
-            MAX(sa.clear_sky_score) as max_score,
-            MIN(sa.clear_sky_score) as min_score
-        FROM captures c
-        LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        GROUP BY DATE(c.timestamp)
+            date,
+            capture_count as count,
+            ROUND(score_sum / NULLIF(score_count, 0), 1) as avg_score,
+            max_score,
+            min_score
+        FROM daily_summary
         ORDER BY date DESC
     """)
     
@@ -562,38 +1633,70 @@ def get_distinct_dates_with_stats():
     return [dict(row) for row in results]
 
 
-def get_captures_for_date(date_string, limit=1000):
+@timed_query
+def get_captures_for_date(date_string, limit=1000, device_id=None):
     """
     Get all captures for a specific date
     
+    Matches the day as a timestamp range so idx_timestamp is used
+    instead of evaluating DATE() on every row.
+    
     Args:
         date_string: Date in YYYY-MM-DD format
         limit: Maximum captures to return (default 1000)
+        device_id: Only captures from this camera (default: any camera)
     
     Returns:
         List of capture dicts with analysis data
     """
+    start, end = get_day_bounds(date_string)
+    params = [start, end]
+    
+    device_filter = ""
+    if device_id is not None:
+        device_filter = "AND c.device_id = ?"
+        params.append(device_id)
+    
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("""
+    cursor.execute(f"""
         SELECT 
             c.capture_id,
+            c.device_id,
             c.timestamp,
             c.image_path,
             c.image_filename,
             sa.clear_sky_score,
             sa.sky_condition,
             sa.brightness_average,
-            sa.blue_coverage_percent
+            sa.blue_coverage_percent,
+            sa.analysis_id
         FROM captures c
         LEFT JOIN sky_analysis sa ON c.capture_id = sa.capture_id
-        WHERE DATE(c.timestamp) = ?
+        WHERE c.timestamp >= ? AND c.timestamp < ? {device_filter}
         ORDER BY c.timestamp DESC
         LIMIT ?
-    """, (date_string, limit))
+    """, params + [limit])
     
     results = cursor.fetchall()
     conn.close()
     
     return [dict(row) for row in results]
+
+
+def get_day_bounds(date_string):
+    """
+    Timestamp range covering one day
+    
+    Args:
+        date_string: Date in YYYY-MM-DD format
+    
+    Returns:
+        tuple: (start, end) strings, end exclusive
+    
+    Raises:
+        ValueError: Not a YYYY-MM-DD date
+    """
+    day = datetime.strptime(date_string, "%Y-%m-%d")
+    return day.strftime("%Y-%m-%d"), (day + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -9,6 +9,7 @@ Easily extensible for future sensors
 import sqlite3
 import os
 from datetime import datetime
+from python_config import DEFAULT_DEVICE_ID
 
 
 def get_database_path():
@@ -39,6 +40,9 @@ def create_database():
     cursor = conn.cursor()
     # Only configure WAL when database is first created
     if not db_exists:
+        # Must be set before the first table exists; lets retention hand
+        # freed pages back with PRAGMA incremental_vacuum instead of VACUUM
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
         cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")
 
@@ -52,10 +56,11 @@ def create_database():
     # Create tables
     create_captures_table(cursor)
     create_sky_analysis_table(cursor)
+    create_summary_tables(cursor)
+    create_data_version_table(cursor)
     
     # Future tables (commented out for now)
     # create_sensor_readings_table(cursor)
-    # create_daily_summary_table(cursor)
     # create_predictions_table(cursor)
     
     conn.commit()
@@ -69,11 +74,9 @@ def create_database():
     return db_path
 
 
-def create_captures_table(cursor):
-    """Create captures table - main table linking everything"""
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS captures (
+CAPTURES_COLUMNS = f"""
             capture_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            device_id TEXT NOT NULL DEFAULT '{DEFAULT_DEVICE_ID}',
             timestamp DATETIME NOT NULL,
             
             -- Image Storage
@@ -92,12 +95,27 @@ def create_captures_table(cursor):
             -- Timestamps
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             
-            -- Ensure unique timestamp
-            UNIQUE(timestamp)
+            -- One capture per camera per timestamp
+            UNIQUE(device_id, timestamp)
+"""
+
+
+def create_captures_table(cursor):
+    """Create captures table - main table linking everything"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS captures (
+            {CAPTURES_COLUMNS}
         )
     """)
     
-    # Create indexes for fast queries
+    migrate_captures_device_id(cursor)
+    create_captures_indexes(cursor)
+    
+    print("✓ Created table: captures")
+
+
+def create_captures_indexes(cursor):
+    """Create indexes for fast queries on captures"""
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_timestamp 
         ON captures(timestamp)
@@ -107,8 +125,47 @@ def create_captures_table(cursor):
         CREATE INDEX IF NOT EXISTS idx_date 
         ON captures(DATE(timestamp))
     """)
+
+
+def migrate_captures_device_id(cursor):
+    """
+    Add the device_id column to a captures table from before multi-camera
     
-    print("✓ Created table: captures")
+    The old UNIQUE(timestamp) constraint would reject two cameras firing
+    in the same second, and SQLite cannot alter a table constraint, so the
+    table is rebuilt. capture_id values are preserved, so sky_analysis
+    rows stay linked. Existing captures get DEFAULT_DEVICE_ID.
+    """
+    cursor.execute("PRAGMA table_info(captures)")
+    columns = [row[1] for row in cursor.fetchall()]
+    
+    if 'device_id' in columns:
+        return
+    
+    print("Migrating captures table for multi-camera support...")
+    
+    copied = ', '.join(columns)
+    
+    # sqlite3 only opens a transaction implicitly at the INSERT, so the
+    # CREATE would autocommit; an explicit one makes the rebuild all or
+    # nothing. A leftover captures_new is from a rebuild that crashed.
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("DROP TABLE IF EXISTS captures_new")
+        cursor.execute(f"CREATE TABLE captures_new ({CAPTURES_COLUMNS})")
+        cursor.execute(f"INSERT INTO captures_new ({copied}) SELECT {copied} FROM captures")
+        
+        # Drop + rename (not rename + drop) so sky_analysis' foreign key
+        # keeps pointing at "captures"
+        cursor.execute("DROP TABLE captures")
+        cursor.execute("ALTER TABLE captures_new RENAME TO captures")
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    cursor.execute("SELECT COUNT(*) FROM captures")
+    print(f"✓ Migrated {cursor.fetchone()[0]} capture(s) to device '{DEFAULT_DEVICE_ID}'")
 
 
 def create_sky_analysis_table(cursor):
@@ -144,6 +201,9 @@ def create_sky_analysis_table(cursor):
             coverage_assessment TEXT,
             pixels_sampled INTEGER,
             
+            -- Hash of the analysis code + thresholds that produced this row
+            analysis_version TEXT,
+            
             -- Timestamps
             analyzed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             
@@ -164,9 +224,102 @@ def create_sky_analysis_table(cursor):
         ON sky_analysis(clear_sky_score)
     """)
     
+    migrate_sky_analysis_version(cursor)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_analysis_version 
+        ON sky_analysis(analysis_version)
+    """)
+    
     print("✓ Created table: sky_analysis")
 
 
+def migrate_sky_analysis_version(cursor):
+    """Add the analysis_version column to sky_analysis tables created before it"""
+    cursor.execute("PRAGMA table_info(sky_analysis)")
+    columns = [row[1] for row in cursor.fetchall()]
+    
+    if 'analysis_version' not in columns:
+        # Existing rows stay NULL, which marks them stale for reanalysis
+        cursor.execute("ALTER TABLE sky_analysis ADD COLUMN analysis_version TEXT")
+        print("✓ Added column: sky_analysis.analysis_version")
+
+
+def create_summary_tables(cursor):
+    """
+    Create hourly_summary and daily_summary rollup tables
+    
+    Maintained by database_operations in the same transaction as each
+    ingest, so statistics pages read O(days) rows instead of aggregating
+    every capture. Sums and counts are stored (not averages) so hours can
+    be rolled up into days exactly.
+    """
+    rollup_columns = """
+            capture_count INTEGER NOT NULL DEFAULT 0,
+            analyzed_count INTEGER NOT NULL DEFAULT 0,
+            
+            -- Clear sky score
+            score_sum REAL,
+            score_count INTEGER NOT NULL DEFAULT 0,
+            max_score INTEGER,
+            min_score INTEGER,
+            clear_count INTEGER NOT NULL DEFAULT 0,
+            
+            -- Brightness / blue coverage
+            brightness_sum REAL,
+            brightness_count INTEGER NOT NULL DEFAULT 0,
+            blue_coverage_sum REAL,
+            blue_coverage_count INTEGER NOT NULL DEFAULT 0,
+            
+            -- Range
+            first_capture DATETIME,
+            last_capture DATETIME
+    """
+    
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS hourly_summary (
+            hour_start DATETIME PRIMARY KEY,
+            date DATE NOT NULL,
+            {rollup_columns}
+        )
+    """)
+    
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_hourly_date 
+        ON hourly_summary(date)
+    """)
+    
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS daily_summary (
+            date DATE PRIMARY KEY,
+            {rollup_columns}
+        )
+    """)
+    
+    print("✓ Created tables: hourly_summary, daily_summary")
+
+
+def create_data_version_table(cursor):
+    """
+    Create the single-row data_version table
+    
+    Deletes and in-place rewrites don't raise the newest capture_id or
+    analysis_id, so the HTTP ETags (database_operations.get_data_version)
+    also include this counter, bumped by every such write.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            changes INTEGER NOT NULL DEFAULT 0,
+            changed_at DATETIME
+        )
+    """)
+    
+    cursor.execute("""
+        INSERT OR IGNORE INTO data_version (id, changes) VALUES (1, 0)
+    """)
+
+
 def create_sensor_readings_table(cursor):
     """
     Create sensor_readings table (for future use)
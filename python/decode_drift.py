@@ -0,0 +1,178 @@
+"""
+Decode Drift Tool
+Compare analysis results at reduced JPEG decode scales against full decode
+
+Before changing ANALYSIS_DECODE_SCALE, run this over a sample of stored
+images to see how far clear sky scores, brightness and coverage move at
+each scale, and how much decode + analysis time it saves.
+
+Usage:
+    python decode_drift.py                     # 200 most recent captures
+    python decode_drift.py --limit 1000        # More captures
+    python decode_drift.py --dir some/folder   # Every .jpg under a folder
+    python decode_drift.py --scales 2,4        # Only these scales
+"""
+
+import os
+import sys
+import time
+from analysis_core import analyze_image, decode_for_analysis
+
+
+def find_images(directory):
+    """All .jpg files under a directory"""
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(
+            os.path.join(root, name) for name in files
+            if name.lower().endswith(('.jpg', '.jpeg'))
+        )
+    return sorted(paths)
+
+
+def get_recent_image_paths(limit):
+    """Image paths of the most recent captures in the database"""
+    from database_operations import get_recent_captures_with_analysis
+    return [row['image_path'] for row in get_recent_captures_with_analysis(limit)]
+
+
+def analyze_at_scale(image_data, decode_scale):
+    """
+    Decode + analyze once at one scale
+
+    Returns:
+        tuple: (results dict or None, decode seconds, analysis seconds)
+    """
+    t0 = time.perf_counter()
+    image = decode_for_analysis(image_data, decode_scale)
+    t1 = time.perf_counter()
+
+    if image is None:
+        return None, t1 - t0, 0.0
+
+    results = analyze_image(image, decode_scale)
+    return results, t1 - t0, time.perf_counter() - t1
+
+
+def get_metrics(results):
+    """The values compared between scales"""
+    features = results.get('features') or {}
+    return {
+        'score': results.get('clear_sky_score'),
+        'brightness': (results.get('brightness') or {}).get('average'),
+        'blue_coverage': features.get('blue_coverage'),
+        'condition': results.get('sky_condition')
+    }
+
+
+def compare_decode_scales(image_paths, scales=(2, 4, 8)):
+    """
+    Analyze each image at full resolution and at each reduced scale
+
+    Args:
+        image_paths: Images to compare
+        scales: Reduced decode scales to test
+
+    Returns:
+        dict: Per-scale drift and timing summary (scale 1 = full decode)
+    """
+    stats = {
+        scale: {
+            'images': 0, 'score_diffs': [], 'brightness_diffs': [],
+            'blue_diffs': [], 'condition_changes': 0,
+            'decode_time': 0.0, 'analysis_time': 0.0
+        }
+        for scale in (1,) + tuple(scales)
+    }
+
+    for path in image_paths:
+        try:
+            with open(path, 'rb') as f:
+                image_data = f.read()
+        except OSError:
+            continue
+
+        full, decode_time, analysis_time = analyze_at_scale(image_data, 1)
+        if full is None:
+            continue
+
+        reference = get_metrics(full)
+        stats[1]['images'] += 1
+        stats[1]['decode_time'] += decode_time
+        stats[1]['analysis_time'] += analysis_time
+
+        for scale in scales:
+            results, decode_time, analysis_time = analyze_at_scale(image_data, scale)
+            if results is None:
+                continue
+
+            metrics = get_metrics(results)
+            s = stats[scale]
+            s['images'] += 1
+            s['decode_time'] += decode_time
+            s['analysis_time'] += analysis_time
+
+            for key, diffs in (('score', 'score_diffs'), ('brightness', 'brightness_diffs'),
+                               ('blue_coverage', 'blue_diffs')):
+                if metrics[key] is not None and reference[key] is not None:
+                    s[diffs].append(abs(metrics[key] - reference[key]))
+
+            if metrics['condition'] != reference['condition']:
+                s['condition_changes'] += 1
+
+    return {scale: summarize(s, stats[1]) for scale, s in stats.items()}
+
+
+def summarize(s, full):
+    """Reduce raw per-scale stats to averages"""
+    n = s['images']
+
+    def mean(values):
+        return sum(values) / len(values) if values else 0.0
+
+    per_image_ms = (s['decode_time'] + s['analysis_time']) / n * 1000 if n else 0.0
+    full_ms = (full['decode_time'] + full['analysis_time']) / full['images'] * 1000 if full['images'] else 0.0
+
+    return {
+        'images': n,
+        'score_mean_drift': round(mean(s['score_diffs']), 2),
+        'score_max_drift': max(s['score_diffs'], default=0),
+        'brightness_mean_drift': round(mean(s['brightness_diffs']), 2),
+        'blue_coverage_mean_drift': round(mean(s['blue_diffs']), 2),
+        'condition_changed_percent': round(s['condition_changes'] / n * 100, 1) if n else 0.0,
+        'decode_ms': round(s['decode_time'] / n * 1000, 2) if n else 0.0,
+        'total_ms': round(per_image_ms, 2),
+        'speedup': round(full_ms / per_image_ms, 2) if per_image_ms else 0.0
+    }
+
+
+def print_report(report):
+    """Print the comparison as a table"""
+    print("\n" + "="*96)
+    print(f"{'Scale':>6} {'Images':>7} {'Score Δ mean':>13} {'Score Δ max':>12} "
+          f"{'Bright Δ':>9} {'Blue% Δ':>8} {'Cond chg':>9} {'Decode ms':>10} {'Total ms':>9} {'Speedup':>8}")
+    print("-"*96)
+    for scale, r in sorted(report.items()):
+        print(f"{'1/' + str(scale):>6} {r['images']:>7} {r['score_mean_drift']:>13} {r['score_max_drift']:>12} "
+              f"{r['brightness_mean_drift']:>9} {r['blue_coverage_mean_drift']:>8} "
+              f"{r['condition_changed_percent']:>8}% {r['decode_ms']:>10} {r['total_ms']:>9} "
+              f"{r['speedup']:>7}x")
+    print("="*96 + "\n")
+
+
+if __name__ == '__main__':
+    limit = 200
+    if '--limit' in sys.argv:
+        limit = int(sys.argv[sys.argv.index('--limit') + 1])
+
+    scales = (2, 4, 8)
+    if '--scales' in sys.argv:
+        scales = tuple(int(s) for s in sys.argv[sys.argv.index('--scales') + 1].split(','))
+
+    if '--dir' in sys.argv:
+        paths = find_images(sys.argv[sys.argv.index('--dir') + 1])[:limit]
+    else:
+        paths = get_recent_image_paths(limit)
+
+    print(f"Comparing {len(paths)} image(s) at decode scales 1/{', 1/'.join(map(str, scales))}...")
+    print_report(compare_decode_scales(paths, scales))
@@ -0,0 +1,203 @@
+"""
+ESP32 Async HTTP Module
+Keep-alive HTTP/1.1 client for ESP32-CAMs, for use on an asyncio loop
+
+The multi-camera supervisor polls many ESP32s from a single event loop,
+so requests must not block a thread while a slow camera takes its time.
+The ESP32 web server only speaks a small subset of HTTP (GET, one
+request at a time, Content-Length or chunked bodies), which this client
+implements directly on asyncio streams. Retry and backoff behaviour
+follows esp32_http.ESP32Session.
+"""
+
+import asyncio
+import json
+from python_config import (
+    ESP32_HTTP_BACKOFF, ESP32_HTTP_BACKOFF_MAX, ESP32_HTTP_RETRY_STATUSES
+)
+
+
+class ESP32HTTPError(Exception):
+    """Malformed or truncated HTTP response from an ESP32"""
+
+
+class ESP32Response:
+    """Fully-read HTTP response (same attribute names as requests.Response)"""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        """Decode the body as JSON"""
+        return json.loads(self.content)
+
+
+def get_retry_delay(retry_number):
+    """
+    Backoff before a retry: 0s, then ESP32_HTTP_BACKOFF doubling
+
+    Args:
+        retry_number: 1 for the first retry, 2 for the second, ...
+
+    Returns:
+        float: Seconds to wait
+    """
+    if retry_number <= 1:
+        return 0
+    return min(ESP32_HTTP_BACKOFF_MAX, ESP32_HTTP_BACKOFF * 2 ** (retry_number - 1))
+
+
+class AsyncESP32Client:
+    """Single keep-alive connection to one ESP32 host"""
+
+    def __init__(self, host, port=80):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+        # The ESP32 serves one request at a time
+        self._lock = asyncio.Lock()
+
+    async def get(self, path, timeout, max_attempts=1):
+        """
+        GET a path from the ESP32
+
+        Args:
+            path: Request path (e.g. '/status')
+            timeout: Seconds allowed per attempt
+            max_attempts: Total attempts, retried with exponential backoff
+
+        Returns:
+            ESP32Response (the last one if every attempt got a retryable status)
+
+        Raises:
+            asyncio.TimeoutError, OSError, asyncio.IncompleteReadError or
+            ESP32HTTPError once all attempts fail
+        """
+        async with self._lock:
+            for attempt in range(1, max_attempts + 1):
+                if attempt > 1:
+                    await asyncio.sleep(get_retry_delay(attempt - 1))
+
+                try:
+                    resp = await asyncio.wait_for(self._request(path), timeout)
+                except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, ESP32HTTPError):
+                    # IncompleteReadError (an EOFError): closed mid-response
+                    await self._disconnect()
+                    if attempt == max_attempts:
+                        raise
+                    continue
+
+                if resp.status_code in ESP32_HTTP_RETRY_STATUSES and attempt < max_attempts:
+                    continue
+
+                return resp
+
+    async def close(self):
+        """Close the connection"""
+        async with self._lock:
+            await self._disconnect()
+
+    async def _request(self, path):
+        """Send one request, reconnecting once if a kept-alive socket went stale"""
+        reused = self._writer is not None
+
+        try:
+            return await self._send_and_read(path)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+            # The ESP32 closed the idle connection - not a real failure
+            await self._disconnect()
+            return await self._send_and_read(path)
+
+    async def _send_and_read(self, path):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        self._writer.write(
+            f"GET {path} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            f"Connection: keep-alive\r\n"
+            f"\r\n".encode('ascii')
+        )
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before response")
+
+        try:
+            version, status, _ = (status_line.decode('latin-1').split(' ', 2) + [''])[:3]
+            status_code = int(status)
+        except ValueError:
+            raise ESP32HTTPError(f"Bad status line: {status_line!r}")
+
+        headers = await self._read_headers()
+        content, keep_alive = await self._read_body(headers)
+
+        if not keep_alive or version == 'HTTP/1.0' or \
+                headers.get('connection', '').lower() == 'close':
+            await self._disconnect()
+
+        return ESP32Response(status_code, headers, content)
+
+    async def _read_headers(self):
+        """Read header lines up to the blank line (names lower-cased)"""
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            if line in (b'\r\n', b'\n'):
+                return headers
+
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    async def _read_body(self, headers):
+        """
+        Read the response body
+
+        Returns:
+            tuple: (body bytes, whether the connection can be reused)
+        """
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            chunks = []
+            while True:
+                size_line = await self._reader.readline()
+                try:
+                    size = int(size_line.split(b';')[0].strip(), 16)
+                except ValueError:
+                    raise ESP32HTTPError(f"Bad chunk size: {size_line!r}")
+
+                if size == 0:
+                    await self._read_headers()  # Trailers
+                    return b''.join(chunks), True
+
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+
+        if 'content-length' in headers:
+            try:
+                length = int(headers['content-length'])
+            except ValueError:
+                raise ESP32HTTPError(f"Bad Content-Length: {headers['content-length']!r}")
+            return await self._reader.readexactly(length), True
+
+        # No length given - body runs until the ESP32 closes the socket
+        return await self._reader.read(), False
+
+    async def _disconnect(self):
+        writer = self._writer
+        self._reader = self._writer = None
+
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
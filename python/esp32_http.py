@@ -0,0 +1,104 @@
+"""
+ESP32 HTTP Session Module
+Persistent, pooled HTTP connections to one ESP32-CAM
+
+The ESP32 has very little heap and serves one request at a time, so
+opening a fresh TCP connection for every status / list / fetch / delete
+call is expensive for it. ESP32Session keeps connections alive in a small
+per-host pool and applies urllib3 retry policies instead of a hand-rolled
+retry loop.
+"""
+
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from python_config import (
+    ESP32_HTTP_MAX_CONNECTIONS, ESP32_HTTP_BACKOFF, ESP32_HTTP_BACKOFF_MAX,
+    ESP32_HTTP_RETRY_STATUSES
+)
+
+
+def build_retry_policy(max_attempts):
+    """
+    Build a retry policy for ESP32 GET requests
+
+    Args:
+        max_attempts: Total attempts including the first one
+
+    Returns:
+        Retry: urllib3 retry policy
+    """
+    retries = max(0, max_attempts - 1)
+
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        status_forcelist=ESP32_HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        backoff_factor=ESP32_HTTP_BACKOFF,
+        backoff_max=ESP32_HTTP_BACKOFF_MAX,
+        raise_on_status=False  # Return the last response; caller checks status
+    )
+
+
+def get_endpoint_name(url):
+    """
+    Name of the firmware endpoint a URL or path hits (metrics label)
+
+    /queue/<file> and /queue/delete/<file> collapse to one name each so
+    every queued filename does not become its own series.
+    """
+    path = urlsplit(url).path
+    if path.startswith('/queue/delete/'):
+        return 'queue_delete'
+    if path.startswith('/queue/'):
+        return 'queue_file'
+    return path.strip('/').replace('/', '_') or 'root'
+
+
+class ESP32Session:
+    """Keep-alive HTTP session for a single ESP32 host"""
+
+    def __init__(self, max_connections=ESP32_HTTP_MAX_CONNECTIONS):
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+
+        # pool_block: never open more than max_connections sockets to the ESP32
+        self.adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            pool_block=True,
+            max_retries=build_retry_policy(1)
+        )
+        self.session.mount('http://', self.adapter)
+
+        # The ESP32 web server handles one request at a time anyway;
+        # serializing here also lets each call choose its own retry policy
+        self._lock = threading.Lock()
+
+    def get(self, url, timeout, max_attempts=1):
+        """
+        GET a URL over the pooled connection
+
+        Args:
+            url: URL to fetch
+            timeout: Request timeout in seconds (per attempt)
+            max_attempts: Total attempts, retried with exponential backoff
+
+        Returns:
+            requests.Response with the body already read
+
+        Raises:
+            requests.exceptions.RequestException once all attempts fail
+        """
+        with self._lock:
+            self.adapter.max_retries = build_retry_policy(max_attempts)
+            return self.session.get(url, timeout=timeout)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
@@ -16,16 +16,31 @@ ENHANCED FEATURES:
 - Periodic queue rechecks (every 60s) instead of every poll
 - Progress tracking for large queue syncs
 - Prevents memory exhaustion on both ESP32 and Python
+- Pipelined queue sync: fetch, analysis and DB writes overlap
+- Persistent keep-alive connections with urllib3 retry policies
+- Analysis runs in worker processes (analysis_executor)
 """
 
 import time
+import queue
+import threading
 import requests
-import numpy as np
-import cv2
 from datetime import datetime
-from analysis_core import analyze_image, get_analysis_summary
+from analysis_core import get_analysis_summary
+from analysis_executor import analysis_executor
 from data_manager_sqlite import data_manager
-from image_storage import save_image
+from image_storage import save_image_bytes
+from esp32_http import ESP32Session, get_endpoint_name
+from metrics import metrics
+from thumbnails import thumbnail_worker
+from python_config import (
+    QUEUE_SYNC_PIPELINED, QUEUE_SYNC_WORKERS, QUEUE_SYNC_FETCH_DEPTH,
+    QUEUE_SYNC_FETCH_DELAY, DEFAULT_DEVICE_ID
+)
+
+
+# Marks the end of work on a pipeline stage queue
+_STAGE_DONE = object()
 
 
 class ESP32Poller:
@@ -42,6 +57,9 @@ class ESP32Poller:
         self.status_url = f"http://{esp32_ip}:{esp32_port}/status"
         self.queue_url = f"http://{esp32_ip}:{esp32_port}/queue"
         
+        # Pooled keep-alive connection shared by every request to this ESP32
+        self.http = ESP32Session()
+        
         self.total_count = 0
         self.fail_count = 0
         self.queue_synced_count = 0
@@ -62,7 +80,7 @@ class ESP32Poller:
         
         while True:
             try:
-                resp = requests.get(self.status_url, timeout=10)
+                resp = self.http.get(self.status_url, timeout=10)
                 if resp.status_code == 200:
                     data = resp.json()
                     print(f"[Poller] ✓ ESP32 reachable")
@@ -92,7 +110,7 @@ class ESP32Poller:
         
         # Try to re-establish contact
         try:
-            resp = requests.get(self.status_url, timeout=10)
+            resp = self.http.get(self.status_url, timeout=10)
             if resp.status_code == 200:
                 print(f"[Poller] ✓ ESP32 recovered!")
                 self.esp32_healthy = True
@@ -107,58 +125,58 @@ class ESP32Poller:
     
     def fetch_with_retry(self, url, timeout, max_retries=3, operation_name="request"):
         """
-        Fetch URL with retry logic and exponential backoff.
+        Fetch URL over the pooled session with retry and exponential backoff.
+        
+        Retries are handled by the session's urllib3 retry policy; this
+        method only does health bookkeeping and logging.
         
         Args:
             url: URL to fetch
             timeout: Request timeout in seconds
-            max_retries: Maximum retry attempts
+            max_retries: Maximum attempts
             operation_name: Name for logging
         
         Returns:
             Response object or None on failure
         """
-        for attempt in range(1, max_retries + 1):
-            try:
-                resp = requests.get(url, timeout=timeout, stream=True)
-                
-                # Success - reset failure counter
-                self.consecutive_failures = 0
-                self.esp32_healthy = True
-                self.last_successful_contact = time.time()
-                
-                return resp
-                
-            except requests.exceptions.ConnectionError:
-                print(f"[Poller] ✗ Connection refused on {operation_name} (attempt {attempt}/{max_retries})")
-                
-                if attempt < max_retries:
-                    wait = 5 * attempt  # Exponential backoff: 5s, 10s, 15s
-                    print(f"[Poller]   Retrying in {wait}s...")
-                    time.sleep(wait)
-                else:
-                    # All retries failed - ESP32 might be down
-                    self.consecutive_failures += 1
-                    if self.consecutive_failures >= 3:
-                        self.esp32_healthy = False
-                        print(f"[Poller] ⚠️  ESP32 marked unhealthy after {self.consecutive_failures} failures")
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            resp = self.http.get(url, timeout=timeout, max_attempts=max_retries)
+            outcome = 'ok' if resp.status_code == 200 else 'http_error'
             
-            except requests.exceptions.Timeout:
-                print(f"[Poller] ✗ Timeout on {operation_name} (attempt {attempt}/{max_retries})")
-                
-                if attempt < max_retries:
-                    wait = 3 * attempt  # Shorter backoff for timeouts
-                    print(f"[Poller]   Retrying in {wait}s...")
-                    time.sleep(wait)
-                else:
-                    self.consecutive_failures += 1
+            # Success - reset failure counter
+            self.consecutive_failures = 0
+            self.esp32_healthy = True
+            self.last_successful_contact = time.time()
             
-            except Exception as e:
-                print(f"[Poller] ✗ Error on {operation_name}: {e}")
-                if attempt >= max_retries:
-                    self.consecutive_failures += 1
-                    break
-                time.sleep(2)
+            return resp
+        
+        except requests.exceptions.Timeout:
+            outcome = 'timeout'
+            print(f"[Poller] ✗ Timeout on {operation_name} ({max_retries} attempt(s))")
+            self.consecutive_failures += 1
+        
+        except requests.exceptions.ConnectionError:
+            outcome = 'connection_error'
+            print(f"[Poller] ✗ Connection failed on {operation_name} ({max_retries} attempt(s))")
+            
+            # All retries failed - ESP32 might be down
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= 3:
+                self.esp32_healthy = False
+                print(f"[Poller] ⚠️  ESP32 marked unhealthy after {self.consecutive_failures} failures")
+        
+        except Exception as e:
+            print(f"[Poller] ✗ Error on {operation_name}: {e}")
+            self.consecutive_failures += 1
+        
+        finally:
+            endpoint = get_endpoint_name(url)
+            metrics.observe('esp32_request_seconds', time.perf_counter() - start,
+                            device=DEFAULT_DEVICE_ID, endpoint=endpoint)
+            metrics.increment('esp32_requests_total',
+                              device=DEFAULT_DEVICE_ID, endpoint=endpoint, outcome=outcome)
         
         return None
     
@@ -260,6 +278,11 @@ class ESP32Poller:
         batch_size = len(files)
         print(f"\n[Poller] ═══ Queue Batch: {batch_size} image(s) ═══")
         
+        if QUEUE_SYNC_PIPELINED:
+            synced = self.sync_files_pipelined(files)
+            print(f"[Poller] ═══ Batch Complete: {synced}/{batch_size} synced ═══")
+            return synced
+        
         synced = 0
         batch_failures = 0
         
@@ -282,26 +305,27 @@ class ESP32Poller:
                 
                 continue
             
-            # Decode JPEG
+            # Analyze in a worker process (the original bytes are stored)
             try:
-                nparr = np.frombuffer(image_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                analysis_results = analysis_executor.analyze(image_data)
                 
-                if image is None:
+                if analysis_results is None:
                     print(f"[Poller] ✗ Failed to decode {filename}")
                     continue
             except Exception as e:
-                print(f"[Poller] ✗ Decode error: {e}")
+                print(f"[Poller] ✗ Analysis error: {e}")
                 continue
             
-            # Save and analyze with original timestamp
+            # Save with original timestamp
             try:
-                image_path = save_image(image, timestamp)
-                analysis_results = analyze_image(image)
+                image_path = save_image_bytes(image_data, timestamp)
+                thumbnail_worker.submit(image_path)
                 
                 # Mark as from SD in analysis results
                 analysis_results['from_sd'] = True
                 
+                # Committed by the ingest writer thread; waits so the ESP32
+                # copy is only deleted once the capture is stored
                 data_manager.update_latest(timestamp, image_path, analysis_results)
                 data_manager.save_data()
                 
@@ -326,6 +350,130 @@ class ESP32Poller:
         
         return synced
     
+    def sync_files_pipelined(self, files):
+        """
+        Sync a batch of queued files with overlapping stages.
+        
+        Stages (each connected by a bounded queue, so a slow stage
+        applies backpressure to the ones before it):
+          1. Network (this thread) - fetches files one at a time and sends
+             deferred delete acknowledgements between fetches, so the
+             ESP32 still only ever sees one request at a time
+          2. Workers (QUEUE_SYNC_WORKERS threads, or one per analysis
+             process if more) - save, and analyze via analysis_executor
+          3. DB writer - the shared ingest_queue writer thread, which
+             group-commits results and then queues each filename for
+             deletion on the ESP32
+        
+        A file is only deleted from the ESP32 after its DB write succeeded.
+        
+        Args:
+            files: List of queued filenames from fetch_queue_list()
+        
+        Returns:
+            Number of images successfully synced
+        """
+        batch_size = len(files)
+        fetched = queue.Queue(maxsize=QUEUE_SYNC_FETCH_DEPTH)
+        delete_acks = queue.Queue()
+        stats = {'synced': 0}
+        
+        # Each worker thread waits on one analysis process at a time
+        worker_count = max(QUEUE_SYNC_WORKERS, analysis_executor.max_workers)
+        workers = [
+            threading.Thread(
+                target=self._pipeline_worker, args=(fetched, delete_acks, stats), daemon=True
+            )
+            for _ in range(worker_count)
+        ]
+        for thread in workers:
+            thread.start()
+        
+        batch_failures = 0
+        
+        try:
+            for i, filename in enumerate(files, 1):
+                self._send_delete_acks(delete_acks)
+                
+                print(f"[Poller] [{i}/{batch_size}] Fetching: {filename}")
+                image_data, timestamp = self.fetch_queued_image(filename)
+                
+                if not image_data or not timestamp:
+                    print(f"[Poller] ✗ Failed to fetch {filename}")
+                    batch_failures += 1
+                    
+                    if batch_failures >= 5:
+                        print(f"[Poller] ⚠️  Too many failures in batch, pausing...")
+                        if not self.wait_for_esp32_recovery(20):
+                            print(f"[Poller] Aborting batch")
+                            break
+                        batch_failures = 0
+                    continue
+                
+                # Blocks while workers are behind (backpressure)
+                fetched.put((filename, image_data, timestamp))
+                
+                if QUEUE_SYNC_FETCH_DELAY > 0:
+                    time.sleep(QUEUE_SYNC_FETCH_DELAY)
+        finally:
+            # Drain the pipeline: workers first, then the DB writer
+            for _ in workers:
+                fetched.put(_STAGE_DONE)
+            for thread in workers:
+                thread.join()
+            
+            data_manager.flush()
+        
+        self._send_delete_acks(delete_acks)
+        
+        return stats['synced']
+    
+    def _pipeline_worker(self, fetched, delete_acks, stats):
+        """Pipeline stage 2: save and analyze fetched images"""
+        while True:
+            item = fetched.get()
+            if item is _STAGE_DONE:
+                return
+            
+            filename, image_data, timestamp = item
+            
+            try:
+                analysis_results = analysis_executor.analyze(image_data)
+                
+                if analysis_results is None:
+                    print(f"[Poller] ✗ Failed to decode {filename}")
+                    continue
+                
+                image_path = save_image_bytes(image_data, timestamp)
+                thumbnail_worker.submit(image_path)
+                analysis_results['from_sd'] = True
+            except Exception as e:
+                print(f"[Poller] ✗ Processing error on {filename}: {e}")
+                continue
+            
+            def on_commit(capture_id, filename=filename, analysis_results=analysis_results):
+                # Runs on the ingest writer thread
+                print(f"[Poller] ✓ Processed {filename}")
+                print(f"[Poller]   {get_analysis_summary(analysis_results)}")
+                stats['synced'] += 1
+                delete_acks.put(filename)
+            
+            # Blocks while the DB writer is behind (backpressure)
+            data_manager.submit_capture(timestamp, image_path, analysis_results, on_commit)
+    
+    def _send_delete_acks(self, delete_acks):
+        """Delete every file the DB writer has confirmed so far"""
+        while True:
+            try:
+                filename = delete_acks.get_nowait()
+            except queue.Empty:
+                return
+            
+            if self.delete_queued_image(filename):
+                print(f"[Poller] ✓ Deleted {filename} from ESP32")
+            else:
+                print(f"[Poller] ⚠ Delete failed for {filename} (file may remain)")
+    
     def sync_all_queued_images(self):
         """
         Sync ALL queued images in batches of 200.
@@ -415,19 +563,18 @@ class ESP32Poller:
                 image_data = resp.content
                 print(f"[Poller] ✓ Received {len(image_data)} bytes")
                 
-                # Decode JPEG
-                nparr = np.frombuffer(image_data, np.uint8)
-                image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+                # Analyze in a worker process (the original bytes are stored)
+                analysis_results = analysis_executor.analyze(image_data)
                 
-                if image is not None:
-                    image_path = save_image(image, timestamp)
-                    analysis_results = analyze_image(image)
+                if analysis_results is not None:
+                    image_path = save_image_bytes(image_data, timestamp)
+                    thumbnail_worker.submit(image_path)
                     
                     # Mark as live capture
                     analysis_results['from_sd'] = False
                     
-                    data_manager.update_latest(timestamp, image_path, analysis_results)
-                    data_manager.save_data()
+                    # Written by the ingest queue's writer thread
+                    data_manager.submit_capture(timestamp, image_path, analysis_results)
                     print(f"[Poller] {get_analysis_summary(analysis_results)}")
                     return True
                 else:
@@ -0,0 +1,541 @@
+"""
+ESP32 Simulator Module
+Local stand-in for ESP32-CAMs, for load testing the poller and supervisor
+
+Serves the firmware's HTTP contract (esp32_image_server/server_module.ino):
+
+    GET /status                 JSON: ip, uptime, captures, lastCaptureMs, freeHeap,
+                                wifi_rssi, sd_available, sd_queue_count, sd_usage_percent
+    GET /capture                image/jpeg, or 500 "Camera capture failed"
+    GET /queue                  JSON array of queued filenames (oldest first)
+    GET /queue/<file>           image/jpeg, 400 "Invalid filename" or 404
+    GET /queue/delete/<file>    {"deleted": true|false}
+
+Images are synthetic skies from benchmarks.corpus or JPEGs recorded from a
+real camera (any directory, e.g. captured_images/). Latency, bandwidth,
+failure injection and the SD queue size are set per simulator, and each
+simulator is its own ThreadingHTTPServer on its own port, so one process
+can stand in for a whole fleet of cameras.
+
+Like the real WebServer, a simulator answers one request at a time unless
+it is created with serialize=False - useful to find where the poller,
+rather than the camera, becomes the bottleneck.
+
+Usage:
+    python esp32_simulator.py                                  # One camera on port 8080
+    python esp32_simulator.py --count 8 --port 8080 --queue 500
+    python esp32_simulator.py --latency 0.2 --jitter 0.1 --bandwidth 100000
+    python esp32_simulator.py --failure-rate 0.05 --failure-modes error,drop
+    python esp32_simulator.py --images captured_images --resolution 1600x1200
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The firmware stops listing once it has collected more than 200 files
+QUEUE_LIST_LIMIT = 201
+
+# Bandwidth throttling sends the body in slices of this many seconds
+THROTTLE_SLICE = 0.05
+
+FAILURE_MODES = ('error', 'drop', 'stall')
+
+# Spacing of the timestamps given to pre-filled queue files (the firmware's
+# auto-capture interval while the poller is away)
+QUEUE_CAPTURE_INTERVAL = 300
+
+
+# ========================================
+# IMAGE SOURCES
+# ========================================
+
+def generate_synthetic_images(width=800, height=600, count=8, quality=85):
+    """
+    JPEG-encoded synthetic skies (see benchmarks.corpus)
+
+    Args:
+        width, height: Frame size
+        count: Distinct frames (conditions cycle, each with its own seed)
+        quality: JPEG quality
+
+    Returns:
+        list: JPEG bytes
+    """
+    import cv2
+    from benchmarks.corpus import CONDITIONS, CORPUS_SEED, generate_sky
+
+    images = []
+    for i in range(count):
+        image = generate_sky(CONDITIONS[i % len(CONDITIONS)], width, height, CORPUS_SEED + i)
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError(f"Could not encode synthetic frame {i}")
+        images.append(encoded.tobytes())
+    return images
+
+
+def load_recorded_images(directory, limit=200):
+    """
+    Read recorded JPEGs from a directory tree (date shards included)
+
+    Args:
+        directory: Folder to search
+        limit: Most files to load into memory
+
+    Returns:
+        list: JPEG bytes, in filename order
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files
+                     if name.lower().endswith(('.jpg', '.jpeg')))
+
+    images = []
+    for path in sorted(paths)[:limit]:
+        with open(path, 'rb') as f:
+            images.append(f.read())
+
+    if not images:
+        raise ValueError(f"No JPEG files found in {directory}")
+    return images
+
+
+# ========================================
+# SIMULATED CAMERA
+# ========================================
+
+class ESP32Simulator:
+    """One simulated ESP32-CAM on its own port"""
+
+    def __init__(self, images, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 bandwidth=None, failure_rate=0.0, failure_modes=('error',),
+                 stall_seconds=30.0, queue_size=0, sd_available=True,
+                 serialize=True, seed=None):
+        """
+        Args:
+            images: JPEG bytes to serve (cycled)
+            host, port: Address to listen on (port 0 = any free port)
+            latency: Seconds added before every response
+            jitter: Extra random delay, 0..jitter seconds
+            bandwidth: Body throughput in bytes/second (None = unthrottled)
+            failure_rate: Probability (0-1) a request fails
+            failure_modes: How failures look - 'error' (HTTP 500), 'drop'
+                           (connection closed without a response) or 'stall'
+                           (no response for stall_seconds, to trip client timeouts)
+            stall_seconds: How long a 'stall' failure hangs
+            queue_size: Images waiting on the simulated SD card at start
+            sd_available: False answers /queue with 503, like a missing card
+            serialize: Handle one request at a time, like the firmware
+            seed: Random seed for latency and failures (None = random)
+        """
+        if not images:
+            raise ValueError("ESP32Simulator needs at least one image")
+        unknown = set(failure_modes) - set(FAILURE_MODES)
+        if unknown:
+            raise ValueError(f"Unknown failure mode(s): {', '.join(sorted(unknown))}")
+
+        self.images = list(images)
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.failure_modes = tuple(failure_modes)
+        self.stall_seconds = stall_seconds
+        self.sd_available = sd_available
+        self.serialize = serialize
+
+        self._random = random.Random(seed)
+        self._state_lock = threading.Lock()
+        self._request_lock = threading.Lock()
+
+        # filename -> index into self.images
+        self._queue = {}
+        self._next_image = 0
+        self.fill_queue(queue_size)
+
+        self.captures = 0
+        self.last_capture_ms = 0
+        self.started_at = None
+        self.stats = {
+            'requests': {},
+            'bytes_sent': 0,
+            'failures': {mode: 0 for mode in FAILURE_MODES},
+            'deleted': 0
+        }
+
+        self.server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        """Serve in a background thread"""
+        if self._thread is None:
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self.server.serve_forever,
+                                            name=f"esp32-sim-{self.port}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the listening socket"""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    # ---- SD queue ----
+
+    def fill_queue(self, count, newest=None):
+        """
+        Add images to the simulated SD queue
+
+        Args:
+            count: Files to add
+            newest: Timestamp of the newest one (default: now); the rest are
+                    spaced QUEUE_CAPTURE_INTERVAL apart before it
+        """
+        newest = newest or datetime.now()
+        with self._state_lock:
+            added = 0
+            offset = 0
+            while added < count:
+                taken = newest - timedelta(seconds=QUEUE_CAPTURE_INTERVAL * offset)
+                filename = taken.strftime("%Y%m%d_%H%M%S") + ".jpg"
+                offset += 1
+                if filename in self._queue:
+                    continue
+                self._queue[filename] = self._next_image % len(self.images)
+                self._next_image += 1
+                added += 1
+
+    def queue_count(self):
+        with self._state_lock:
+            return len(self._queue)
+
+    # ---- Stats ----
+
+    def get_stats(self):
+        """Request counts per endpoint, bytes sent, injected failures and queue size"""
+        with self._state_lock:
+            return {
+                'port': self.port,
+                'captures': self.captures,
+                'queue_count': len(self._queue),
+                'requests': dict(self.stats['requests']),
+                'bytes_sent': self.stats['bytes_sent'],
+                'failures': dict(self.stats['failures']),
+                'deleted': self.stats['deleted']
+            }
+
+    def _count(self, key, field='requests', amount=1):
+        with self._state_lock:
+            if isinstance(self.stats[field], dict):
+                self.stats[field][key] = self.stats[field].get(key, 0) + amount
+            else:
+                self.stats[field] += amount
+
+    # ---- Request handling ----
+
+    def _make_handler(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the connections ESP32Session / ESP32AsyncSession reuse
+            protocol_version = 'HTTP/1.1'
+            server_version = 'ESP32SIM/1.0'
+            # Headers and body are separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if simulator.serialize:
+                    with simulator._request_lock:
+                        simulator._handle(self)
+                else:
+                    simulator._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _handle(self, request):
+        path = request.path.split('?', 1)[0]
+        endpoint = self._endpoint_name(path)
+        self._count(endpoint)
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if endpoint != 'not_found' and self.failure_rate and \
+                self._random.random() < self.failure_rate:
+            self._fail(request, endpoint)
+            return
+
+        if endpoint == 'status':
+            self._send_json(request, 200, self._status())
+        elif endpoint == 'capture':
+            self._capture(request)
+        elif endpoint == 'queue_list':
+            self._queue_list(request)
+        elif endpoint == 'queue_delete':
+            self._queue_delete(request, path[len('/queue/delete/'):])
+        elif endpoint == 'queue_file':
+            self._queue_file(request, path[len('/queue/'):])
+        else:
+            self._send(request, 404, 'text/plain', b'Not Found')
+
+    @staticmethod
+    def _endpoint_name(path):
+        if path == '/status':
+            return 'status'
+        if path == '/capture':
+            return 'capture'
+        if path == '/queue':
+            return 'queue_list'
+        if path.startswith('/queue/delete/'):
+            return 'queue_delete'
+        if path.startswith('/queue/') and len(path) > len('/queue/'):
+            return 'queue_file'
+        return 'not_found'
+
+    def _fail(self, request, endpoint):
+        mode = self._random.choice(self.failure_modes)
+        self._count(mode, 'failures')
+
+        if mode == 'stall':
+            time.sleep(self.stall_seconds)
+        if mode in ('drop', 'stall'):
+            # Nothing written: the client sees the connection close (or time out)
+            request.close_connection = True
+            return
+
+        message = b'Camera capture failed' if endpoint == 'capture' else b'Simulated failure'
+        self._send(request, 500, 'text/plain', message)
+
+    def _status(self):
+        with self._state_lock:
+            status = {
+                'ip': self.host,
+                'uptime': int(time.time() - (self.started_at or time.time())),
+                'captures': self.captures,
+                'lastCaptureMs': self.last_capture_ms,
+                'freeHeap': 180000 + self._random.randint(-8000, 8000),
+                'wifi_rssi': -60 + self._random.randint(-8, 8),
+                'sd_available': self.sd_available
+            }
+            if self.sd_available:
+                status['sd_queue_count'] = len(self._queue)
+                status['sd_usage_percent'] = min(100, len(self._queue) // 50)
+        return status
+
+    def _capture(self, request):
+        start = time.time()
+        with self._state_lock:
+            image = self.images[self._next_image % len(self.images)]
+            self._next_image += 1
+            self.captures += 1
+        self._send(request, 200, 'image/jpeg', image)
+        with self._state_lock:
+            self.last_capture_ms = int((time.time() - start) * 1000)
+
+    def _queue_unavailable(self, request):
+        if self.sd_available:
+            return False
+        self._send_json(request, 503, {'error': 'SD card not available'})
+        return True
+
+    def _queue_list(self, request):
+        if self._queue_unavailable(request):
+            return
+        with self._state_lock:
+            files = sorted(self._queue)[:QUEUE_LIST_LIMIT]
+        self._send_json(request, 200, files)
+
+    def _queue_file(self, request, filename):
+        if self._queue_unavailable(request):
+            return
+        if '/' in filename or '\\' in filename:
+            self._send(request, 400, 'text/plain', b'Invalid filename')
+            return
+
+        with self._state_lock:
+            index = self._queue.get(filename)
+        if index is None:
+            self._send(request, 404, 'text/plain', b'Image not found on SD card')
+            return
+        self._send(request, 200, 'image/jpeg', self.images[index])
+
+    def _queue_delete(self, request, filename):
+        if self._queue_unavailable(request):
+            return
+        if '/' in filename or '\\' in filename:
+            self._send_json(request, 400, {'error': 'Invalid filename'})
+            return
+
+        with self._state_lock:
+            deleted = self._queue.pop(filename, None) is not None
+            if deleted:
+                self.stats['deleted'] += 1
+        self._send_json(request, 200, {'deleted': deleted})
+
+    def _send_json(self, request, status, payload):
+        self._send(request, status, 'application/json', json.dumps(payload).encode('utf-8'))
+
+    def _send(self, request, status, content_type, body):
+        """Write a response, throttling the body to self.bandwidth"""
+        try:
+            request.send_response(status)
+            request.send_header('Content-Type', content_type)
+            request.send_header('Content-Length', str(len(body)))
+            request.end_headers()
+
+            if not self.bandwidth:
+                request.wfile.write(body)
+            else:
+                slice_size = max(1, int(self.bandwidth * THROTTLE_SLICE))
+                for offset in range(0, len(body), slice_size):
+                    chunk = body[offset:offset + slice_size]
+                    request.wfile.write(chunk)
+                    request.wfile.flush()
+                    time.sleep(len(chunk) / self.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client gave up (timeout) mid-response
+            request.close_connection = True
+            return
+
+        self._count(None, 'bytes_sent', len(body))
+
+
+# ========================================
+# FLEET
+# ========================================
+
+class SimulatorFleet:
+    """Several simulated cameras in one process, on consecutive ports"""
+
+    def __init__(self, count, base_port=8080, host='127.0.0.1', images=None, **options):
+        """
+        Args:
+            count: Number of cameras
+            base_port: Port of the first camera (0 = any free ports)
+            host: Address to listen on
+            images: JPEG bytes shared by all cameras (default: synthetic 800x600)
+            **options: Passed to every ESP32Simulator (latency, queue_size, ...)
+        """
+        images = images or generate_synthetic_images()
+        seed = options.pop('seed', None)
+
+        self.simulators = []
+        try:
+            for i in range(count):
+                port = base_port + i if base_port else 0
+                self.simulators.append(ESP32Simulator(
+                    images, host=host, port=port,
+                    seed=None if seed is None else seed + i, **options
+                ))
+        except OSError:
+            self.stop()
+            raise
+
+    def start(self):
+        for simulator in self.simulators:
+            simulator.start()
+        return self
+
+    def stop(self):
+        for simulator in self.simulators:
+            simulator.stop()
+
+    def get_cameras(self, poll_interval=300, request_timeout=25, prefix='sim'):
+        """CAMERAS entries (python_config format) pointing at the simulators"""
+        return [
+            {
+                "device_id": f"{prefix}-{i + 1:02d}",
+                "ip": simulator.host,
+                "port": simulator.port,
+                "poll_interval": poll_interval,
+                "request_timeout": request_timeout
+            }
+            for i, simulator in enumerate(self.simulators)
+        ]
+
+    def get_stats(self):
+        return [simulator.get_stats() for simulator in self.simulators]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import sys
+
+    def get_option(name, default=None):
+        if name in sys.argv:
+            return sys.argv[sys.argv.index(name) + 1]
+        return default
+
+    bandwidth = get_option('--bandwidth')
+    width, height = (int(v) for v in get_option('--resolution', '800x600').split('x'))
+
+    if get_option('--images'):
+        images = load_recorded_images(get_option('--images'))
+    else:
+        images = generate_synthetic_images(width, height)
+
+    fleet = SimulatorFleet(
+        int(get_option('--count', 1)),
+        base_port=int(get_option('--port', 8080)),
+        host=get_option('--host', '127.0.0.1'),
+        images=images,
+        latency=float(get_option('--latency', 0.0)),
+        jitter=float(get_option('--jitter', 0.0)),
+        bandwidth=float(bandwidth) if bandwidth else None,
+        failure_rate=float(get_option('--failure-rate', 0.0)),
+        failure_modes=get_option('--failure-modes', 'error').split(','),
+        stall_seconds=float(get_option('--stall', 30.0)),
+        queue_size=int(get_option('--queue', 0)),
+        sd_available='--no-sd' not in sys.argv,
+        serialize='--concurrent' not in sys.argv
+    )
+    fleet.start()
+
+    average_kb = sum(len(image) for image in images) / len(images) / 1024
+    print(f"[Simulator] {len(fleet.simulators)} camera(s), {len(images)} image(s) "
+          f"(~{average_kb:.0f} KB each)")
+    print("[Simulator] CAMERAS = [")
+    for camera in fleet.get_cameras():
+        print(f"    {camera},")
+    print("]")
+
+    try:
+        previous = 0
+        while True:
+            time.sleep(10)
+            stats = fleet.get_stats()
+            total = sum(sum(s['requests'].values()) for s in stats)
+            failures = sum(sum(s['failures'].values()) for s in stats)
+            queued = sum(s['queue_count'] for s in stats)
+            print(f"[Simulator] {(total - previous) / 10:.1f} req/s, {total} total, "
+                  f"{failures} injected failure(s), {queued} queued")
+            previous = total
+    except KeyboardInterrupt:
+        print("\n[Simulator] Stopping...")
+        fleet.stop()
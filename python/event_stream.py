@@ -0,0 +1,109 @@
+"""
+Event Stream Module
+Server-Sent Events push channel for new captures
+
+The ingest path publishes an event whenever a capture is committed and
+every open dashboard subscribed to /api/events is told to refresh,
+instead of each tab polling /api/latest every few seconds.
+
+Events are coalesced per subscriber: if several captures land before a
+client's stream gets to run (e.g. during an SD queue backfill), that
+client receives a single event carrying the newest payload.
+"""
+
+import json
+import threading
+import time
+from python_config import SSE_HEARTBEAT_SECONDS, SSE_MAX_CLIENTS
+
+
+class Subscriber:
+    """One connected event-stream client"""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.event = None
+        self.payload = None
+
+    def offer(self, event, payload):
+        """Replace any undelivered event with this one and wake the stream"""
+        self.event = event
+        self.payload = payload
+        self.ready.set()
+
+
+class EventBroadcaster:
+    """Thread-safe fan-out of events to all connected subscribers"""
+
+    def __init__(self, max_clients=SSE_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self.subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self):
+        """
+        Register a new client
+
+        Returns:
+            Subscriber, or None if the client limit has been reached
+        """
+        with self._lock:
+            if len(self.subscribers) >= self.max_clients:
+                return None
+            subscriber = Subscriber()
+            self.subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        """Remove a disconnected client"""
+        with self._lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event, payload):
+        """
+        Send an event to every subscriber
+
+        Args:
+            event: SSE event name (e.g. 'capture')
+            payload: JSON-serializable data
+        """
+        with self._lock:
+            subscribers = list(self.subscribers)
+
+        for subscriber in subscribers:
+            subscriber.offer(event, payload)
+
+    def client_count(self):
+        """Number of connected clients"""
+        with self._lock:
+            return len(self.subscribers)
+
+    def stream(self, subscriber):
+        """
+        Generate the text/event-stream body for one subscriber
+
+        Sends a comment line every SSE_HEARTBEAT_SECONDS so proxies and
+        Waitress' channel timeout do not close an idle stream.
+        """
+        try:
+            # Reconnect delay hint for the browser, in milliseconds
+            yield f"retry: {SSE_HEARTBEAT_SECONDS * 1000}\n\n"
+
+            while True:
+                if subscriber.ready.wait(SSE_HEARTBEAT_SECONDS):
+                    subscriber.ready.clear()
+                    data = json.dumps(subscriber.payload)
+                    yield f"event: {subscriber.event}\ndata: {data}\n\n"
+                else:
+                    yield f": heartbeat {int(time.time())}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+# Global instance
+event_broadcaster = EventBroadcaster()
+
+
+def publish_capture(capture_id):
+    """Announce that a capture has been stored"""
+    event_broadcaster.publish('capture', {'capture_id': capture_id})
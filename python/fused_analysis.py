@@ -0,0 +1,111 @@
+"""
+Fused Analysis Module
+Single-pass kernel that feeds brightness, color and sky feature analysis
+
+The separate analyzers each walk the whole frame (cvtColor + mean,
+per-channel mean, sampled classification). This kernel walks the frame
+once in horizontal strips small enough to stay in CPU cache and gathers
+every statistic the three analyzers need from each strip while it is hot.
+The result dicts are then built with the analyzers' own builders, so keys
+and values are identical to the separate path.
+"""
+
+import cv2
+import numpy as np
+from python_config import (
+    ENABLE_BRIGHTNESS_ANALYSIS, ENABLE_COLOR_ANALYSIS, ENABLE_SKY_FEATURES,
+    SKY_SAMPLE_RATE, FUSED_ANALYSIS_STRIP_ROWS
+)
+from brightness_analysis import build_brightness_result
+from color_analysis import build_color_result
+from sky_features import classify_pixel_masks, build_sky_features_result
+
+
+def analyze_image_fused(image, sample_rate=SKY_SAMPLE_RATE):
+    """
+    Run all enabled analyzers in one pass over the image
+
+    Args:
+        image: OpenCV image (BGR format)
+        sample_rate: Sky features sample rate (default SKY_SAMPLE_RATE)
+
+    Returns:
+        dict: 'brightness', 'color' and 'features' results, each present
+              only if the matching ENABLE_* flag is set
+    """
+    stats = accumulate_image_stats(image, sample_rate)
+    pixel_total = stats['pixel_total']
+
+    results = {}
+
+    if ENABLE_BRIGHTNESS_ANALYSIS:
+        results["brightness"] = build_brightness_result(
+            stats['gray_sum'] / pixel_total
+        )
+
+    if ENABLE_COLOR_ANALYSIS:
+        b_sum, g_sum, r_sum = stats['channel_sums']
+        results["color"] = build_color_result(
+            r_sum / pixel_total,
+            g_sum / pixel_total,
+            b_sum / pixel_total
+        )
+
+    if ENABLE_SKY_FEATURES:
+        results["features"] = build_sky_features_result(stats['pixel_counts'])
+
+    return results
+
+
+def accumulate_image_stats(image, sample_rate=SKY_SAMPLE_RATE):
+    """
+    Gather channel sums, grayscale sum and sky pixel counts in one pass
+
+    Args:
+        image: OpenCV image (BGR format)
+        sample_rate: Sample every Nth pixel for sky classification
+
+    Returns:
+        dict: {
+            'pixel_total': int,
+            'gray_sum': float,
+            'channel_sums': (b, g, r) floats,
+            'pixel_counts': dict in count_sky_pixels() format
+        }
+    """
+    height, width = image.shape[:2]
+
+    gray_sum = 0.0
+    b_sum = g_sum = r_sum = 0.0
+    counts = {'blue': 0, 'gray': 0, 'white': 0, 'total': 0}
+
+    for start in range(0, height, FUSED_ANALYSIS_STRIP_ROWS):
+        strip = image[start:start + FUSED_ANALYSIS_STRIP_ROWS]
+
+        if ENABLE_BRIGHTNESS_ANALYSIS:
+            gray = cv2.cvtColor(strip, cv2.COLOR_BGR2GRAY)
+            gray_sum += cv2.sumElems(gray)[0]
+
+        if ENABLE_COLOR_ANALYSIS:
+            strip_b, strip_g, strip_r, _ = cv2.sumElems(strip)
+            b_sum += strip_b
+            g_sum += strip_g
+            r_sum += strip_r
+
+        if ENABLE_SKY_FEATURES:
+            # Keep the sample grid aligned to the whole frame, not the strip
+            first_row = (-start) % sample_rate
+            sampled = strip[first_row::sample_rate, ::sample_rate]
+            masks = classify_pixel_masks(sampled)
+
+            counts['blue'] += int(np.count_nonzero(masks['blue']))
+            counts['gray'] += int(np.count_nonzero(masks['gray']))
+            counts['white'] += int(np.count_nonzero(masks['white']))
+            counts['total'] += int(sampled.shape[0] * sampled.shape[1])
+
+    return {
+        'pixel_total': height * width,
+        'gray_sum': gray_sum,
+        'channel_sums': (b_sum, g_sum, r_sum),
+        'pixel_counts': counts
+    }
@@ -17,9 +17,29 @@ def signal_handler(sig, frame):
     print("\n\n" + "="*60)
     print("Server shutting down...")
     print("="*60)
+    
+    shutdown_services()
+    
     sys.exit(0)
 
 
+def shutdown_services():
+    """Stop polling cameras, flush pending captures and release connections"""
+    from camera_supervisor import camera_supervisor
+    from analysis_executor import analysis_executor
+    from reanalysis import reanalysis_job
+    from retention import retention_engine
+    from ingest_queue import ingest_writer
+    from database_operations import close_all_connections
+    
+    camera_supervisor.stop()
+    reanalysis_job.cancel()
+    retention_engine.stop()
+    analysis_executor.shutdown()
+    ingest_writer.shutdown()
+    close_all_connections()
+
+
 def print_shutdown_message():
     """Print shutdown completion message"""
     print("\n\n" + "="*60)
@@ -0,0 +1,99 @@
+"""
+HTTP Cache Module
+ETag / Last-Modified validation for JSON APIs and image routes
+
+The dashboard polls /api/latest far more often than new captures arrive.
+Every response here carries an ETag derived from the newest capture_id
+and analysis_id plus a counter bumped by deletes and rewrites, so a repeat request for unchanged data is answered with
+an empty 304 Not Modified instead of re-running queries and re-sending
+the body.
+"""
+
+from datetime import datetime, timezone
+from flask import request, make_response
+from database_operations import get_data_version
+
+
+def get_data_etag(prefix):
+    """
+    Build an ETag + Last-Modified pair for the current database contents
+
+    Args:
+        prefix: Distinguishes endpoints (and their query arguments)
+
+    Returns:
+        tuple: (etag string, last-modified datetime or None)
+    """
+    version = get_data_version()
+    etag = f"{prefix}-c{version['capture_id']}-a{version['analysis_id']}-d{version['changes']}"
+    return etag, parse_db_utc(version['changed_at'])
+
+
+def parse_db_utc(value):
+    """Parse an SQLite CURRENT_TIMESTAMP string (UTC) into an aware datetime"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except (ValueError, TypeError):
+        return None
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Check the request's validators against the current ETag / date
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+
+    return False
+
+
+def not_modified_response(etag, last_modified=None):
+    """Empty 304 response carrying the validators"""
+    response = make_response('', 304)
+    apply_validators(response, etag, last_modified)
+    return response
+
+
+def apply_validators(response, etag, last_modified=None):
+    """
+    Attach ETag / Last-Modified and require revalidation on every use
+
+    Returns:
+        The same response, for chaining
+    """
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def cached_json(prefix, build_response):
+    """
+    Serve a JSON endpoint with conditional-request support
+
+    Args:
+        prefix: ETag prefix for this endpoint (include relevant query args)
+        build_response: Callable returning the full response when data changed
+
+    Returns:
+        304 response if the client is up to date, otherwise build_response()
+        with validators attached
+    """
+    etag, last_modified = get_data_etag(prefix)
+
+    if is_not_modified(etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    response = make_response(build_response())
+    if response.status_code != 200:
+        return response  # Never cache errors
+
+    return apply_validators(response, etag, last_modified)
@@ -1,17 +1,36 @@
 """
 Image Storage Module
 Handles saving and loading of captured images
+
+Images are stored in date shards, IMAGE_DIR/[device_id/]YYYY/MM/DD/,
+so no directory holds more than one day of captures. The shard is
+derived from the capture timestamp, which means an image can be found
+from its timestamp or filename without a database lookup. Images whose
+filename carries no parseable timestamp (sky_NORTS_*) and archives that
+have not been migrated yet (see migrate_image_layout.py) live directly
+in the camera's base directory, which every lookup also checks.
 """
 
 import os
+import re
+import tempfile
 import cv2
+import numpy as np
 from datetime import datetime
 from python_config import (
     SAVE_IMAGES, IMAGE_DIR, IMAGE_NAME_FORMAT, IMAGE_FORMAT,
-    ENABLE_IMAGE_COMPRESSION, COMPRESSION_QUALITY
+    ENABLE_IMAGE_COMPRESSION, COMPRESSION_QUALITY, DEFAULT_DEVICE_ID,
+    IMAGE_SHARD_BY_DATE
 )
+from metrics import metrics
+
+# YYYYMMDD_HHMMSS anywhere in a timestamp string or filename
+TIMESTAMP_DATE_PATTERN = re.compile(r'(\d{4})(\d{2})(\d{2})_\d{6}')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
 
 
+@metrics.timed('stage_seconds', stage='disk_write')
 def save_image(image, timestamp=None):
     """
     Save image to disk
@@ -32,10 +51,49 @@ def save_image(image, timestamp=None):
         timestamp = generate_timestamp()
     
     filepath = generate_image_path(timestamp)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
     
     return write_image_to_disk(image, filepath)
 
 
+@metrics.timed('stage_seconds', stage='disk_write')
+def save_image_bytes(image_data, timestamp=None, device_id=None):
+    """
+    Save already-encoded JPEG bytes to disk without re-encoding
+    
+    Used for images received from the ESP32, so the stored file is the
+    camera's original JPEG rather than a second-generation re-encode.
+    
+    Args:
+        image_data: Encoded JPEG bytes
+        timestamp: Optional timestamp string
+        device_id: Camera that took the image (default camera if None)
+    
+    Returns:
+        str: Path to saved image, or None if saving disabled/failed
+    """
+    if not SAVE_IMAGES:
+        return None
+    
+    ensure_image_directory()
+    
+    if timestamp is None:
+        timestamp = generate_timestamp()
+    
+    filepath = generate_image_path(timestamp, device_id)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    
+    if ENABLE_IMAGE_COMPRESSION:
+        # Re-compression was explicitly requested - decode and re-encode
+        image = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            print(f"Error saving image: could not decode {len(image_data)} bytes")
+            return None
+        return write_image_to_disk(image, filepath)
+    
+    return write_bytes_to_disk(image_data, filepath)
+
+
 def ensure_image_directory():
     """Create image directory if it doesn't exist"""
     if not os.path.exists(IMAGE_DIR):
@@ -56,12 +114,18 @@ def generate_timestamp():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 
-def generate_image_path(timestamp):
+def generate_image_path(timestamp, device_id=None):
     """
     Generate full path for image file
     
+    The default camera's images live under IMAGE_DIR (as before
+    multi-camera support); other cameras get a subdirectory named after
+    their device id so simultaneous captures cannot collide. Within that,
+    images go into a YYYY/MM/DD shard when IMAGE_SHARD_BY_DATE is set.
+    
     Args:
         timestamp: Timestamp string
+        device_id: Camera that took the image (default camera if None)
     
     Returns:
         str: Full file path
@@ -70,7 +134,223 @@ def generate_image_path(timestamp):
         timestamp=timestamp,
         format=IMAGE_FORMAT
     )
-    return os.path.join(IMAGE_DIR, filename)
+    return get_sharded_path(filename, device_id)
+
+
+def get_device_image_dir(device_id=None):
+    """
+    Base image directory of a camera
+    
+    Args:
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        str: IMAGE_DIR for the default camera, IMAGE_DIR/<device_id> otherwise
+    """
+    if device_id and device_id != DEFAULT_DEVICE_ID:
+        return os.path.join(IMAGE_DIR, device_id)
+    return IMAGE_DIR
+
+
+def get_date_parts(name):
+    """
+    Extract the capture date from a timestamp or filename
+    
+    Args:
+        name: YYYYMMDD_HHMMSS timestamp, or a filename containing one
+    
+    Returns:
+        tuple: (YYYY, MM, DD) strings, or None if there is no valid date
+    """
+    match = TIMESTAMP_DATE_PATTERN.search(name)
+    if not match:
+        return None
+    
+    try:
+        datetime(*(int(part) for part in match.groups()))
+    except ValueError:
+        return None
+    
+    return match.groups()
+
+
+def get_date_directory(date_key, device_id=None):
+    """
+    Shard directory holding one day of a camera's images
+    
+    Args:
+        date_key: YYYYMMDD
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        str: IMAGE_DIR/[device_id/]YYYY/MM/DD
+    """
+    return os.path.join(get_device_image_dir(device_id), date_key[:4], date_key[4:6], date_key[6:8])
+
+
+def get_sharded_path(filename, device_id=None):
+    """
+    Path an image with this filename is stored at
+    
+    Args:
+        filename: Image filename (sky_YYYYMMDD_HHMMSS.jpg)
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        str: Path inside the date shard, or in the camera's base
+             directory if sharding is off or the name has no date
+    """
+    base = get_device_image_dir(device_id)
+    parts = get_date_parts(filename) if IMAGE_SHARD_BY_DATE else None
+    
+    if parts is None:
+        return os.path.join(base, filename)
+    return os.path.join(base, *parts, filename)
+
+
+def find_image_file(filename, device_id=None):
+    """
+    Locate a stored image by filename without touching the database
+    
+    Checks the date shard and then the camera's base directory (images
+    saved before sharding, or not yet migrated) - at most two stats.
+    
+    Args:
+        filename: Image filename (no directory part)
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        str: Path of the existing file, or None
+    """
+    base = get_device_image_dir(device_id)
+    candidates = []
+    
+    parts = get_date_parts(filename)
+    if parts is not None:
+        candidates.append(os.path.join(base, *parts, filename))
+    candidates.append(os.path.join(base, filename))
+    
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def resolve_image_path(timestamp, device_id=None):
+    """
+    Locate the stored image of a capture from its timestamp
+    
+    Args:
+        timestamp: YYYYMMDD_HHMMSS
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        str: Path of the existing file, or None
+    """
+    filename = IMAGE_NAME_FORMAT.format(timestamp=timestamp, format=IMAGE_FORMAT)
+    return find_image_file(filename, device_id)
+
+
+def list_date_keys(device_id=None, newest_first=True):
+    """
+    Dates that have an image shard directory
+    
+    Only the YYYY, MM and DD directory levels are listed, never the
+    images themselves.
+    
+    Args:
+        device_id: Camera id (default camera if None)
+        newest_first: Sort order
+    
+    Returns:
+        list: YYYYMMDD strings
+    """
+    base = get_device_image_dir(device_id)
+    date_keys = []
+    
+    for year in _list_digit_dirs(base, 4):
+        year_dir = os.path.join(base, year)
+        for month in _list_digit_dirs(year_dir, 2):
+            month_dir = os.path.join(year_dir, month)
+            for day in _list_digit_dirs(month_dir, 2):
+                date_keys.append(f"{year}{month}{day}")
+    
+    date_keys.sort(reverse=newest_first)
+    return date_keys
+
+
+def _list_digit_dirs(directory, length):
+    """Subdirectories named with exactly `length` digits"""
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                entry.name for entry in entries
+                if len(entry.name) == length and entry.name.isdigit() and entry.is_dir()
+            ]
+    except OSError:
+        return []
+
+
+def list_day_images(date_key, device_id=None):
+    """
+    Images stored for one day, newest first
+    
+    Args:
+        date_key: YYYYMMDD
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        list: os.DirEntry objects for the day's image files
+    """
+    try:
+        with os.scandir(get_date_directory(date_key, device_id)) as entries:
+            images = [
+                entry for entry in entries
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+            ]
+    except OSError:
+        return []
+    
+    images.sort(key=lambda entry: entry.name, reverse=True)
+    return images
+
+
+def list_base_images(device_id=None):
+    """
+    Images directly in a camera's base directory, newest first
+    
+    These are the ones without a date shard: sky_NORTS_* files and
+    archives not yet moved by migrate_image_layout.py.
+    
+    Args:
+        device_id: Camera id (default camera if None)
+    
+    Returns:
+        list: os.DirEntry objects
+    """
+    try:
+        with os.scandir(get_device_image_dir(device_id)) as entries:
+            images = [
+                entry for entry in entries
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+            ]
+    except OSError:
+        return []
+    
+    images.sort(key=lambda entry: entry.name, reverse=True)
+    return images
+
+
+def has_base_images(device_id=None):
+    """Whether list_base_images() would return anything (stops at the first)"""
+    try:
+        with os.scandir(get_device_image_dir(device_id)) as entries:
+            return any(
+                entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+                for entry in entries
+            )
+    except OSError:
+        return False
 
 
 def write_image_to_disk(image, filepath):
@@ -85,18 +365,85 @@ def write_image_to_disk(image, filepath):
         str: Filepath if successful, None otherwise
     """
     try:
+        ext = os.path.splitext(filepath)[1] or f".{IMAGE_FORMAT}"
+        
         if ENABLE_IMAGE_COMPRESSION:
-            cv2.imwrite(filepath, image, [cv2.IMWRITE_JPEG_QUALITY, COMPRESSION_QUALITY])
+            ok, encoded = cv2.imencode(ext, image, [cv2.IMWRITE_JPEG_QUALITY, COMPRESSION_QUALITY])
         else:
-            cv2.imwrite(filepath, image)
+            ok, encoded = cv2.imencode(ext, image)
+        
+        if not ok:
+            print(f"Error saving image: could not encode {filepath}")
+            return None
+        
+        return write_bytes_to_disk(encoded.tobytes(), filepath)
+    
+    except Exception as e:
+        print(f"Error saving image: {e}")
+        return None
+
+
+def write_bytes_to_disk(data, filepath):
+    """
+    Atomically write bytes to disk
+    
+    Writes to a temporary file in the same directory, fsyncs it and then
+    renames it over the destination, so readers never see a partial image
+    and a crash leaves either the old file or the new one.
+    
+    Args:
+        data: Bytes to write
+        filepath: Destination file path
+    
+    Returns:
+        str: Filepath if successful, None otherwise
+    """
+    # Unique per call: the thumbnail worker and a lazy /thumb request (or
+    # the time-lapse CLI and the server) can write the same file at once
+    directory = os.path.dirname(filepath)
+    tmp_path = None
+    
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory or '.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # mkstemp creates the file 0600
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+        fsync_directory(directory)
         
         return filepath
     
     except Exception as e:
         print(f"Error saving image: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
         return None
 
 
+def fsync_directory(directory):
+    """
+    Flush a directory entry to disk so a rename survives power loss
+    
+    Args:
+        directory: Directory path ('' means current directory)
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return  # Windows: directories cannot be opened for fsync
+    
+    fd = os.open(directory or '.', os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
 def load_image(filepath):
     """
     Load image from disk
@@ -117,29 +464,76 @@ def load_image(filepath):
         return None
 
 
-def delete_old_images(keep_count=100):
+def remove_empty_date_directory(date_key, device_id=None):
+    """
+    Remove a day's shard directory (and its month/year) once empty
+    
+    Args:
+        date_key: YYYYMMDD
+        device_id: Camera id (default camera if None)
+    """
+    directory = get_date_directory(date_key, device_id)
+    base = get_device_image_dir(device_id)
+    
+    # Day, then month, then year - stops at the first non-empty one
+    while directory != base:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def delete_old_images(keep_count=100, device_id=None):
     """
     Delete old images, keeping only the most recent
     
+    Walks the date shards newest first, so only the directories of the
+    days being kept or deleted are listed. Filenames carry the capture
+    time, so they are ordered by name rather than by stat()ing each file.
+    Unsharded images in the base directory are treated as the oldest.
+    
     Args:
         keep_count: Number of images to keep
+        device_id: Camera whose images to prune (default camera if None)
     """
-    if not SAVE_IMAGES or not os.path.exists(IMAGE_DIR):
+    base = get_device_image_dir(device_id)
+    if not SAVE_IMAGES or not os.path.exists(base):
         return
     
     try:
-        # Get all image files
-        files = [f for f in os.listdir(IMAGE_DIR) if f.endswith(('.jpg', '.jpeg', '.png'))]
+        kept = 0
+        deleted = 0
+        
+        for date_key in list_date_keys(device_id):
+            day_deleted = False
+            for entry in list_day_images(date_key, device_id):
+                if kept < keep_count:
+                    kept += 1
+                    continue
+                os.remove(entry.path)
+                deleted += 1
+                day_deleted = True
+            
+            if day_deleted:
+                remove_empty_date_directory(date_key, device_id)
         
-        # Sort by modification time
-        files.sort(key=lambda x: os.path.getmtime(os.path.join(IMAGE_DIR, x)))
+        with os.scandir(base) as entries:
+            legacy = sorted(
+                (entry for entry in entries
+                 if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()),
+                key=lambda entry: entry.name, reverse=True
+            )
         
-        # Delete old files
-        for file in files[:-keep_count]:
-            os.remove(os.path.join(IMAGE_DIR, file))
+        for entry in legacy:
+            if kept < keep_count:
+                kept += 1
+                continue
+            os.remove(entry.path)
+            deleted += 1
         
-        if len(files) > keep_count:
-            print(f"✓ Deleted {len(files) - keep_count} old images")
+        if deleted:
+            print(f"✓ Deleted {deleted} old images")
     
     except Exception as e:
         print(f"Error deleting old images: {e}")
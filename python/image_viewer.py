@@ -388,10 +388,10 @@ def create_gallery_day(day_data):
         
         image_cards += f"""
         <a href="/viewer/{img['timestamp']}" class="image-card">
-            <img src="/image/{img['timestamp']}" 
+            <img src="/thumb/capture/{img['timestamp']}" 
                  alt="{img['timestamp']}"
                  loading="lazy"
-                 onerror="this.src='/image/file/sky_{img['timestamp']}.jpg';">
+                 onerror="this.onerror=null; this.src='/image/{img['timestamp']}';">
             <div class="image-info">
                 <div class="image-time">{img['time']} {sd_badge}</div>
                 <div class="image-score">Score: {img['score']:.0f}%</div>
@@ -412,6 +412,14 @@ def create_gallery_day(day_data):
                 <a href="/gallery" style="color: #667eea; text-decoration: none;">
                     ← Back to Gallery
                 </a>
+                &nbsp;·&nbsp;
+                <a href="/timelapse/{day_data['date_key']}/sheet" style="color: #667eea; text-decoration: none;">
+                    🗂 Contact Sheet
+                </a>
+                &nbsp;·&nbsp;
+                <a href="/timelapse/{day_data['date_key']}" style="color: #667eea; text-decoration: none;">
+                    🎞 Time-lapse
+                </a>
             </p>
             
             <h2 style="margin-bottom: 15px;">Daily Statistics</h2>
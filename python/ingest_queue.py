@@ -0,0 +1,248 @@
+"""
+Ingest Queue Module
+Write-behind queue drained by a single database writer thread
+
+The poller used to write to SQLite inline while Waitress threads were
+reading, so ingest and the dashboard competed for the WAL write lock.
+Now every capture is submitted to this queue and one writer thread
+group-commits whatever arrives within a short time window, so there is
+only ever one writer and one commit per group instead of per image.
+
+The other writers in the server process (reanalysis, retention, summary
+rebuilds) hand their transactions to the same thread with run(), which
+executes them between groups, so a writer never waits on SQLite's busy
+timeout for another writer in this process.
+
+Metrics: how long each capture waited in the queue (stage 'ingest_wait'),
+each run() call (stage 'db_write_call'),
+each group commit (stage 'db_commit'), group sizes and the queue depth.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from python_config import (
+    INGEST_QUEUE_MAX, INGEST_GROUP_COMMIT_WINDOW, INGEST_GROUP_COMMIT_MAX
+)
+from database_operations import ingest_capture, ingest_captures_batch
+from metrics import metrics
+
+
+# Tells the writer thread to exit once everything before it is committed
+_SHUTDOWN = object()
+
+
+class WriteCall:
+    """A database write handed to the writer thread by run()"""
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class IngestWriter:
+    """Single writer thread that group-commits submitted captures"""
+
+    def __init__(self, max_pending=INGEST_QUEUE_MAX,
+                 window=INGEST_GROUP_COMMIT_WINDOW,
+                 max_group=INGEST_GROUP_COMMIT_MAX):
+        # Bounded: submit() blocks when the writer falls behind
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.window = window
+        self.max_group = max_group
+
+        self.thread = None
+        self._start_lock = threading.Lock()
+        self.committed_count = 0
+        self.failed_count = 0
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name="IngestWriter", daemon=True
+                )
+                self.thread.start()
+
+    def submit(self, record, on_commit=None):
+        """
+        Queue a capture record for writing
+
+        Args:
+            record (dict): Ingest record (see database_operations.ingest_capture)
+            on_commit: Optional callable(capture_id), run on the writer
+                       thread once the record is committed
+
+        Returns:
+            Future: Resolves to the capture_id, or to the error if the
+                    record could not be stored
+        """
+        self.start()
+        future = Future()
+        self.queue.put((record, on_commit, time.perf_counter(), future))
+        return future
+
+    def write(self, record):
+        """
+        Write a capture record and wait for its commit
+
+        It is group-committed with whatever else is queued.
+
+        Returns:
+            int: capture_id
+
+        Raises:
+            Whatever the commit raised
+        """
+        return self.submit(record).result()
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Run a write transaction on the writer thread and wait for it
+
+        Queued captures submitted before it are committed first.
+
+        Args:
+            fn: Callable that opens, commits and closes its own
+                transaction (e.g. database_operations.delete_captures_batch)
+
+        Returns:
+            Whatever fn returns (its exception is re-raised here)
+        """
+        if threading.current_thread() is self.thread:
+            # Already on the writer (e.g. from an on_commit callback)
+            return fn(*args, **kwargs)
+
+        self.start()
+        call = WriteCall(fn, args, kwargs)
+        self.queue.put(call)
+        return call.future.result()
+
+    def flush(self):
+        """Block until everything submitted so far has been written"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def shutdown(self, timeout=10):
+        """
+        Write everything still queued, then stop the writer thread
+
+        Args:
+            timeout: Seconds to wait for the writer to finish
+        """
+        if self.thread is None or not self.thread.is_alive():
+            return
+
+        pending = self.queue.qsize()
+        if pending:
+            print(f"[Ingest] Flushing {pending} pending capture(s)...")
+
+        self.queue.put(_SHUTDOWN)
+        self.thread.join(timeout)
+
+        if self.thread.is_alive():
+            print(f"[Ingest] ⚠ Writer still busy after {timeout}s")
+
+    def _run(self):
+        """Writer loop: collect a group, commit it, run any write call, repeat"""
+        while True:
+            group, call, stop = self._collect_group()
+
+            if group:
+                self._commit_group(group)
+
+            if call is not None:
+                self._run_call(call)
+
+            for _ in range(len(group) + (call is not None) + stop):
+                self.queue.task_done()
+
+            if stop:
+                return
+
+    def _collect_group(self):
+        """
+        Wait for one item, then gather more until the window closes
+
+        A write call or shutdown ends the group early so queue order is kept.
+
+        Returns:
+            tuple: (list of (record, on_commit, submitted, future),
+                    WriteCall or None, stop flag)
+        """
+        group = []
+        deadline = None
+
+        while len(group) < self.max_group:
+            if deadline is None:
+                item = self.queue.get()
+                deadline = time.time() + self.window
+            else:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if item is _SHUTDOWN:
+                return group, None, True
+            if isinstance(item, WriteCall):
+                return group, item, False
+            group.append(item)
+
+        return group, None, False
+
+    def _run_call(self, call):
+        """Run a WriteCall and hand its result (or error) back to run()"""
+        started = time.perf_counter()
+        try:
+            call.future.set_result(call.fn(*call.args, **call.kwargs))
+        except Exception as e:
+            call.future.set_exception(e)
+        metrics.observe('stage_seconds', time.perf_counter() - started, stage='db_write_call')
+
+    def _commit_group(self, group):
+        """Commit a group in one transaction, falling back to one at a time"""
+        started = time.perf_counter()
+        for _, _, submitted, _ in group:
+            metrics.observe('stage_seconds', started - submitted, stage='ingest_wait')
+        metrics.observe('ingest_group_size', len(group))
+
+        try:
+            capture_ids = ingest_captures_batch([record for record, _, _, _ in group])
+            results = list(zip(group, capture_ids))
+            metrics.observe('stage_seconds', time.perf_counter() - started, stage='db_commit')
+            metrics.increment('ingest_commits_total', outcome='group')
+        except Exception as e:
+            print(f"[Ingest] ✗ Group commit of {len(group)} failed ({e}) - retrying individually")
+            metrics.increment('ingest_commits_total', outcome='group_failed')
+            results = []
+            for item in group:
+                try:
+                    results.append((item, ingest_capture(item[0])))
+                    metrics.increment('ingest_commits_total', outcome='single')
+                except Exception as e:
+                    self.failed_count += 1
+                    metrics.increment('ingest_commits_total', outcome='single_failed')
+                    print(f"[Ingest] ✗ Could not store capture {item[0].get('timestamp')}: {e}")
+                    item[3].set_exception(e)
+
+        for (record, on_commit, _, future), capture_id in results:
+            self.committed_count += 1
+            future.set_result(capture_id)
+            if on_commit is not None:
+                try:
+                    on_commit(capture_id)
+                except Exception as e:
+                    print(f"[Ingest] ⚠ Commit callback error: {e}")
+
+
+# Global instance
+ingest_writer = IngestWriter()
+metrics.register_gauge('ingest_queue_depth', ingest_writer.queue.qsize)
@@ -1,6 +1,8 @@
 """
 Sky Predictor Server - V1 Modular (Refactored)
-Main Entry Point - runs Flask web server + ESP32 poller together
+Main Entry Point - runs Flask web server + ESP32 camera polling together
+
+Cameras are configured in python_config.CAMERAS.
 
 Usage:
     python main.py
@@ -9,19 +11,34 @@ Press Ctrl+C to stop everything
 """
 
 import threading
-from python_config import HOST, PORT
+from python_config import HOST, PORT, CAMERAS, CAMERA_SUPERVISOR_ENABLED, RETENTION_ENABLED
 from server_utils import print_banner, print_startup_info
 from server_init import initialize_server
 from graceful_shutdown import register_signal_handlers
-from esp32_poller import ESP32Poller
 from web_server import create_flask_app, start_web_server
 
 
-# ── ESP32 Configuration ────────────────────────────────────────────────────────
-ESP32_IP              = "REDACTED"  # Update if ESP32 IP changes
-ESP32_PORT            = 80
-POLL_INTERVAL_SECONDS = 300
-REQUEST_TIMEOUT       = 25
+def start_pollers():
+    """Start polling the configured ESP32-CAMs in the background"""
+    if CAMERA_SUPERVISOR_ENABLED:
+        from camera_supervisor import camera_supervisor
+        camera_supervisor.start()
+        return
+    
+    # Legacy single-camera poller on its own thread
+    from esp32_poller import ESP32Poller
+    
+    camera = CAMERAS[0]
+    poller = ESP32Poller(
+        esp32_ip=camera['ip'],
+        esp32_port=camera.get('port', 80),
+        poll_interval=camera.get('poll_interval', 300),
+        request_timeout=camera.get('request_timeout', 25)
+    )
+    
+    poller_thread = threading.Thread(target=poller.run, daemon=True)
+    poller_thread.start()
+    print("[Poller] Background thread started")
 
 
 def main():
@@ -41,17 +58,13 @@ def main():
     # Create Flask app
     app = create_flask_app()
     
-    # Start ESP32 poller in background thread
-    poller = ESP32Poller(
-        esp32_ip=ESP32_IP,
-        esp32_port=ESP32_PORT, 
-        poll_interval=POLL_INTERVAL_SECONDS,
-        request_timeout=REQUEST_TIMEOUT
-    )
+    # Start ESP32 polling in the background
+    start_pollers()
     
-    poller_thread = threading.Thread(target=poller.run, daemon=True)
-    poller_thread.start()
-    print("[Poller] Background thread started")
+    # Thin out old captures in the background
+    if RETENTION_ENABLED:
+        from retention import retention_engine
+        retention_engine.start()
     
     # Start web server (blocks main thread)
     start_web_server(app, HOST, PORT)
@@ -0,0 +1,309 @@
+"""
+Metrics Module
+In-process counters and latency histograms for the capture pipeline,
+database queries and web routes
+
+Everything is recorded in this process and read back through /metrics
+(Prometheus text format) and /api/metrics (JSON with estimated
+percentiles). Analysis runs in worker processes, so decode and analysis
+times are measured there and handed back with the results (see
+analysis_executor).
+
+Histograms use fixed buckets (METRICS_LATENCY_BUCKETS): an observation is
+one bisect and a few additions under a lock, cheap enough for every image
+and every request. Percentiles in the JSON view are interpolated within
+buckets, the same way Prometheus' histogram_quantile() does it.
+
+Usage:
+    from metrics import metrics
+
+    with metrics.timer('stage_seconds', stage='disk_write'):
+        ...
+    metrics.increment('pipeline_images_total', device='default', outcome='stored')
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from python_config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+
+# Prefix of every name in the Prometheus output
+METRIC_PREFIX = "sky_"
+
+# name -> (type, help, label names)
+METRIC_DEFINITIONS = {
+    'stage_seconds': (
+        'histogram', "Time spent in each capture pipeline stage", ('stage',)),
+    'esp32_request_seconds': (
+        'histogram', "ESP32 request latency including retries", ('device', 'endpoint')),
+    'esp32_requests_total': (
+        'counter', "ESP32 requests by outcome", ('device', 'endpoint', 'outcome')),
+    'pipeline_images_total': (
+        'counter', "Images through the capture pipeline by outcome", ('device', 'outcome')),
+    'ingest_commits_total': (
+        'counter', "Ingest group commits by outcome", ('outcome',)),
+    'ingest_group_size': (
+        'histogram', "Captures per ingest group commit", ()),
+    'db_query_seconds': (
+        'histogram', "Latency of database_operations calls", ('query',)),
+    'http_request_seconds': (
+        'histogram', "Web request latency (to the first byte of streamed responses)", ('route', 'method')),
+    'http_requests_total': (
+        'counter', "Web requests by status", ('route', 'method', 'status')),
+    'ingest_queue_depth': (
+        'gauge', "Captures waiting for the ingest writer", ()),
+}
+
+# Buckets for histograms that count things rather than time them
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+HISTOGRAM_BUCKETS = {
+    'ingest_group_size': SIZE_BUCKETS
+}
+
+# Percentiles reported by /api/metrics
+REPORTED_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket histogram (bucket i counts values <= bounds[i], last is +Inf)"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation inside its bucket
+
+        Args:
+            q: 0.0 - 1.0
+
+        Returns:
+            float: Estimated value (never more than the largest observation)
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - cumulative) / n)
+            cumulative += n
+        return self.max
+
+
+class MetricsRegistry:
+    """Thread-safe store of every counter, histogram and gauge"""
+
+    def __init__(self, enabled=METRICS_ENABLED, buckets=METRICS_LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+
+        self._lock = threading.Lock()
+        # name -> {label values tuple: int or Histogram}
+        self._values = {name: {} for name in METRIC_DEFINITIONS}
+        # name -> callable returning the current value
+        self._gauges = {}
+
+    # ---- Recording ----
+
+    def increment(self, name, amount=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        """Record one observation (seconds, for latency histograms)"""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(HISTOGRAM_BUCKETS.get(name, self.buckets))
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe how long the with-block took (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of timer()"""
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_gauge(self, name, fn):
+        """
+        Report fn() as a gauge's value whenever metrics are read
+
+        Args:
+            name: Gauge defined in METRIC_DEFINITIONS
+            fn: Zero-argument callable returning a number
+        """
+        if METRIC_DEFINITIONS[name][0] != 'gauge':
+            raise ValueError(f"{name} is not a gauge")
+        self._gauges[name] = fn
+
+    def reset(self):
+        """Forget every recorded value (gauges stay registered)"""
+        with self._lock:
+            self._values = {name: {} for name in METRIC_DEFINITIONS}
+            self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        label_names = METRIC_DEFINITIONS[name][2]
+        return tuple(str(labels.get(label, '')) for label in label_names)
+
+    # ---- Reading ----
+
+    def _read_gauges(self):
+        values = {}
+        for name, fn in self._gauges.items():
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return values
+
+    def snapshot(self):
+        """
+        Everything recorded so far, for /api/metrics
+
+        Returns:
+            dict: enabled, uptime_seconds, and counters / histograms / gauges
+                  by name; each counter or histogram is a list of series with
+                  their labels (histogram times in ms: count, mean, p50, p95,
+                  p99, max)
+        """
+        result = {
+            'enabled': self.enabled,
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'counters': {},
+            'histograms': {},
+            'gauges': self._read_gauges()
+        }
+
+        with self._lock:
+            for name, series in self._values.items():
+                kind, _, label_names = METRIC_DEFINITIONS[name]
+                if kind == 'counter':
+                    result['counters'][name] = [
+                        {'labels': dict(zip(label_names, key)), 'value': value}
+                        for key, value in sorted(series.items())
+                    ]
+                elif kind == 'histogram':
+                    scale = 1000 if name not in HISTOGRAM_BUCKETS else 1
+                    suffix = '_ms' if scale == 1000 else ''
+                    entries = []
+                    for key, histogram in sorted(series.items()):
+                        entry = {
+                            'labels': dict(zip(label_names, key)),
+                            'count': histogram.count,
+                            f'sum{suffix}': round(histogram.sum * scale, 3),
+                            f'mean{suffix}': round(histogram.sum / histogram.count * scale, 3)
+                        }
+                        for q in REPORTED_QUANTILES:
+                            entry[f'p{int(q * 100)}{suffix}'] = round(histogram.quantile(q) * scale, 3)
+                        entry[f'max{suffix}'] = round(histogram.max * scale, 3)
+                        entries.append(entry)
+                    result['histograms'][name] = entries
+
+        return result
+
+    def render_prometheus(self):
+        """
+        Everything recorded so far in the Prometheus text exposition format
+
+        Returns:
+            str: text/plain; version=0.0.4 body for /metrics
+        """
+        lines = []
+        gauges = self._read_gauges()
+
+        with self._lock:
+            for name, (kind, help_text, label_names) in METRIC_DEFINITIONS.items():
+                full_name = METRIC_PREFIX + name
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+
+                if kind == 'gauge':
+                    value = gauges.get(name)
+                    if value is not None:
+                        lines.append(f"{full_name} {format_value(value)}")
+                    continue
+
+                for key, value in sorted(self._values[name].items()):
+                    labels = list(zip(label_names, key))
+
+                    if kind == 'counter':
+                        lines.append(f"{full_name}{format_labels(labels)} {format_value(value)}")
+                        continue
+
+                    cumulative = 0
+                    for bound, count in zip(value.bounds + (float('inf'),), value.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else format_value(bound)
+                        lines.append(f"{full_name}_bucket{format_labels(labels + [('le', le)])} "
+                                     f"{cumulative}")
+                    lines.append(f"{full_name}_sum{format_labels(labels)} {format_value(value.sum)}")
+                    lines.append(f"{full_name}_count{format_labels(labels)} {value.count}")
+
+        lines.append(f"# HELP {METRIC_PREFIX}uptime_seconds Seconds since metrics started")
+        lines.append(f"# TYPE {METRIC_PREFIX}uptime_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}uptime_seconds {time.time() - self.started:.1f}")
+
+        return "\n".join(lines) + "\n"
+
+
+def escape_label_value(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    """Prometheus label set: {a="1",b="2"} (empty string for no labels)"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+def format_value(value):
+    """Prometheus sample value (integers without a trailing .0)"""
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+# Global instance
+metrics = MetricsRegistry()
@@ -0,0 +1,200 @@
+"""
+Image Layout Migration Tool
+Move images from the flat IMAGE_DIR layout into YYYY/MM/DD date shards
+
+Images used to be written straight into IMAGE_DIR (or IMAGE_DIR/<device_id>
+for extra cameras). The migration runs in two passes:
+
+1. Files: every flat image with a timestamp in its name is moved into its
+   date shard, together with its thumbnail.
+2. Database: captures whose image_path still points at the old location
+   are rewritten to the shard path, in batches.
+
+Both passes are idempotent, so an interrupted run is finished by running
+it again. The server can keep running meanwhile - lookups check the shard
+and the old location, and new captures already go into shards.
+
+Usage:
+    python migrate_image_layout.py            # Migrate files and database
+    python migrate_image_layout.py --dry-run  # Only report what would move
+"""
+
+import os
+import sys
+from python_config import IMAGE_DIR, IMAGE_SHARD_BY_DATE, DEFAULT_DEVICE_ID
+from image_storage import get_device_image_dir, get_sharded_path, IMAGE_EXTENSIONS
+from thumbnails import get_thumbnail_path
+from database_operations import get_capture_image_paths, update_image_paths_batch
+
+# Captures read and rewritten per database transaction
+MIGRATION_BATCH_SIZE = 1000
+
+# Print progress every N moved files
+MIGRATION_PROGRESS_INTERVAL = 1000
+
+
+def find_device_ids():
+    """
+    Cameras that have images on disk
+
+    The default camera's images are in IMAGE_DIR itself; any other
+    subdirectory that is not a year shard belongs to a camera
+    (validate_config rejects 4-digit device ids, so the two never clash).
+
+    Returns:
+        list: Device ids, default camera first
+    """
+    device_ids = [DEFAULT_DEVICE_ID]
+
+    if os.path.isdir(IMAGE_DIR):
+        with os.scandir(IMAGE_DIR) as entries:
+            for entry in entries:
+                is_year = len(entry.name) == 4 and entry.name.isdigit()
+                if entry.is_dir() and not is_year:
+                    device_ids.append(entry.name)
+
+    return device_ids
+
+
+def move_file(source, target):
+    """Move a file, creating the target's directory"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+
+
+def migrate_files(device_id, dry_run=False):
+    """
+    Move one camera's flat images into date shards
+
+    Args:
+        device_id: Camera whose base directory to migrate
+        dry_run: Count only, move nothing
+
+    Returns:
+        dict: Counts of moved, skipped (no date in name) and conflicting
+              (shard already has a file of that name) images
+    """
+    base = get_device_image_dir(device_id)
+    counts = {'moved': 0, 'skipped': 0, 'conflicts': 0}
+
+    if not os.path.isdir(base):
+        return counts
+
+    with os.scandir(base) as entries:
+        names = [
+            entry.name for entry in entries
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file()
+        ]
+
+    for name in names:
+        source = os.path.join(base, name)
+        target = get_sharded_path(name, device_id)
+
+        if target == source:
+            counts['skipped'] += 1
+            continue
+
+        if os.path.exists(target):
+            print(f"[Migrate] ⚠ {target} already exists - leaving {source}")
+            counts['conflicts'] += 1
+            continue
+
+        if not dry_run:
+            move_file(source, target)
+
+            thumb_source = get_thumbnail_path(source)
+            if os.path.exists(thumb_source):
+                move_file(thumb_source, get_thumbnail_path(target))
+
+        counts['moved'] += 1
+        if counts['moved'] % MIGRATION_PROGRESS_INTERVAL == 0:
+            print(f"[Migrate] {device_id}: {counts['moved']} file(s) moved...")
+
+    return counts
+
+
+def rewrite_image_paths(dry_run=False):
+    """
+    Point captures at their images' shard paths
+
+    A row is rewritten only when its shard path differs from the stored
+    path and the file exists there, so rows whose image was deleted or
+    could not be moved keep their old path.
+
+    Args:
+        dry_run: Count only, update nothing
+
+    Returns:
+        int: Number of captures rewritten (or that would be)
+    """
+    rewritten = 0
+    cursor = 0
+
+    while True:
+        page = get_capture_image_paths(cursor, MIGRATION_BATCH_SIZE)
+        if not page:
+            break
+
+        updates = []
+        for row in page:
+            filename = row['image_filename'] or os.path.basename(row['image_path'] or '')
+            if filename:
+                expected = get_sharded_path(filename, row['device_id'])
+                # In a dry run the file has not been moved yet
+                present = os.path.exists(expected) or (dry_run and os.path.exists(row['image_path'] or ''))
+                if row['image_path'] != expected and present:
+                    updates.append((row['capture_id'], expected))
+
+        if not dry_run:
+            update_image_paths_batch(updates)
+
+        rewritten += len(updates)
+        cursor = page[-1]['capture_id']
+
+    return rewritten
+
+
+def migrate_image_layout(dry_run=False):
+    """
+    Run both migration passes
+
+    Args:
+        dry_run: Only report what would change
+
+    Returns:
+        dict: Totals (moved, skipped, conflicts, rewritten)
+    """
+    totals = {'moved': 0, 'skipped': 0, 'conflicts': 0, 'rewritten': 0}
+
+    for device_id in find_device_ids():
+        counts = migrate_files(device_id, dry_run)
+        print(f"[Migrate] {device_id}: {counts['moved']} moved, {counts['skipped']} without a date, "
+              f"{counts['conflicts']} conflict(s)")
+        for key, value in counts.items():
+            totals[key] += value
+
+    totals['rewritten'] = rewrite_image_paths(dry_run)
+    print(f"[Migrate] {totals['rewritten']} capture path(s) rewritten")
+
+    return totals
+
+
+if __name__ == '__main__':
+    from database_schema import create_database
+
+    if not IMAGE_SHARD_BY_DATE:
+        print("IMAGE_SHARD_BY_DATE is off in python_config.py - nothing to migrate")
+        sys.exit(1)
+
+    dry_run = '--dry-run' in sys.argv
+
+    print("\n" + "="*60)
+    print("Migrating images to YYYY/MM/DD layout" + (" (dry run)" if dry_run else ""))
+    print("="*60 + "\n")
+
+    create_database()
+    totals = migrate_image_layout(dry_run)
+
+    print("\n" + "="*60)
+    print(f"✅ {totals['moved']} file(s) moved, {totals['rewritten']} capture(s) updated")
+    print("="*60 + "\n")
@@ -14,6 +14,25 @@ SAVE_IMAGES = True                    # Save received images to disk
 IMAGE_DIR = "captured_images"         # Directory for saved images
 IMAGE_FORMAT = "jpg"                  # Image file format
 IMAGE_NAME_FORMAT = "sky_{timestamp}.{format}"  # Filename pattern
+IMAGE_SHARD_BY_DATE = True            # Store images in IMAGE_DIR/YYYY/MM/DD/ (see migrate_image_layout.py)
+
+# ===== THUMBNAILS =====
+THUMBNAIL_DIR = "thumbnails"          # Thumbnails for gallery / file manager
+THUMBNAIL_MAX_SIZE = 160              # Longest edge in pixels
+THUMBNAIL_QUALITY = 70                # JPEG quality
+THUMBNAIL_QUEUE_MAX = 32              # Pending ingest-time thumbnails (extra are made lazily)
+THUMBNAIL_CACHE_SECONDS = 31536000    # Browser cache lifetime for /thumb responses
+IMAGE_CACHE_SECONDS = 86400           # Browser cache lifetime for /image/<timestamp> and /image/file
+
+# ===== TIME-LAPSE =====
+TIMELAPSE_DIR = "timelapse"           # Cached daily time-lapse videos and contact sheets
+TIMELAPSE_FPS = 24                    # Video frame rate (288 captures = 12 s)
+TIMELAPSE_FRAME_WIDTH = 960           # Video width in pixels (0 = camera resolution)
+TIMELAPSE_QUALITY = 85                # MJPEG quality of video frames
+TIMELAPSE_DECODE_WORKERS = 2          # Threads decoding frames ahead of the encoder
+CONTACT_SHEET_COLUMNS = 12            # Tiles per row (12 = one row per hour at 5 min)
+CONTACT_SHEET_TILE_WIDTH = 160        # Tile width in pixels
+CONTACT_SHEET_QUALITY = 80            # JPEG quality
 
 # ===== DATA STORAGE =====
 SAVE_ANALYSIS_DATA = True             # Save analysis results
@@ -35,28 +54,119 @@ COLOR_BLUE_DOMINANCE_GREEN_DIFF = 10  # Blue must be this much higher than green
 COLOR_GRAY_VARIANCE_THRESHOLD = 30    # Max variance for gray detection
 
 # Sky Features Analysis
-SKY_SAMPLE_RATE = 50                  # Sample every Nth pixel (lower = more accurate, slower)
+SKY_SAMPLE_RATE = 50                  # Sample every Nth pixel (lower = more accurate; 1 = every pixel)
 SKY_BLUE_MIN_VALUE = 150              # Minimum blue value for "blue sky"
 SKY_BLUE_RED_DIFF = 30                # Blue > red by this much
 SKY_BLUE_GREEN_DIFF = 20              # Blue > green by this much
 SKY_WHITE_BRIGHTNESS_MIN = 200        # Minimum brightness for "white"
 SKY_WHITE_VARIANCE_MAX = 40           # Max color variance for "white"
 
+# Analysis resolution: decode JPEGs at 1/N scale straight from the DCT
+# (1 = full resolution, or 2, 4, 8). Analysis only needs mean colors and
+# coarse coverage; run decode_drift.py to see the score drift per scale.
+ANALYSIS_DECODE_SCALE = 1
+
+# Fused single-pass analysis (same results, one walk over the frame)
+ENABLE_FUSED_ANALYSIS = True          # Use fused_analysis kernel in analyze_image
+FUSED_ANALYSIS_STRIP_ROWS = 64        # Rows per cache-sized strip
+
 # Coverage Thresholds (percentages)
 COVERAGE_MOSTLY_CLEAR = 60            # % blue for "mostly clear"
 COVERAGE_MOSTLY_CLOUDY = 60           # % gray for "mostly cloudy"
 COVERAGE_PARTLY_CLOUDY = 40           # % white for "partly cloudy"
 
+# ===== ANALYSIS WORKERS =====
+ANALYSIS_USE_PROCESSES = True         # Analyze in worker processes (False = in the calling thread)
+ANALYSIS_WORKERS = 0                  # Worker processes (0 = one per CPU core, minus one for the web server)
+ANALYSIS_WORKER_NICE = 5              # Lower worker priority so web requests stay responsive (POSIX only)
+
+# ===== REANALYSIS =====
+REANALYSIS_PAGE_SIZE = 500            # Captures read from the DB per query
+REANALYSIS_BATCH_SIZE = 200           # Re-analyzed rows written per transaction
+REANALYSIS_PROGRESS_INTERVAL = 10     # Seconds between progress reports
+
+# ===== RETENTION =====
+# Retention permanently deletes captures and their image files. Before
+# enabling it, run `python retention.py --dry-run` to see what the tiers
+# below would delete.
+RETENTION_ENABLED = False             # Thin out old captures (rows + image files) in the background
+RETENTION_TIERS = [                   # Captures younger than the first tier are all kept
+    {"after_days": 7, "keep": "hourly"},    # Best-scoring capture per camera per hour
+    {"after_days": 90, "keep": "daily"},    # Best-scoring capture per camera per day
+    # {"after_days": 730, "keep": "none"},  # Delete everything older
+]
+RETENTION_INTERVAL = 3600             # Seconds between retention runs
+RETENTION_BATCH_SIZE = 100            # Captures deleted per transaction
+RETENTION_BATCH_PAUSE = 1.0           # Seconds between batches (keeps the DB free for ingest)
+RETENTION_VACUUM_PAGES = 500          # Free pages returned to the OS per incremental vacuum step
+
+# ===== DATABASE CONNECTIONS =====
+# One SQLite connection is kept per thread (Waitress workers + poller)
+# and these pragmas are applied once when it is opened. Every write in
+# the server goes through the ingest writer thread, so the busy timeout
+# only matters while a CLI tool (e.g. migrate_image_layout.py) writes.
+DB_BUSY_TIMEOUT_MS = 5000             # Wait this long for a lock
+DB_SYNCHRONOUS = "NORMAL"             # Safe with WAL; FULL fsyncs every commit
+DB_CACHE_SIZE_KB = 16384              # Page cache per connection
+DB_MMAP_SIZE_MB = 256                 # Memory-mapped I/O window (0 = off)
+DB_TEMP_STORE = "MEMORY"              # Temp tables/indexes in RAM
+
+# ===== INGEST QUEUE =====
+# Captures are written by one background thread that group-commits
+INGEST_QUEUE_MAX = 64                 # Pending captures before submitters block
+INGEST_GROUP_COMMIT_WINDOW = 0.25     # Seconds to gather captures into one commit
+INGEST_GROUP_COMMIT_MAX = 32          # Most captures per commit
+
+# ===== ESP32 QUEUE SYNC =====
+QUEUE_SYNC_PIPELINED = True           # Overlap fetch / analysis / DB writes during SD queue sync
+QUEUE_SYNC_WORKERS = 2                # Decode + analysis worker threads
+QUEUE_SYNC_FETCH_DEPTH = 4            # Fetched images allowed to wait for a worker
+QUEUE_SYNC_FETCH_DELAY = 0.1          # Seconds between ESP32 requests (lets the ESP32 breathe)
+
+# ===== ESP32 HTTP CONNECTIONS =====
+ESP32_HTTP_MAX_CONNECTIONS = 1        # Pooled keep-alive sockets per ESP32 (it serves one at a time)
+ESP32_HTTP_BACKOFF = 2.5              # Retry backoff factor in seconds (0s, 5s, 10s, ...)
+ESP32_HTTP_BACKOFF_MAX = 30           # Longest wait between retries
+ESP32_HTTP_RETRY_STATUSES = (500, 502, 503, 504)  # HTTP statuses worth retrying
+
+# ===== CAMERAS =====
+DEFAULT_DEVICE_ID = "default"         # Camera id of captures from before multi-camera support
+CAMERAS = [                           # One entry per ESP32-CAM (device_id: letters, digits, - and _)
+    {
+        "device_id": DEFAULT_DEVICE_ID,
+        "ip": "REDACTED",             # Update if ESP32 IP changes
+        "port": 80,
+        "poll_interval": 300,         # Seconds between live captures
+        "request_timeout": 25,
+    },
+]
+CAMERA_SUPERVISOR_ENABLED = True      # Poll all CAMERAS from one asyncio loop (False = legacy thread, first camera only)
+CAMERA_PROCESSING_WORKERS = 4         # Threads that save images from all cameras and queue DB writes
+CAMERA_STARTUP_STAGGER = 2            # Seconds between starting each camera's task
+CAMERA_RESTART_DELAY = 30             # Seconds before restarting a camera task that crashed
+CAMERA_COMMIT_TIMEOUT = 60            # Seconds to wait for the DB write before giving up on an image
+
 # ===== WEB UI SETTINGS =====
 AUTO_REFRESH_INTERVAL = 5000          # Milliseconds between auto-refresh
+HISTORY_PAGE_MAX = 1000               # Largest page /api/history returns (follow the cursor for more)
 SHOW_DETAILED_STATS = True            # Show detailed color analysis
 SHOW_COVERAGE_STATS = True            # Show sky coverage percentages
+SERVER_THREADS = 8                    # Waitress worker threads for normal requests
+SSE_MAX_CLIENTS = 4                   # Open /api/events streams (each holds a thread)
+SSE_HEARTBEAT_SECONDS = 15            # Keep-alive comment interval (< channel timeout)
 
 # ===== LOGGING =====
 ENABLE_LOGGING = True                 # Enable console logging
 LOG_FILE = "server.log"               # Log file (None = console only)
 LOG_LEVEL = "INFO"                    # DEBUG, INFO, WARNING, ERROR
 
+# ===== METRICS =====
+# Stage, DB query and route timings served at /metrics (Prometheus) and /api/metrics
+METRICS_ENABLED = True                # False = record nothing (endpoints still answer)
+METRICS_LATENCY_BUCKETS = (           # Histogram bucket upper bounds in seconds
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+
 # ===== ADVANCED SETTINGS =====
 ENABLE_CORS = True                   # Enable CORS for API access
 MAX_IMAGE_SIZE_MB = 10                # Maximum image size to accept
@@ -140,6 +250,56 @@ def validate_config():
     if SKY_SAMPLE_RATE < 1:
         errors.append("SKY_SAMPLE_RATE must be at least 1")
     
+    if ANALYSIS_DECODE_SCALE not in (1, 2, 4, 8):
+        errors.append("ANALYSIS_DECODE_SCALE must be 1, 2, 4 or 8")
+    
+    if FUSED_ANALYSIS_STRIP_ROWS < 1:
+        errors.append("FUSED_ANALYSIS_STRIP_ROWS must be at least 1")
+    
+    if QUEUE_SYNC_WORKERS < 1 or QUEUE_SYNC_FETCH_DEPTH < 1:
+        errors.append("QUEUE_SYNC_WORKERS and QUEUE_SYNC_FETCH_DEPTH must be at least 1")
+    
+    if ANALYSIS_WORKERS < 0:
+        errors.append("ANALYSIS_WORKERS must be 0 (auto) or more")
+    
+    if REANALYSIS_PAGE_SIZE < 1 or REANALYSIS_BATCH_SIZE < 1:
+        errors.append("REANALYSIS_PAGE_SIZE and REANALYSIS_BATCH_SIZE must be at least 1")
+    
+    tier_days = [tier.get("after_days") for tier in RETENTION_TIERS]
+    if any(not isinstance(days, int) or days < 1 for days in tier_days) or tier_days != sorted(set(tier_days)):
+        errors.append("RETENTION_TIERS after_days must be whole days (>= 1), strictly ascending")
+    for tier in RETENTION_TIERS:
+        if tier.get("keep") not in ("hourly", "daily", "none"):
+            errors.append(f"Invalid RETENTION_TIERS keep: {tier.get('keep')!r} (hourly, daily or none)")
+    
+    if RETENTION_BATCH_SIZE < 1 or RETENTION_VACUUM_PAGES < 1:
+        errors.append("RETENTION_BATCH_SIZE and RETENTION_VACUUM_PAGES must be at least 1")
+    
+    if TIMELAPSE_FPS < 1 or TIMELAPSE_FRAME_WIDTH < 0 or TIMELAPSE_DECODE_WORKERS < 1:
+        errors.append("TIMELAPSE_FPS and TIMELAPSE_DECODE_WORKERS must be at least 1, TIMELAPSE_FRAME_WIDTH >= 0")
+    
+    if CONTACT_SHEET_COLUMNS < 1 or CONTACT_SHEET_TILE_WIDTH < 16:
+        errors.append("CONTACT_SHEET_COLUMNS must be at least 1 and CONTACT_SHEET_TILE_WIDTH at least 16")
+    
+    if INGEST_QUEUE_MAX < 1 or INGEST_GROUP_COMMIT_MAX < 1:
+        errors.append("INGEST_QUEUE_MAX and INGEST_GROUP_COMMIT_MAX must be at least 1")
+    
+    device_ids = [camera.get("device_id") for camera in CAMERAS]
+    if not CAMERAS or len(set(device_ids)) != len(device_ids):
+        errors.append("CAMERAS must list at least one camera, each with a unique device_id")
+    for device_id in device_ids:
+        if not device_id or not all(c.isalnum() or c in "-_" for c in str(device_id)):
+            errors.append(f"Invalid camera device_id: {device_id!r} (letters, digits, - and _ only)")
+        elif len(str(device_id)) == 4 and str(device_id).isdigit():
+            # A camera's image folder would be taken for a year shard (IMAGE_DIR/YYYY)
+            errors.append(f"Invalid camera device_id: {device_id!r} (4 digits looks like a year folder)")
+    
+    if not METRICS_LATENCY_BUCKETS or list(METRICS_LATENCY_BUCKETS) != sorted(set(METRICS_LATENCY_BUCKETS)):
+        errors.append("METRICS_LATENCY_BUCKETS must be strictly ascending")
+    
+    if SSE_MAX_CLIENTS < 0 or SSE_HEARTBEAT_SECONDS < 1:
+        errors.append("SSE_MAX_CLIENTS must be >= 0 and SSE_HEARTBEAT_SECONDS at least 1")
+    
     if CLEAR_SKY_THRESHOLD < 0 or CLEAR_SKY_THRESHOLD > 100:
         errors.append("CLEAR_SKY_THRESHOLD must be 0-100")
     
@@ -0,0 +1,237 @@
+"""
+Reanalysis Module
+Recompute stored sky_analysis rows after thresholds or analysis code change
+
+Every sky_analysis row is tagged with the analysis version (a hash of
+the analysis thresholds in python_config plus ANALYSIS_ALGORITHM_VERSION).
+A reanalysis run streams the captures whose rows are stale, analyzes
+their images in the analysis_executor worker processes and writes the
+new rows back in batches, refreshing the daily/hourly rollups as it goes.
+
+Runs are resumable: rows are updated as soon as each batch is written,
+so an interrupted run simply skips them next time.
+
+Usage:
+    python reanalysis.py                # Recompute stale rows only
+    python reanalysis.py --force        # Recompute every capture
+    python reanalysis.py --after 12345  # Start after this capture_id
+"""
+
+import threading
+import time
+from collections import deque
+from analysis_core import ANALYSIS_VERSION
+from analysis_executor import analysis_executor
+from database_operations import (
+    get_reanalysis_candidates, count_reanalysis_candidates, replace_analyses_batch
+)
+from ingest_queue import ingest_writer
+from python_config import (
+    REANALYSIS_PAGE_SIZE, REANALYSIS_BATCH_SIZE, REANALYSIS_PROGRESS_INTERVAL
+)
+
+
+class ReanalysisJob:
+    """One reanalysis run at a time, in the foreground or a background thread"""
+
+    def __init__(self):
+        self.thread = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self.status = self._new_status(force=False, after_capture_id=0)
+
+    def _new_status(self, force, after_capture_id):
+        return {
+            'state': 'idle',
+            'analysis_version': ANALYSIS_VERSION,
+            'force': force,
+            'total': 0,
+            'processed': 0,
+            'updated': 0,
+            'skipped': 0,       # Image missing or unreadable
+            'failed': 0,        # Analysis raised an error
+            'last_capture_id': after_capture_id,
+            'started_at': None,
+            'finished_at': None,
+            'rate_per_second': 0.0,
+            'eta_seconds': None,
+            'error': None
+        }
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, force=False, after_capture_id=0):
+        """
+        Start a run in a background thread
+
+        Args:
+            force: Recompute every capture, not only stale ones
+            after_capture_id: Resume after this capture_id
+
+        Returns:
+            bool: False if a run is already in progress
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+
+            self.status = self._new_status(force, after_capture_id)
+            self.status['state'] = 'running'
+
+            self.thread = threading.Thread(
+                target=self.run, args=(force, after_capture_id),
+                name="Reanalysis", daemon=True
+            )
+            self.thread.start()
+            return True
+
+    def cancel(self):
+        """Stop after the current batch is written"""
+        self._cancel.set()
+
+    def get_status(self):
+        """Snapshot of the current/last run's progress"""
+        return dict(self.status)
+
+    def run(self, force=False, after_capture_id=0):
+        """
+        Reanalyze captures (blocks until done)
+
+        Args:
+            force: Recompute every capture, not only stale ones
+            after_capture_id: Resume after this capture_id
+
+        Returns:
+            dict: Final status
+        """
+        self._cancel.clear()
+        version = None if force else ANALYSIS_VERSION
+
+        status = self._new_status(force, after_capture_id)
+        status['state'] = 'running'
+        status['started_at'] = time.time()
+        # Not counted when resuming part-way
+        status['total'] = None if after_capture_id else count_reanalysis_candidates(version)
+        self.status = status
+
+        print(f"[Reanalysis] Starting ({status['total'] if status['total'] is not None else '?'} "
+              f"capture(s), version {ANALYSIS_VERSION})")
+
+        # Enough queued jobs to keep every worker process busy
+        max_in_flight = analysis_executor.max_workers * 2
+        pending = deque()
+        batch = []
+        last_report = time.time()
+
+        try:
+            cursor = after_capture_id
+            while not self._cancel.is_set():
+                page = get_reanalysis_candidates(cursor, REANALYSIS_PAGE_SIZE, version)
+                if not page:
+                    break
+
+                for row in page:
+                    pending.append((row['capture_id'], analysis_executor.submit_file(row['image_path'])))
+                    cursor = row['capture_id']
+
+                    while len(pending) >= max_in_flight:
+                        self._collect(pending.popleft(), batch)
+
+                    if len(batch) >= REANALYSIS_BATCH_SIZE:
+                        self._write_batch(batch)
+                        batch = []
+
+                    if time.time() - last_report >= REANALYSIS_PROGRESS_INTERVAL:
+                        self._report()
+                        last_report = time.time()
+
+                    if self._cancel.is_set():
+                        break
+
+            while pending:
+                self._collect(pending.popleft(), batch)
+            self._write_batch(batch)
+
+            status['state'] = 'cancelled' if self._cancel.is_set() else 'complete'
+        except Exception as e:
+            for _, future in pending:
+                future.cancel()
+            status['state'] = 'error'
+            status['error'] = str(e)
+            print(f"[Reanalysis] ✗ Stopped: {e}")
+
+        status['finished_at'] = time.time()
+        status['eta_seconds'] = None
+        self._report()
+        if status['state'] == 'complete':
+            print("[Reanalysis] ✅ Complete")
+        else:
+            print(f"[Reanalysis] {status['state'].capitalize()} - "
+                  f"resume with --after {status['last_capture_id']}")
+
+        return self.get_status()
+
+    def _collect(self, item, batch):
+        """Wait for one analysis result and add it to the write batch"""
+        capture_id, future = item
+
+        try:
+            result = future.result()
+        except Exception as e:
+            self.status['failed'] += 1
+            print(f"[Reanalysis] ✗ Capture {capture_id}: {e}")
+            result = None
+        else:
+            if result is None:
+                self.status['skipped'] += 1
+
+        self.status['processed'] += 1
+        if result is not None:
+            batch.append((capture_id, result))
+
+    def _write_batch(self, batch):
+        """Write a batch of results and advance the resume point"""
+        if batch:
+            self.status['updated'] += ingest_writer.run(replace_analyses_batch, batch)
+            self.status['last_capture_id'] = max(
+                self.status['last_capture_id'], max(capture_id for capture_id, _ in batch)
+            )
+
+        elapsed = time.time() - self.status['started_at']
+        if elapsed > 0:
+            self.status['rate_per_second'] = round(self.status['processed'] / elapsed, 1)
+
+        total = self.status['total']
+        if total and self.status['rate_per_second']:
+            remaining = max(0, total - self.status['processed'])
+            self.status['eta_seconds'] = int(remaining / self.status['rate_per_second'])
+
+    def _report(self):
+        s = self.status
+        total = s['total'] if s['total'] is not None else '?'
+        eta = f", ETA {s['eta_seconds']}s" if s['eta_seconds'] is not None else ""
+        print(f"[Reanalysis] {s['processed']}/{total} processed, {s['updated']} updated, "
+              f"{s['skipped']} skipped, {s['failed']} failed ({s['rate_per_second']}/s{eta})")
+
+
+# Global instance
+reanalysis_job = ReanalysisJob()
+
+
+if __name__ == '__main__':
+    import sys
+    from database_schema import create_database
+
+    create_database()
+
+    after = 0
+    if '--after' in sys.argv:
+        after = int(sys.argv[sys.argv.index('--after') + 1])
+
+    try:
+        reanalysis_job.run(force='--force' in sys.argv, after_capture_id=after)
+    except KeyboardInterrupt:
+        print(f"\n[Reanalysis] Interrupted - resume with --after {reanalysis_job.status['last_capture_id']}")
+    finally:
+        analysis_executor.shutdown(wait=False)
@@ -0,0 +1,279 @@
+"""
+Retention Module
+Thin out old captures by tier, deleting database rows and image files together
+
+RETENTION_TIERS in python_config decides what survives as captures age,
+e.g. everything for 7 days, the best-scoring capture per camera per hour
+until 90 days, then the best per day. Each run works oldest first in
+small batches: a batch of rows is deleted in one transaction (rollups
+refreshed with it), then their image files and thumbnails are removed.
+Rows go first, so a crash mid-batch can only leave an unreferenced file,
+never a capture whose image is gone.
+
+Batches are separated by RETENTION_BATCH_PAUSE so ingest writes are never
+starved, and freed database pages are returned with incremental vacuum
+steps instead of a VACUUM that locks the database.
+
+Off by default (RETENTION_ENABLED): deletions cannot be undone, so check
+the tiers with --dry-run before turning the background engine on.
+
+Usage:
+    python retention.py                               # One run now
+    python retention.py --dry-run                     # Show the first batch each tier would delete
+    python retention.py --enable-incremental-vacuum   # One-time switch for old databases
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from database_operations import (
+    get_retention_candidates, delete_captures_batch,
+    get_auto_vacuum_mode, incremental_vacuum
+)
+from ingest_queue import ingest_writer
+from image_storage import remove_empty_date_directory
+from thumbnails import delete_thumbnail
+from python_config import (
+    RETENTION_TIERS, RETENTION_INTERVAL, RETENTION_BATCH_SIZE,
+    RETENTION_BATCH_PAUSE, RETENTION_VACUUM_PAGES
+)
+
+# Let the server finish starting up before the first run
+RETENTION_STARTUP_DELAY = 60
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def get_tier_ranges(tiers=RETENTION_TIERS, now=None):
+    """
+    Time range each tier applies to
+
+    Cutoffs are aligned to midnight so no hourly or daily bucket is ever
+    split between two tiers (or between a tier and the keep-all period).
+
+    Args:
+        tiers: Tier dicts (after_days, keep), ascending by after_days
+        now: Reference time (default: now)
+
+    Returns:
+        list: (keep, start, end) tuples, oldest tier first; start is None
+              for the oldest tier
+    """
+    midnight = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoffs = [midnight - timedelta(days=tier['after_days']) for tier in tiers]
+
+    ranges = []
+    for i, tier in enumerate(tiers):
+        start = cutoffs[i + 1] if i + 1 < len(tiers) else None
+        ranges.append((tier['keep'], start, cutoffs[i]))
+
+    return list(reversed(ranges))
+
+
+def delete_capture_files(rows):
+    """
+    Remove the images (and thumbnails) of deleted captures
+
+    Returns:
+        int: Number of image files removed
+    """
+    removed = 0
+    days = set()
+
+    for row in rows:
+        image_path = row.get('image_path')
+        if not image_path:
+            continue
+
+        try:
+            if os.path.exists(image_path):
+                os.remove(image_path)
+                removed += 1
+            delete_thumbnail(image_path)
+        except OSError as e:
+            print(f"[Retention] ⚠ Could not remove {image_path}: {e}")
+
+        days.add((str(row['timestamp'])[:10].replace('-', ''), row.get('device_id')))
+
+    for date_key, device_id in days:
+        remove_empty_date_directory(date_key, device_id)
+
+    return removed
+
+
+class RetentionEngine:
+    """Background thread that applies RETENTION_TIERS every RETENTION_INTERVAL"""
+
+    def __init__(self, tiers=RETENTION_TIERS):
+        self.tiers = tiers
+        self.thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+        self._vacuum_hint_shown = False
+        self.status = {
+            'state': 'idle',
+            'last_started_at': None,
+            'last_finished_at': None,
+            'deleted': 0,           # Captures deleted in the last run
+            'files_deleted': 0,
+            'pages_freed': 0,
+            'next_run_at': None,
+            'error': None
+        }
+
+    def start(self):
+        """Start the background thread (first run after RETENTION_STARTUP_DELAY)"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._loop, name="Retention", daemon=True)
+        self.thread.start()
+        print(f"[Retention] Background thread started ({len(self.tiers)} tier(s), "
+              f"every {RETENTION_INTERVAL}s)")
+
+    def stop(self, timeout=10):
+        """Stop after the current batch"""
+        self._stop.set()
+        self._wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def run_now(self):
+        """
+        Trigger a run without waiting for the interval
+
+        Returns:
+            bool: False if a run is already in progress
+        """
+        if self._run_lock.locked():
+            return False
+
+        if self.thread is not None and self.thread.is_alive():
+            self._wake.set()
+        else:
+            threading.Thread(target=self.run, name="Retention", daemon=True).start()
+        return True
+
+    def get_status(self):
+        """Snapshot of the current/last run"""
+        return dict(self.status)
+
+    def _loop(self):
+        delay = RETENTION_STARTUP_DELAY
+        while not self._stop.is_set():
+            self.status['next_run_at'] = time.time() + delay
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            self.run()
+            delay = RETENTION_INTERVAL
+
+    def run(self, dry_run=False):
+        """
+        Apply every tier once, then vacuum (blocks until done)
+
+        Args:
+            dry_run: Only count candidates (first batch of each tier)
+
+        Returns:
+            dict: Final status
+        """
+        with self._run_lock:
+            status = self.status
+            status.update({
+                'state': 'running', 'last_started_at': time.time(), 'last_finished_at': None,
+                'deleted': 0, 'files_deleted': 0, 'pages_freed': 0, 'next_run_at': None,
+                'error': None
+            })
+
+            try:
+                for keep, start, end in get_tier_ranges(self.tiers):
+                    if self._stop.is_set():
+                        break
+                    self._apply_tier(keep, start, end, dry_run)
+
+                if not dry_run and not self._stop.is_set():
+                    self._vacuum()
+
+                status['state'] = 'idle'
+            except Exception as e:
+                status['state'] = 'error'
+                status['error'] = str(e)
+                print(f"[Retention] ✗ Run failed: {e}")
+
+            status['last_finished_at'] = time.time()
+            if status['deleted'] or status['pages_freed']:
+                print(f"[Retention] ✓ Deleted {status['deleted']} capture(s), "
+                      f"{status['files_deleted']} file(s); freed {status['pages_freed']} page(s)")
+
+            return self.get_status()
+
+    def _apply_tier(self, keep, start, end, dry_run):
+        """Delete one tier's candidates in batches, oldest first"""
+        while not self._stop.is_set():
+            rows = get_retention_candidates(keep, start, end, RETENTION_BATCH_SIZE)
+            if not rows:
+                return
+
+            if dry_run:
+                self.status['deleted'] += len(rows)
+                print(f"[Retention] {keep} tier: at least {len(rows)} capture(s) before {end:%Y-%m-%d}")
+                return
+
+            self.status['deleted'] += ingest_writer.run(
+                delete_captures_batch, [row['capture_id'] for row in rows]
+            )
+            self.status['files_deleted'] += delete_capture_files(rows)
+
+            if len(rows) < RETENTION_BATCH_SIZE:
+                return
+
+            # Everything before the last row's day is done (see get_retention_candidates)
+            start = datetime.strptime(str(rows[-1]['timestamp'])[:10], '%Y-%m-%d')
+            self._stop.wait(RETENTION_BATCH_PAUSE)
+
+    def _vacuum(self):
+        """Hand free pages back to the filesystem a step at a time"""
+        if get_auto_vacuum_mode() != AUTO_VACUUM_INCREMENTAL:
+            if not self._vacuum_hint_shown:
+                print("[Retention] ⚠ Database was created without incremental vacuum - "
+                      "run 'python retention.py --enable-incremental-vacuum' once to reclaim space")
+                self._vacuum_hint_shown = True
+            return
+
+        while not self._stop.is_set():
+            freed, remaining = ingest_writer.run(incremental_vacuum, RETENTION_VACUUM_PAGES)
+            self.status['pages_freed'] += freed
+            if not freed or not remaining:
+                return
+
+            self._stop.wait(RETENTION_BATCH_PAUSE)
+
+
+# Global instance
+retention_engine = RetentionEngine()
+
+
+if __name__ == '__main__':
+    import sys
+    from database_schema import create_database
+    from database_operations import enable_incremental_vacuum
+
+    create_database()
+
+    if '--enable-incremental-vacuum' in sys.argv:
+        print("Rewriting database with auto_vacuum=INCREMENTAL (stop the server first)...")
+        enable_incremental_vacuum()
+        print("✓ Done")
+        sys.exit(0)
+
+    for keep, start, end in get_tier_ranges():
+        since = f"{start:%Y-%m-%d}" if start else "the beginning"
+        print(f"  {since} .. {end:%Y-%m-%d}: keep {keep}")
+
+    print(retention_engine.run(dry_run='--dry-run' in sys.argv))
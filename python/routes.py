@@ -3,16 +3,33 @@ Flask Routes Module - V1.1 PULL Mode with Daily View
 
 All endpoints including gallery, daily view, file manager, and viewer
 """
-from data_manager_sqlite import data_manager
-from flask import request, render_template_string, jsonify, send_file
+from data_manager_sqlite import data_manager, parse_time_filter
+from flask import request, render_template_string, jsonify, send_file, Response, url_for, g
 from datetime import datetime
+import hashlib
 import os
+import time
 import traceback
 
 from python_config import (
     ENABLE_BRIGHTNESS_ANALYSIS, ENABLE_COLOR_ANALYSIS, ENABLE_SKY_FEATURES,
     AUTO_REFRESH_INTERVAL, BRIGHTNESS_VERY_BRIGHT, BRIGHTNESS_BRIGHT,
-    BRIGHTNESS_MODERATE, BRIGHTNESS_DIM, IMAGE_DIR
+    BRIGHTNESS_MODERATE, BRIGHTNESS_DIM, THUMBNAIL_CACHE_SECONDS,
+    IMAGE_CACHE_SECONDS, HISTORY_PAGE_MAX
+)
+from thumbnails import get_or_create_thumbnail, delete_thumbnail
+from image_storage import (
+    find_image_file, resolve_image_path, list_date_keys, list_day_images,
+    list_base_images, has_base_images
+)
+from event_stream import event_broadcaster
+from reanalysis import reanalysis_job
+from retention import retention_engine
+from timelapse import timelapse_builder
+from metrics import metrics
+from data_export import stream_export
+from http_cache import (
+    cached_json, is_not_modified, not_modified_response, apply_validators
 )
 
 from web_templates import HTML_TEMPLATE, STATS_PAGE_TEMPLATE
@@ -40,6 +57,28 @@ except ImportError:
     HAS_DAILY_VIEW = False
 
 
+# /api/files/list "date" for images outside the date shards
+UNSORTED_DATE_KEY = 'unsorted'
+
+# Seconds a client is asked to wait while a time-lapse is built
+TIMELAPSE_RETRY_AFTER = 5
+
+
+def timelapse_pending_response(state):
+    """
+    Answer for a time-lapse or contact sheet that cannot be served yet
+
+    Args:
+        state: TimelapseBuilder.get_cached() state other than current/stale
+    """
+    if state == 'empty':
+        return "No images for that day", 404
+    if state == 'failed':
+        return "Time-lapse could not be built (see server log)", 500
+    return ("Time-lapse is being built - try again shortly", 202,
+            {'Retry-After': str(TIMELAPSE_RETRY_AFTER)})
+
+
 def register_routes(app):
     """Register all Flask routes to the app"""
     
@@ -55,6 +94,25 @@ def register_routes(app):
         def _score_color(score):
             return score_to_color(score)
     
+    # ----------------------------------------------------------------
+    # Request timing (labelled by route pattern, not by URL)
+    # ----------------------------------------------------------------
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def _record_request_timing(response):
+        started = g.get('request_started')
+        if started is not None:
+            # Streamed responses (event stream, exports) are timed to their first byte
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe('http_request_seconds', time.perf_counter() - started,
+                            route=route, method=request.method)
+            metrics.increment('http_requests_total', route=route, method=request.method,
+                              status=response.status_code)
+        return response
+    
     
     # ================================================================
     # MAIN PAGES
@@ -147,33 +205,91 @@ def register_routes(app):
     @app.route('/api/latest')
     def get_latest():
         """Latest capture data"""
-        try:
+        def build():
             latest = data_manager.get_latest()
             
             if not latest or not latest.get("timestamp"):
                 return jsonify({
+                    "capture_id": None,
                     "timestamp": None,
                     "image_path": None,
                     "analysis": {}
                 })
             
             return jsonify({
+                "capture_id": latest.get("capture_id"),
                 "timestamp": latest.get("timestamp"),
                 "image_path": latest.get("image_path"),
                 "analysis": latest.get("analysis", {})
             })
+        
+        try:
+            return cached_json("latest", build)
         except Exception as e:
             print(f"Error in /api/latest: {e}")
             traceback.print_exc()
             return jsonify({"error": str(e)}), 500
     
+    @app.route('/api/events')
+    def event_stream():
+        """Server-Sent Events: one 'capture' event per newly stored capture"""
+        subscriber = event_broadcaster.subscribe()
+        if subscriber is None:
+            # Client limit reached - the page falls back to polling
+            return jsonify({"error": "Too many event-stream clients"}), 503
+        
+        response = Response(
+            event_broadcaster.stream(subscriber),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+    
     @app.route('/api/history')
     def get_history():
-        """Historical data"""
+        """
+        Historical data, newest first, one page at a time
+        
+        Query args: limit (default 100, max HISTORY_PAGE_MAX), cursor,
+        start / end (YYYYMMDD_HHMMSS or ISO), device.
+        
+        The body is the array of captures; when more pages exist the
+        X-Next-Cursor header carries the cursor for the next request and
+        a Link rel="next" header the full URL.
+        """
         try:
-            limit = request.args.get('limit', type=int)
-            history = data_manager.get_history(limit)
-            return jsonify(history)
+            limit = min(request.args.get('limit', 100, type=int), HISTORY_PAGE_MAX)
+            cursor = request.args.get('cursor')
+            device_id = request.args.get('device')
+            try:
+                start = parse_time_filter(request.args.get('start'))
+                end = parse_time_filter(request.args.get('end'))
+            except ValueError as e:
+                return jsonify({"error": f"Invalid start/end: {e}"}), 400
+            
+            if limit < 1:
+                return jsonify({"error": "limit must be at least 1"}), 400
+            
+            def build():
+                try:
+                    page = data_manager.get_history_page(limit, cursor, start, end, device_id)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                
+                response = jsonify(page['items'])
+                if page['next_cursor']:
+                    args = request.args.to_dict()
+                    args['cursor'] = page['next_cursor']
+                    response.headers['X-Next-Cursor'] = page['next_cursor']
+                    response.headers['Link'] = f'<{url_for("get_history", **args)}>; rel="next"'
+                return response
+            
+            # ETag headers must stay quote-free ASCII, so the validated
+            # arguments are hashed rather than echoing the query string
+            args_key = repr((limit, cursor, str(start), str(end), device_id))
+            args_hash = hashlib.sha1(args_key.encode('utf-8', 'replace')).hexdigest()[:16]
+            return cached_json(f"history-{args_hash}", build)
         except Exception as e:
             print(f"Error in /api/history: {e}")
             return jsonify({"error": str(e)}), 500
@@ -182,40 +298,67 @@ def register_routes(app):
     def get_statistics():
         """Statistics summary"""
         try:
-            stats = data_manager.get_statistics()
-            return jsonify(stats)
+            return cached_json(
+                "statistics",
+                lambda: jsonify(data_manager.get_statistics())
+            )
         except Exception as e:
             print(f"Error in /api/statistics: {e}")
             return jsonify({"error": str(e)}), 500
     
     @app.route('/api/files/list')
     def list_files():
-        """List all files in captured_images directory"""
+        """
+        List the image files stored for one day
+        
+        Query parameters:
+            date: YYYYMMDD, or 'unsorted' for images outside the date
+                  shards (default: the most recent day with images)
+            device: Camera id (default camera if omitted)
+        
+        Only that day's shard directory is listed; 'dates' holds every
+        day that has images, newest first, then 'unsorted' if there are
+        any, for navigation. total and total_size_mb cover the listed day.
+        """
         try:
-            if not os.path.exists(IMAGE_DIR):
-                return jsonify({"files": [], "total": 0})
+            device_id = request.args.get('device')
+            if device_id and ('/' in device_id or '\\' in device_id or '..' in device_id):
+                return jsonify({"error": "Invalid device"}), 400
+            
+            date_keys = list_date_keys(device_id)
+            if has_base_images(device_id):
+                date_keys.append(UNSORTED_DATE_KEY)
+            
+            date_key = request.args.get('date') or (date_keys[0] if date_keys else None)
+            if date_key == UNSORTED_DATE_KEY:
+                entries = list_base_images(device_id)
+            elif date_key and not (len(date_key) == 8 and date_key.isdigit()):
+                return jsonify({"error": "date must be YYYYMMDD or unsorted"}), 400
+            else:
+                entries = list_day_images(date_key, device_id) if date_key else []
             
             files = []
             total_size = 0
             
-            for filename in sorted(os.listdir(IMAGE_DIR), reverse=True):
-                if filename.endswith(('.jpg', '.jpeg', '.JPG', '.JPEG')):
-                    filepath = os.path.join(IMAGE_DIR, filename)
-                    stat = os.stat(filepath)
-                    
-                    # Extract timestamp from filename (sky_YYYYMMDD_HHMMSS.jpg or sky_NORTS_*.jpg)
-                    timestamp = filename.replace('sky_', '').replace('.jpg', '').replace('.JPG', '')
-                    
-                    files.append({
-                        'filename': filename,
-                        'timestamp': timestamp,
-                        'size': stat.st_size,
-                        'size_mb': round(stat.st_size / (1024 * 1024), 2),
-                        'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                    total_size += stat.st_size
+            for entry in entries:
+                stat = entry.stat()
+                
+                # Extract timestamp from filename (sky_YYYYMMDD_HHMMSS.jpg or sky_NORTS_*.jpg)
+                filename = entry.name
+                timestamp = filename.replace('sky_', '').replace('.jpg', '').replace('.JPG', '')
+                
+                files.append({
+                    'filename': filename,
+                    'timestamp': timestamp,
+                    'size': stat.st_size,
+                    'size_mb': round(stat.st_size / (1024 * 1024), 2),
+                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                })
+                total_size += stat.st_size
             
             return jsonify({
+                'date': date_key,
+                'dates': date_keys,
                 'files': files,
                 'total': len(files),
                 'total_size_mb': round(total_size / (1024 * 1024), 2)
@@ -227,18 +370,21 @@ def register_routes(app):
     
     @app.route('/api/files/delete/<filename>', methods=['DELETE'])
     def delete_file(filename):
-        """Delete a specific file"""
+        """Delete a specific file (optional ?device= for other cameras)"""
         try:
             # Security check
-            if '/' in filename or '\\' in filename or '..' in filename:
-                return jsonify({"error": "Invalid filename"}), 400
+            device_id = request.args.get('device')
+            for name in (filename, device_id or ''):
+                if '/' in name or '\\' in name or '..' in name:
+                    return jsonify({"error": "Invalid filename"}), 400
             
-            filepath = os.path.join(IMAGE_DIR, filename)
+            filepath = find_image_file(filename, device_id)
             
-            if not os.path.exists(filepath):
+            if not filepath:
                 return jsonify({"error": "File not found"}), 404
             
             os.remove(filepath)
+            delete_thumbnail(filepath)
             return jsonify({"success": True, "deleted": filename})
         
         except Exception as e:
@@ -265,6 +411,62 @@ def register_routes(app):
             print(f"Error in /api/config: {e}")
             return jsonify({"error": str(e)}), 500
     
+    @app.route('/api/reanalysis')
+    def reanalysis_status():
+        """Progress of the current/last reanalysis run"""
+        return jsonify(reanalysis_job.get_status())
+    
+    @app.route('/api/reanalysis/start', methods=['POST'])
+    def reanalysis_start():
+        """
+        Recompute stored analyses in the background
+        
+        JSON body (optional): {"force": true} to recompute every capture,
+        {"after_capture_id": N} to resume part-way
+        """
+        try:
+            options = request.get_json(silent=True) or {}
+            started = reanalysis_job.start(
+                force=bool(options.get('force', False)),
+                after_capture_id=int(options.get('after_capture_id', 0))
+            )
+            if not started:
+                return jsonify({"error": "Reanalysis already running",
+                                "status": reanalysis_job.get_status()}), 409
+            return jsonify({"success": True, "status": reanalysis_job.get_status()}), 202
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid options: {e}"}), 400
+    
+    @app.route('/api/reanalysis/cancel', methods=['POST'])
+    def reanalysis_cancel():
+        """Stop the running reanalysis after its current batch"""
+        reanalysis_job.cancel()
+        return jsonify({"success": True, "status": reanalysis_job.get_status()})
+    
+    @app.route('/api/retention')
+    def retention_status():
+        """Progress/result of the current or last retention run"""
+        return jsonify(retention_engine.get_status())
+    
+    @app.route('/api/retention/run', methods=['POST'])
+    def retention_run():
+        """Apply the retention tiers now instead of at the next interval"""
+        if not retention_engine.run_now():
+            return jsonify({"error": "Retention already running",
+                            "status": retention_engine.get_status()}), 409
+        return jsonify({"success": True, "status": retention_engine.get_status()}), 202
+    
+    @app.route('/api/metrics')
+    def metrics_json():
+        """Stage, ESP32, DB query and route timings with estimated percentiles"""
+        return jsonify(metrics.snapshot())
+    
+    @app.route('/metrics')
+    def metrics_prometheus():
+        """The same metrics in Prometheus text format (for scraping)"""
+        return Response(metrics.render_prometheus(),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
+    
     @app.route('/api/test')
     def test_endpoint():
         """Test endpoint"""
@@ -290,8 +492,14 @@ def register_routes(app):
             latest = data_manager.get_latest()
             image_path = latest.get("image_path")
             
+            # The latest image only changes when a new capture arrives
+            etag = f"latest-image-{latest.get('capture_id')}"
+            if is_not_modified(etag):
+                return not_modified_response(etag)
+            
             if image_path and os.path.exists(image_path):
-                return send_file(image_path, mimetype='image/jpeg')
+                response = send_file(image_path, mimetype='image/jpeg', conditional=False)
+                return apply_validators(response, etag)
             
             return "No image available", 404
         except Exception as e:
@@ -304,34 +512,37 @@ def register_routes(app):
         Serve image by timestamp
         
         Supports multiple naming conventions:
+        - Date shard path derived from the timestamp
         - Database image_path
         - Standard format: sky_YYYYMMDD_HHMMSS.jpg
         - NORTS format: sky_NORTS_*.jpg
         """
         try:
-            # Try to get image_path from database
-            from data_manager_sqlite import data_manager
-            
-            all_captures = data_manager.get_history(limit=None)
-            for capture in all_captures:
-                if capture.get('timestamp') == timestamp:
-                    image_path = capture.get('image_path')
-                    if image_path and os.path.exists(image_path):
-                        return send_file(image_path, mimetype='image/jpeg')
-                    break
-            
-            # Fallback: Try standard filename format
+            # The date shard is derived from the timestamp - no query needed
+            image_path = resolve_image_path(timestamp)
+            if image_path:
+                return send_file(image_path, mimetype='image/jpeg', max_age=IMAGE_CACHE_SECONDS)
+            
+            # Indexed lookup of image_path in the database (other cameras)
+            capture = data_manager.get_capture(timestamp)
+            if capture:
+                image_path = capture.get('image_path')
+                if image_path and os.path.exists(image_path):
+                    return send_file(image_path, mimetype='image/jpeg', max_age=IMAGE_CACHE_SECONDS)
+            
+            # Fallback: Try other filename formats
             possible_names = [
-                f"sky_{timestamp}.jpg",
                 f"sky_{timestamp}.JPG",
                 f"{timestamp}.jpg",
                 timestamp
             ]
             
             for filename in possible_names:
-                filepath = os.path.join(IMAGE_DIR, filename)
-                if os.path.exists(filepath):
-                    return send_file(filepath, mimetype='image/jpeg')
+                if '/' in filename or '\\' in filename or '..' in filename:
+                    continue
+                filepath = find_image_file(filename)
+                if filepath:
+                    return send_file(filepath, mimetype='image/jpeg', max_age=IMAGE_CACHE_SECONDS)
             
             # If still not found, return 404
             return "Image not found", 404
@@ -350,9 +561,9 @@ def register_routes(app):
             if '/' in filename or '\\' in filename or '..' in filename:
                 return "Invalid filename", 400
             
-            filepath = os.path.join(IMAGE_DIR, filename)
-            if os.path.exists(filepath):
-                return send_file(filepath, mimetype='image/jpeg')
+            filepath = find_image_file(filename)
+            if filepath:
+                return send_file(filepath, mimetype='image/jpeg', max_age=IMAGE_CACHE_SECONDS)
             
             return "File not found", 404
         except Exception as e:
@@ -360,22 +571,118 @@ def register_routes(app):
             return str(e), 500
     
     # ================================================================
-    # EXPORT
+    # THUMBNAILS
     # ================================================================
     
-    @app.route('/export/csv')
-    def export_csv():
-        """Export data to CSV"""
+    def send_thumbnail(image_path):
+        """Serve (creating if needed) the thumbnail for an image"""
+        thumb_path = get_or_create_thumbnail(image_path)
+        if not thumb_path:
+            return "Thumbnail not available", 404
+        
+        # Images never change once captured, so thumbnails can be cached
+        return send_file(thumb_path, mimetype='image/jpeg', max_age=THUMBNAIL_CACHE_SECONDS)
+    
+    @app.route('/thumb/<filename>')
+    def get_thumbnail_by_filename(filename):
+        """Serve thumbnail by image filename"""
         try:
-            filename = f"sky_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            filepath = data_manager.export_csv(filename)
+            # Security check
+            if '/' in filename or '\\' in filename or '..' in filename:
+                return "Invalid filename", 400
             
-            if os.path.exists(filepath):
-                return send_file(filepath, as_attachment=True)
-            else:
-                return "Export failed", 500
+            image_path = find_image_file(filename)
+            if not image_path:
+                return "Thumbnail not available", 404
+            
+            return send_thumbnail(image_path)
+        except Exception as e:
+            print(f"Error serving thumbnail {filename}: {e}")
+            return str(e), 500
+    
+    @app.route('/thumb/capture/<timestamp>')
+    def get_thumbnail_by_timestamp(timestamp):
+        """Serve thumbnail by capture timestamp (YYYYMMDD_HHMMSS)"""
+        try:
+            image_path = resolve_image_path(timestamp)
+            if not image_path:
+                capture = data_manager.get_capture(timestamp)
+                if not capture or not capture.get('image_path'):
+                    return "Thumbnail not available", 404
+                image_path = capture['image_path']
+            
+            return send_thumbnail(image_path)
+        except Exception as e:
+            print(f"Error serving thumbnail {timestamp}: {e}")
+            return str(e), 500
+    
+    # ================================================================
+    # TIME-LAPSE
+    # ================================================================
+    
+    @app.route('/timelapse/<date_key>')
+    def get_timelapse(date_key):
+        """
+        Serve a day's MJPEG/AVI time-lapse
+        
+        A missing or outdated video is built in the background: 202 with
+        Retry-After until the first build is done, the previous build
+        meanwhile when there is one.
+        
+        Query parameters:
+            device: Camera id (default camera if omitted)
+        """
+        try:
+            video_path, state = timelapse_builder.get_video(date_key, request.args.get('device'))
+            if not video_path:
+                return timelapse_pending_response(state)
+            return send_file(video_path, mimetype='video/x-msvideo',
+                             download_name=os.path.basename(video_path))
+        except ValueError:
+            return "Date must be YYYYMMDD", 400
+        except Exception as e:
+            print(f"Error serving time-lapse {date_key}: {e}")
+            return str(e), 500
+    
+    @app.route('/timelapse/<date_key>/sheet')
+    def get_contact_sheet(date_key):
+        """Serve a day's contact sheet JPEG (built in the background, like /timelapse)"""
+        try:
+            sheet_path, state = timelapse_builder.get_contact_sheet(date_key, request.args.get('device'))
+            if not sheet_path:
+                return timelapse_pending_response(state)
+            return send_file(sheet_path, mimetype='image/jpeg')
+        except ValueError:
+            return "Date must be YYYYMMDD", 400
         except Exception as e:
-            print(f"Error in /export/csv: {e}")
+            print(f"Error serving contact sheet {date_key}: {e}")
+            return str(e), 500
+    
+    # ================================================================
+    # EXPORT
+    # ================================================================
+    
+    @app.route('/export/<export_format>')
+    def export_data(export_format):
+        """
+        Stream all data as /export/csv or /export/ndjson
+        
+        Query args (all optional): start / end (YYYYMMDD_HHMMSS or ISO),
+        columns (comma-separated, see EXPORT_COLUMNS), device.
+        """
+        try:
+            columns = request.args.get('columns')
+            return stream_export(
+                export_format,
+                columns=[c.strip() for c in columns.split(',') if c.strip()] if columns else None,
+                start=parse_time_filter(request.args.get('start')),
+                end=parse_time_filter(request.args.get('end')),
+                device_id=request.args.get('device')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"Error in /export/{export_format}: {e}")
             traceback.print_exc()
             return str(e), 500
 
@@ -487,6 +794,12 @@ FILE_MANAGER_TEMPLATE = '''
         .btn-danger:hover {
             background: #c0392b;
         }
+        .date-select {
+            padding: 8px 12px;
+            border: 1px solid #ddd;
+            border-radius: 8px;
+            font-size: 0.9em;
+        }
         
         .file-table {
             width: 100%;
@@ -599,13 +912,17 @@ FILE_MANAGER_TEMPLATE = '''
 
     <div class="card">
         <div class="stats-bar" id="statsBar">
+            <div class="stat-item">
+                <div class="stat-value" id="dayCount">-</div>
+                <div class="stat-label">Days With Images</div>
+            </div>
             <div class="stat-item">
                 <div class="stat-value" id="totalFiles">-</div>
-                <div class="stat-label">Total Files</div>
+                <div class="stat-label">Files This Day</div>
             </div>
             <div class="stat-item">
                 <div class="stat-value" id="totalSize">-</div>
-                <div class="stat-label">Total Size (MB)</div>
+                <div class="stat-label">Size This Day (MB)</div>
             </div>
             <div class="stat-item">
                 <div class="stat-value" id="selectedCount">0</div>
@@ -614,10 +931,11 @@ FILE_MANAGER_TEMPLATE = '''
         </div>
 
         <div class="controls">
+            <select id="dateSelect" class="date-select" onchange="loadFiles(this.value)"></select>
             <button class="btn btn-primary" onclick="selectAll()">Select All</button>
             <button class="btn btn-primary" onclick="selectNone()">Select None</button>
             <button class="btn btn-danger" onclick="deleteSelected()">Delete Selected</button>
-            <button class="btn btn-primary" onclick="loadFiles()">🔄 Refresh</button>
+            <button class="btn btn-primary" onclick="loadFiles(currentDate)">🔄 Refresh</button>
         </div>
 
         <div id="fileList" class="loading">
@@ -634,14 +952,41 @@ FILE_MANAGER_TEMPLATE = '''
 <script>
 let allFiles = [];
 let selectedFiles = new Set();
+let currentDate = null;
+
+function formatDateKey(key) {
+    if (key === 'unsorted') return 'Not sorted into days';
+    return key.slice(0, 4) + '-' + key.slice(4, 6) + '-' + key.slice(6, 8);
+}
+
+function renderDates(dates, selected) {
+    const select = document.getElementById('dateSelect');
+    select.innerHTML = dates.map(key =>
+        `<option value="${key}" ${key === selected ? 'selected' : ''}>${formatDateKey(key)}</option>`
+    ).join('');
+    select.style.display = dates.length ? '' : 'none';
+    document.getElementById('dayCount').textContent =
+        dates.filter(key => key !== 'unsorted').length;
+}
 
-function loadFiles() {
-    fetch('/api/files/list')
+function loadFiles(date) {
+    const url = date ? '/api/files/list?date=' + encodeURIComponent(date) : '/api/files/list';
+    fetch(url)
         .then(r => r.json())
         .then(data => {
+            const dates = data.dates || [];
+            
+            // The day was emptied (last file deleted) - show the newest one left
+            if (date && !dates.includes(date) && dates.length) {
+                loadFiles(dates[0]);
+                return;
+            }
+            
+            currentDate = data.date;
             allFiles = data.files || [];
             selectedFiles.clear();
             
+            renderDates(dates, currentDate);
             document.getElementById('totalFiles').textContent = data.total || 0;
             document.getElementById('totalSize').textContent = data.total_size_mb || 0;
             document.getElementById('selectedCount').textContent = 0;
@@ -676,7 +1021,7 @@ function renderFiles() {
         const checked = selectedFiles.has(file.filename) ? 'checked' : '';
         html += `<tr>
             <td><input type="checkbox" ${checked} onchange="toggleFile('${file.filename}', this.checked)"></td>
-            <td><img src="/image/file/${file.filename}" class="file-thumb" 
+            <td><img src="/thumb/${file.filename}" class="file-thumb" loading="lazy"
                      onclick="showModal('/image/file/${file.filename}')"></td>
             <td>${file.filename}</td>
             <td>${file.timestamp}</td>
@@ -729,7 +1074,7 @@ function deleteFile(filename) {
         .then(r => r.json())
         .then(data => {
             if (data.success) {
-                loadFiles();
+                loadFiles(currentDate);
             } else {
                 alert('Delete failed: ' + (data.error || 'Unknown error'));
             }
@@ -751,7 +1096,7 @@ function deleteSelected() {
             .then(r => r.json())
             .then(data => {
                 if (data.success) deleted++;
-                if (deleted === selectedFiles.size) loadFiles();
+                if (deleted === selectedFiles.size) loadFiles(currentDate);
             });
     });
 }
@@ -4,6 +4,8 @@ Handles database setup and data migration checks
 """
 
 from database_schema import create_database
+from database_operations import summaries_need_rebuild, rebuild_summaries
+from ingest_queue import ingest_writer
 
 
 def initialize_database():
@@ -12,6 +14,15 @@ def initialize_database():
     create_database()
 
 
+def migrate_summary_tables():
+    """Populate hourly/daily rollups for databases created before they existed"""
+    if summaries_need_rebuild():
+        print("Building hourly/daily summaries from existing captures...")
+        day_count = ingest_writer.run(rebuild_summaries)
+        print(f"✓ Summarized {day_count} day(s)")
+
+
 def initialize_server():
     """Run all server initialization steps"""
     initialize_database()
+    migrate_summary_tables()
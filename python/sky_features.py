@@ -3,6 +3,7 @@ Sky Features Analysis Module
 Detailed sky feature detection and coverage analysis
 """
 
+import numpy as np
 from python_config import (
     SKY_SAMPLE_RATE, SKY_BLUE_MIN_VALUE, SKY_BLUE_RED_DIFF, SKY_BLUE_GREEN_DIFF,
     SKY_WHITE_BRIGHTNESS_MIN, SKY_WHITE_VARIANCE_MAX, COLOR_GRAY_VARIANCE_THRESHOLD,
@@ -10,12 +11,13 @@ from python_config import (
 )
 
 
-def analyze_sky_features(image):
+def analyze_sky_features(image, sample_rate=SKY_SAMPLE_RATE):
     """
     Detailed sky feature analysis - counts pixels of different types
     
     Args:
         image: OpenCV image (BGR format)
+        sample_rate: Sample every Nth pixel (default SKY_SAMPLE_RATE)
     
     Returns:
         dict: Sky coverage percentages and overall assessment
@@ -23,8 +25,23 @@ def analyze_sky_features(image):
     height, width = image.shape[:2]
     
     # Count pixels by type
-    pixel_counts = count_sky_pixels(image, height, width)
+    pixel_counts = count_sky_pixels(image, height, width, sample_rate)
     
+    return build_sky_features_result(pixel_counts)
+
+
+def build_sky_features_result(pixel_counts):
+    """
+    Build the sky features result dict from pixel counts
+    
+    Shared by analyze_sky_features() and the fused analysis kernel.
+    
+    Args:
+        pixel_counts: Dict from count_sky_pixels()
+    
+    Returns:
+        dict: Same format as analyze_sky_features()
+    """
     # Calculate percentages
     percentages = calculate_coverage_percentages(pixel_counts)
     
@@ -40,42 +57,70 @@ def analyze_sky_features(image):
     }
 
 
-def count_sky_pixels(image, height, width):
+def count_sky_pixels(image, height, width, sample_rate=SKY_SAMPLE_RATE):
     """
     Count pixels of different sky types
     
+    Uses the vectorized masks from classify_pixel_masks() instead of
+    visiting each sampled pixel in Python, so a low sample rate (even 1)
+    stays cheap.
+    
     Args:
         image: OpenCV image
         height, width: Image dimensions
+        sample_rate: Sample every Nth pixel in each direction
     
     Returns:
         dict: Pixel counts by type
     """
-    blue_pixels = 0
-    gray_pixels = 0
-    white_pixels = 0
-    total_sampled = 0
-    
-    # Sample pixels using config sample rate
-    for y in range(0, height, SKY_SAMPLE_RATE):
-        for x in range(0, width, SKY_SAMPLE_RATE):
-            b, g, r = image[y, x]
-            pixel_type = classify_pixel(r, g, b)
-            
-            if pixel_type == 'blue':
-                blue_pixels += 1
-            elif pixel_type == 'white':
-                white_pixels += 1
-            elif pixel_type == 'gray':
-                gray_pixels += 1
-            
-            total_sampled += 1
+    sampled = image[0:height:sample_rate, 0:width:sample_rate]
+    masks = classify_pixel_masks(sampled)
+    
+    return {
+        'blue': int(np.count_nonzero(masks['blue'])),
+        'gray': int(np.count_nonzero(masks['gray'])),
+        'white': int(np.count_nonzero(masks['white'])),
+        'total': int(sampled.shape[0] * sampled.shape[1])
+    }
+
+
+def classify_pixel_masks(image):
+    """
+    Classify every pixel of an image at once
+    
+    Array equivalent of classify_pixel(): the same rules are applied in
+    the same priority order (blue, then white, then gray), so each pixel
+    is set in at most one mask.
+    
+    Args:
+        image: OpenCV image (BGR format), or a strided view of one
+    
+    Returns:
+        dict: Boolean masks keyed 'blue', 'white' and 'gray'
+    """
+    # Widen to int16 so sums and differences cannot wrap around
+    b = image[..., 0].astype(np.int16)
+    g = image[..., 1].astype(np.int16)
+    r = image[..., 2].astype(np.int16)
+    
+    channel_sum = r + g + b
+    color_var = np.abs(r - g) + np.abs(g - b) + np.abs(b - r)
+    
+    blue = ((b > SKY_BLUE_MIN_VALUE) &
+            (b > r + SKY_BLUE_RED_DIFF) &
+            (b > g + SKY_BLUE_GREEN_DIFF))
+    
+    # brightness > MIN  <=>  (r + g + b) > 3 * MIN, without a float divide
+    white = (~blue &
+             (channel_sum > 3 * SKY_WHITE_BRIGHTNESS_MIN) &
+             (color_var < SKY_WHITE_VARIANCE_MAX))
+    
+    gray = ~blue & ~white & (color_var < COLOR_GRAY_VARIANCE_THRESHOLD)
     
     return {
-        'blue': blue_pixels,
-        'gray': gray_pixels,
-        'white': white_pixels,
-        'total': total_sampled
+        'blue': blue,
+        'white': white,
+        'gray': gray
     }
 
 
@@ -89,8 +134,9 @@ def classify_pixel(r, g, b):
     Returns:
         str: 'blue', 'white', 'gray', or 'other'
     """
-    brightness = (int(r) + int(g) + int(b)) / 3
-    color_var = abs(int(r) - int(g)) + abs(int(g) - int(b)) + abs(int(b) - int(r))
+    r, g, b = int(r), int(g), int(b)
+    brightness = (r + g + b) / 3
+    color_var = abs(r - g) + abs(g - b) + abs(b - r)
     
     # Check for blue sky
     if (b > SKY_BLUE_MIN_VALUE and 
@@ -0,0 +1,172 @@
+"""
+Thumbnails Module
+Small JPEG previews for the gallery and file manager
+
+Thumbnails are generated at ingest time by a background thread (so the
+poller never waits on them) and lazily on first request for images that
+were captured before this module existed. They are stored under
+THUMBNAIL_DIR at the same relative path as the full-size image has
+under IMAGE_DIR.
+"""
+
+import os
+import queue
+import threading
+import cv2
+from python_config import (
+    IMAGE_DIR, THUMBNAIL_DIR, THUMBNAIL_MAX_SIZE, THUMBNAIL_QUALITY, THUMBNAIL_QUEUE_MAX
+)
+from image_storage import write_bytes_to_disk
+
+
+def get_thumbnail_path(image_path):
+    """
+    Get the thumbnail path for a full-size image
+
+    Args:
+        image_path: Path to the full-size image
+
+    Returns:
+        str: Path of its thumbnail
+    """
+    relative = os.path.relpath(image_path, IMAGE_DIR)
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(image_path)
+    return os.path.join(THUMBNAIL_DIR, relative)
+
+
+def create_thumbnail(image_path, image=None):
+    """
+    Generate and store the thumbnail for an image
+
+    Args:
+        image_path: Path to the full-size image
+        image: Optional already-decoded OpenCV image (avoids re-reading)
+
+    Returns:
+        str: Thumbnail path, or None on failure
+    """
+    if image is None:
+        image = load_image_for_thumbnail(image_path)
+        if image is None:
+            return None
+
+    height, width = image.shape[:2]
+    scale = THUMBNAIL_MAX_SIZE / max(height, width)
+
+    if scale < 1:
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, THUMBNAIL_QUALITY])
+    if not ok:
+        print(f"[Thumbs] ✗ Could not encode thumbnail for {image_path}")
+        return None
+
+    thumb_path = get_thumbnail_path(image_path)
+    os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+    return write_bytes_to_disk(encoded.tobytes(), thumb_path)
+
+
+def load_image_for_thumbnail(image_path):
+    """
+    Decode an image at reduced resolution where possible
+
+    JPEG can be decoded straight at 1/2, 1/4 or 1/8 scale from the DCT,
+    which is much cheaper than a full decode followed by a resize.
+    """
+    if not os.path.exists(image_path):
+        return None
+
+    # Largest reduction that still leaves at least THUMBNAIL_MAX_SIZE pixels
+    header = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if header is None:
+        return None
+
+    longest_at_eighth = max(header.shape[:2])
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                         (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if longest_at_eighth * 8 // factor >= THUMBNAIL_MAX_SIZE:
+            return cv2.imread(image_path, flag)
+
+    return cv2.imread(image_path, cv2.IMREAD_COLOR)
+
+
+def get_or_create_thumbnail(image_path):
+    """
+    Return an up-to-date thumbnail, generating it if missing (lazy backfill)
+
+    Args:
+        image_path: Path to the full-size image
+
+    Returns:
+        str: Thumbnail path, or None if the source image is missing
+    """
+    if not os.path.exists(image_path):
+        return None
+
+    thumb_path = get_thumbnail_path(image_path)
+
+    if (os.path.exists(thumb_path) and
+            os.path.getmtime(thumb_path) >= os.path.getmtime(image_path)):
+        return thumb_path
+
+    return create_thumbnail(image_path)
+
+
+def delete_thumbnail(image_path):
+    """Remove the thumbnail for an image, if any"""
+    thumb_path = get_thumbnail_path(image_path)
+    if os.path.exists(thumb_path):
+        os.remove(thumb_path)
+
+
+# ========================================
+# BACKGROUND GENERATION (ingest time)
+# ========================================
+
+class ThumbnailWorker:
+    """Background thread that builds thumbnails for newly stored images"""
+
+    def __init__(self, max_pending=THUMBNAIL_QUEUE_MAX):
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, image_path, image=None):
+        """
+        Queue a thumbnail without blocking the caller
+
+        If the queue is full the request is dropped; the thumbnail is then
+        generated lazily the first time it is requested.
+        """
+        if not image_path:
+            return
+
+        self._ensure_started()
+
+        try:
+            self.queue.put_nowait((image_path, image))
+        except queue.Full:
+            pass
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self._run, name="ThumbnailWorker", daemon=True
+                )
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            image_path, image = self.queue.get()
+            try:
+                create_thumbnail(image_path, image)
+            except Exception as e:
+                print(f"[Thumbs] ✗ Error creating thumbnail for {image_path}: {e}")
+
+
+# Global instance
+thumbnail_worker = ThumbnailWorker()
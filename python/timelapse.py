@@ -0,0 +1,482 @@
+"""
+Time-lapse Module
+Daily time-lapse videos and contact sheets built from the capture archive
+
+Reviewing a day in the gallery means loading every image separately. This
+module turns a camera's day into two cached files instead: an MJPEG/AVI
+time-lapse (OpenCV VideoWriter) and a tiled contact-sheet JPEG, both
+produced in a single pass over the images.
+
+Frames are decoded ahead of the encoder by a small thread pool (OpenCV
+releases the GIL while decoding), straight at 1/2, 1/4 or 1/8 scale when
+the output is smaller than the camera's resolution.
+
+Results live under TIMELAPSE_DIR with a manifest recording which captures
+they were built from (count, newest capture_id and newest analysis_id), so
+a day is rebuilt only after it gets new captures, loses some to retention,
+or is reanalyzed (the contact sheet shows each capture's score).
+
+Web requests never build in their own thread: get_video() and
+get_contact_sheet() queue a missing or stale day on one background
+worker and return the previous build (if any) meanwhile, so the same
+day is only ever built once at a time.
+
+Usage:
+    python timelapse.py 20260304               # Build one day
+    python timelapse.py 20260301 20260307      # Build every day in a range
+    python timelapse.py 20260304 --force       # Rebuild even if cached
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import cv2
+import numpy as np
+from analysis_core import REDUCED_DECODE_FLAGS
+from database_operations import get_captures_for_date, get_captures_by_date_range
+from image_storage import write_bytes_to_disk
+from python_config import (
+    TIMELAPSE_DIR, TIMELAPSE_FPS, TIMELAPSE_FRAME_WIDTH, TIMELAPSE_QUALITY,
+    TIMELAPSE_DECODE_WORKERS, CONTACT_SHEET_COLUMNS, CONTACT_SHEET_TILE_WIDTH,
+    CONTACT_SHEET_QUALITY, DEFAULT_DEVICE_ID
+)
+
+# Most captures in one day's video (288/day at the default 5 min interval)
+TIMELAPSE_MAX_FRAMES = 5000
+
+
+def get_timelapse_paths(date_key, device_id=None):
+    """
+    Cache files of one camera's day
+
+    Args:
+        date_key: YYYYMMDD
+        device_id: Camera id (default camera if None)
+
+    Returns:
+        dict: video, contact_sheet and manifest paths
+    """
+    directory = TIMELAPSE_DIR
+    if device_id and device_id != DEFAULT_DEVICE_ID:
+        directory = os.path.join(TIMELAPSE_DIR, device_id)
+
+    return {
+        'video': os.path.join(directory, f"{date_key}.avi"),
+        'contact_sheet': os.path.join(directory, f"{date_key}_sheet.jpg"),
+        'manifest': os.path.join(directory, f"{date_key}.json")
+    }
+
+
+def get_capture_signature(captures):
+    """Changes whenever a capture is added to or removed from the day, or reanalyzed"""
+    if not captures:
+        return "0-0-0"
+    newest_analysis = max(c.get('analysis_id') or 0 for c in captures)
+    return f"{len(captures)}-{max(c['capture_id'] for c in captures)}-{newest_analysis}"
+
+
+def read_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_cache_current(paths, signature, manifest=None):
+    """Whether the cached video and contact sheet were built from these captures"""
+    manifest = manifest or read_manifest(paths['manifest'])
+    return bool(manifest and manifest.get('signature') == signature
+                and os.path.exists(paths['video']) and os.path.exists(paths['contact_sheet']))
+
+
+def load_day_captures(date_key, device_id):
+    """
+    One camera's captures with an image for a day, oldest first
+
+    Raises:
+        ValueError: date_key is not a valid YYYYMMDD date
+    """
+    sql_date = datetime.strptime(date_key, "%Y%m%d").strftime("%Y-%m-%d")
+
+    # Newest first from the database; played back oldest first
+    captures = get_captures_for_date(sql_date, TIMELAPSE_MAX_FRAMES, device_id)
+    captures.reverse()
+    return [c for c in captures if c.get('image_path')]
+
+
+def choose_decode_scale(image_path, needed_width):
+    """
+    Largest JPEG reduction that still decodes at least needed_width pixels
+
+    Args:
+        image_path: A representative image of the day
+        needed_width: Width the output needs (0 = full resolution)
+
+    Returns:
+        int: 1, 2, 4 or 8
+    """
+    if not needed_width:
+        return 1
+
+    header = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if header is None:
+        return 1
+
+    width_at_eighth = header.shape[1]
+    for factor in (8, 4, 2):
+        if width_at_eighth * 8 // factor >= needed_width:
+            return factor
+    return 1
+
+
+def read_frame(image_path, decode_scale):
+    """Decode one stored image (runs on a decode thread)"""
+    try:
+        with open(image_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    return cv2.imdecode(np.frombuffer(data, np.uint8), REDUCED_DECODE_FLAGS[decode_scale])
+
+
+def iter_frames(captures, decode_scale, workers=TIMELAPSE_DECODE_WORKERS):
+    """
+    Decode captures in order, a few frames ahead of the consumer
+
+    Args:
+        captures: Capture dicts (image_path), in playback order
+        decode_scale: JPEG reduction (1, 2, 4 or 8)
+        workers: Decode threads
+
+    Yields:
+        tuple: (capture, frame) for every image that could be decoded
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="TimelapseDecode") as pool:
+        pending = deque()
+
+        for capture in captures:
+            pending.append((capture, pool.submit(read_frame, capture['image_path'], decode_scale)))
+
+            # Bounded read-ahead keeps memory flat however long the day is
+            if len(pending) >= workers * 2:
+                capture, future = pending.popleft()
+                frame = future.result()
+                if frame is not None:
+                    yield capture, frame
+
+        while pending:
+            capture, future = pending.popleft()
+            frame = future.result()
+            if frame is not None:
+                yield capture, frame
+
+
+def get_tile_label(capture):
+    """HH:MM (and score, when analyzed) drawn on a contact-sheet tile"""
+    label = str(capture.get('timestamp', ''))[11:16]
+    score = capture.get('clear_sky_score')
+    if score is not None:
+        label += f" {score:.0f}%"
+    return label
+
+
+def draw_label(image, text, origin):
+    """Text with a dark outline so it reads on sky and ground alike"""
+    for color, thickness in (((0, 0, 0), 3), ((255, 255, 255), 1)):
+        cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, thickness, cv2.LINE_AA)
+
+
+class TimelapseBuilder:
+    """Builds and caches daily time-lapses and contact sheets"""
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+        # Background builds for web requests: one at a time, each day queued once
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Timelapse")
+        self._queued = set()
+        # (date_key, device_id) -> (signature, state) of background builds
+        # that produced nothing, so they are not retried until the day changes
+        self._unbuilt = {}
+
+    def _get_lock(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_video(self, date_key, device_id=None):
+        """
+        Path of a day's time-lapse, queuing a build if missing or stale
+
+        Returns:
+            tuple: (path or None, state), see get_cached()
+        """
+        return self.get_cached(date_key, device_id, 'video')
+
+    def get_contact_sheet(self, date_key, device_id=None):
+        """
+        Path of a day's contact sheet, queuing a build if missing or stale
+
+        Returns:
+            tuple: (path or None, state), see get_cached()
+        """
+        return self.get_cached(date_key, device_id, 'contact_sheet')
+
+    def get_cached(self, date_key, device_id, kind):
+        """
+        Look up a cached file without building in the calling thread
+
+        Args:
+            date_key: YYYYMMDD
+            device_id: Camera id (default camera if None)
+            kind: 'video' or 'contact_sheet'
+
+        Returns:
+            tuple: (path or None, state) where state is 'current',
+                   'stale' (previous build returned, rebuild queued),
+                   'building' (nothing to return yet, build queued),
+                   'empty' (no images that day, or none could be decoded)
+                   or 'failed' (the last build raised)
+
+        Raises:
+            ValueError: date_key is not a valid YYYYMMDD date
+        """
+        device_id = device_id or DEFAULT_DEVICE_ID
+        captures = load_day_captures(date_key, device_id)
+        if not captures:
+            return None, 'empty'
+
+        paths = get_timelapse_paths(date_key, device_id)
+        signature = get_capture_signature(captures)
+        if is_cache_current(paths, signature):
+            return paths[kind], 'current'
+
+        unbuilt = self._unbuilt.get((date_key, device_id))
+        if unbuilt and unbuilt[0] == signature:
+            return None, unbuilt[1]
+
+        self.queue_build(date_key, device_id)
+        if os.path.exists(paths[kind]):
+            return paths[kind], 'stale'
+        return None, 'building'
+
+    def queue_build(self, date_key, device_id=None):
+        """Build a day on the background worker (no-op if already queued)"""
+        key = (date_key, device_id or DEFAULT_DEVICE_ID)
+        with self._locks_lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._executor.submit(self._build_queued, key)
+
+    def _build_queued(self, key):
+        date_key, device_id = key
+        captures = []
+        try:
+            captures = load_day_captures(date_key, device_id)
+            if self._build(date_key, device_id, captures, False) is None:
+                self._unbuilt[key] = (get_capture_signature(captures), 'empty')
+            else:
+                self._unbuilt.pop(key, None)
+        except Exception as e:
+            print(f"[Timelapse] ✗ {device_id} {date_key}: {e}")
+            self._unbuilt[key] = (get_capture_signature(captures), 'failed')
+        finally:
+            with self._locks_lock:
+                self._queued.discard(key)
+
+    def build_day(self, date_key, device_id=None, force=False):
+        """
+        Build (or reuse) one camera's time-lapse and contact sheet for a day
+
+        Args:
+            date_key: YYYYMMDD
+            device_id: Camera id (default camera if None)
+            force: Rebuild even if the cache is current
+
+        Returns:
+            dict: video, contact_sheet, frames and cached (True if nothing
+                  was rebuilt), or None if the day has no images
+
+        Raises:
+            ValueError: date_key is not a valid YYYYMMDD date
+        """
+        device_id = device_id or DEFAULT_DEVICE_ID
+        return self._build(date_key, device_id, load_day_captures(date_key, device_id), force)
+
+    def build_range(self, start_key, end_key, device_id=None, force=False):
+        """
+        Build every day between two dates (inclusive) that has captures
+
+        Args:
+            start_key: First day, YYYYMMDD
+            end_key: Last day, YYYYMMDD
+            device_id: Only this camera (default: every camera)
+            force: Rebuild even if cached
+
+        Returns:
+            list: build_day() results, oldest day first
+        """
+        start = datetime.strptime(start_key, "%Y%m%d").strftime("%Y-%m-%d")
+        end = datetime.strptime(end_key, "%Y%m%d").strftime("%Y-%m-%d")
+
+        days = set()
+        for capture in get_captures_by_date_range(start, end):
+            if device_id is None or capture['device_id'] == device_id:
+                days.add((str(capture['timestamp'])[:10].replace('-', ''), capture['device_id']))
+
+        # Each day is reloaded through build_day() so it gets the same capture
+        # and analysis data (and signature) as a single-day build
+        results = []
+        for date_key, camera in sorted(days):
+            result = self.build_day(date_key, camera, force)
+            if result:
+                results.append(result)
+        return results
+
+    def _build(self, date_key, device_id, captures, force):
+        paths = get_timelapse_paths(date_key, device_id)
+        if not captures:
+            return None
+
+        signature = get_capture_signature(captures)
+
+        with self._get_lock((date_key, device_id)):
+            manifest = read_manifest(paths['manifest'])
+            if not force and is_cache_current(paths, signature, manifest):
+                return {
+                    'video': paths['video'], 'contact_sheet': paths['contact_sheet'],
+                    'frames': manifest.get('frames', 0), 'cached': True
+                }
+
+            start = time.time()
+            frames = self._render(captures, paths)
+            if not frames:
+                return None
+
+            manifest = {
+                'date': date_key,
+                'device_id': device_id,
+                'signature': signature,
+                'frames': frames,
+                'built_at': datetime.now().isoformat()
+            }
+            write_bytes_to_disk(json.dumps(manifest).encode(), paths['manifest'])
+
+            print(f"[Timelapse] ✓ {device_id} {date_key}: {frames} frame(s) in {time.time() - start:.1f}s")
+            return {
+                'video': paths['video'], 'contact_sheet': paths['contact_sheet'],
+                'frames': frames, 'cached': False
+            }
+
+    def _render(self, captures, paths):
+        """
+        Encode the video and contact sheet in one pass over the frames
+
+        Returns:
+            int: Frames written (0 if no image could be decoded)
+        """
+        os.makedirs(os.path.dirname(paths['video']), exist_ok=True)
+
+        needed_width = max(TIMELAPSE_FRAME_WIDTH, CONTACT_SHEET_TILE_WIDTH) if TIMELAPSE_FRAME_WIDTH else 0
+        decode_scale = choose_decode_scale(captures[0]['image_path'], needed_width)
+
+        # VideoWriter picks the container from the extension
+        # Unique per build: two processes (web + CLI) may render the same day
+        tmp_video = f"{paths['video']}.{os.getpid()}.{threading.get_ident()}.tmp.avi"
+        writer = None
+        sheet = None
+        frames = 0
+
+        try:
+            for capture, frame in iter_frames(captures, decode_scale):
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    video_width = TIMELAPSE_FRAME_WIDTH or width
+                    video_size = (video_width, max(2, round(height * video_width / width / 2) * 2))
+                    tile_size = (CONTACT_SHEET_TILE_WIDTH,
+                                 max(1, round(height * CONTACT_SHEET_TILE_WIDTH / width)))
+
+                    writer = cv2.VideoWriter(tmp_video, cv2.VideoWriter_fourcc(*'MJPG'),
+                                             TIMELAPSE_FPS, video_size)
+                    if not writer.isOpened():
+                        raise RuntimeError(f"Could not open video writer for {tmp_video}")
+                    writer.set(cv2.VIDEOWRITER_PROP_QUALITY, TIMELAPSE_QUALITY)
+
+                    rows = math.ceil(len(captures) / CONTACT_SHEET_COLUMNS)
+                    sheet = np.zeros((rows * tile_size[1], CONTACT_SHEET_COLUMNS * tile_size[0], 3), np.uint8)
+
+                if frame.shape[1::-1] != video_size:
+                    video_frame = cv2.resize(frame, video_size, interpolation=cv2.INTER_AREA)
+                else:
+                    video_frame = frame
+                writer.write(video_frame)
+
+                tile = cv2.resize(frame, tile_size, interpolation=cv2.INTER_AREA)
+                draw_label(tile, get_tile_label(capture), (4, tile_size[1] - 6))
+                row, column = divmod(frames, CONTACT_SHEET_COLUMNS)
+                y, x = row * tile_size[1], column * tile_size[0]
+                sheet[y:y + tile_size[1], x:x + tile_size[0]] = tile
+
+                frames += 1
+        except Exception:
+            if writer is not None:
+                writer.release()
+                writer = None
+            if os.path.exists(tmp_video):
+                os.remove(tmp_video)
+            raise
+        finally:
+            if writer is not None:
+                writer.release()
+
+        if not frames:
+            return 0
+
+        # Drop rows left empty by images that could not be decoded
+        used_rows = math.ceil(frames / CONTACT_SHEET_COLUMNS)
+        sheet = sheet[:used_rows * tile_size[1]]
+
+        ok, encoded = cv2.imencode('.jpg', sheet, [cv2.IMWRITE_JPEG_QUALITY, CONTACT_SHEET_QUALITY])
+        if not ok:
+            raise RuntimeError("Could not encode contact sheet")
+
+        os.replace(tmp_video, paths['video'])
+        write_bytes_to_disk(encoded.tobytes(), paths['contact_sheet'])
+        return frames
+
+
+# Global instance
+timelapse_builder = TimelapseBuilder()
+
+
+if __name__ == '__main__':
+    import sys
+    from database_schema import create_database
+
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    create_database()
+    force = '--force' in sys.argv
+
+    if len(args) == 1:
+        result = timelapse_builder.build_day(args[0], force=force)
+        results = [result] if result else []
+    else:
+        results = timelapse_builder.build_range(args[0], args[1], force=force)
+
+    for result in results:
+        state = "cached" if result['cached'] else "built"
+        print(f"  {result['video']} ({result['frames']} frames, {state})")
+    if not results:
+        print("No captures in that range")
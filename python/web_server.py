@@ -4,7 +4,7 @@ Handles Flask app creation and Waitress server configuration
 """
 
 from flask import Flask
-from python_config import ENABLE_CORS
+from python_config import ENABLE_CORS, SERVER_THREADS, SSE_MAX_CLIENTS
 from routes import register_routes
 
 
@@ -35,10 +35,12 @@ def start_web_server(app, host, port):
             app,
             host=host,
             port=port,
-            threads=8,
+            # Event streams each hold a thread for as long as the tab is open
+            threads=SERVER_THREADS + SSE_MAX_CLIENTS,
             channel_timeout=30,
             cleanup_interval=10
         )
     except KeyboardInterrupt:
-        from graceful_shutdown import print_shutdown_message
+        from graceful_shutdown import shutdown_services, print_shutdown_message
+        shutdown_services()
         print_shutdown_message()
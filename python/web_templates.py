@@ -66,18 +66,24 @@ extra_styles_live = """
 """ + LOADING_STYLES
 
 extra_scripts_live = """
+    let lastCaptureId = null;
+    
     function updateData() {
-        fetch('/api/latest')
+        // no-cache: the browser revalidates with If-None-Match and the
+        // server answers 304 until a new capture arrives
+        fetch('/api/latest', { cache: 'no-cache' })
             .then(r => r.json())
             .then(data => {
                 if (!data.timestamp) return;
+                if (data.capture_id === lastCaptureId) return;
+                lastCaptureId = data.capture_id;
                 
                 const a = data.analysis || {};
                 const b = a.brightness || {};
                 const f = a.sky_features || a.features || {};
                 
                 document.getElementById('content').innerHTML = `
-                    <img src="/image/latest?t=${Date.now()}" style="max-width:100%;border-radius:10px;">
+                    <img src="/image/latest?id=${data.capture_id}" style="max-width:100%;border-radius:10px;">
                     <div class="condition">${a.sky_condition || a.summary || 'Analyzing...'}</div>
                     <h3>Clear Sky Score</h3>
                     <div class="score-bar">
@@ -99,8 +105,28 @@ extra_scripts_live = """
                 `;
             });
     }
+    // Push updates over Server-Sent Events; poll only while the stream
+    // is unavailable (old browser, server at its client limit, reconnecting)
+    let pollTimer = null;
+    
+    function startPolling() {
+        if (!pollTimer) pollTimer = setInterval(updateData, 5000);
+    }
+    
+    function stopPolling() {
+        if (pollTimer) { clearInterval(pollTimer); pollTimer = null; }
+    }
+    
     updateData();
-    setInterval(updateData, 5000);
+    
+    if (window.EventSource) {
+        const events = new EventSource('/api/events');
+        events.addEventListener('capture', updateData);
+        events.onopen = () => { stopPolling(); updateData(); };
+        events.onerror = () => startPolling();
+    } else {
+        startPolling();
+    }
 """
 
 content_live = f"""